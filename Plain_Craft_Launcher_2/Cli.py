@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""命令行入口
+
+不导入 PyQt5，供机房、展台等无界面环境的部署脚本安装与启动游戏：
+
+    python Cli.py install 1.20.1
+    python Cli.py verify 1.20.1 --deep
+    python Cli.py launch 1.20.1 --account someone@example.com
+    python Cli.py launch 1.20.1 --offline Steve
+    python Cli.py launch 1.20.1 --no-network
+    python Cli.py list --remote
+    python Cli.py logs collected_logs/ --module ModDownload --level Warn --since 2026-10-01
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import uuid
+
+# 与图形界面一样以程序目录为工作目录，./data 等相对路径才会指向同一位置
+PROGRAM_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def offline_uuid(username: str) -> str:
+    """离线玩家的 UUID，与原版 UUID.nameUUIDFromBytes("OfflinePlayer:" + name) 一致"""
+    digest = bytearray(hashlib.md5(f"OfflinePlayer:{username}".encode("utf-8")).digest())
+    digest[6] = digest[6] & 0x0f | 0x30
+    digest[8] = digest[8] & 0x3f | 0x80
+    return uuid.UUID(bytes=bytes(digest)).hex
+
+
+def progress_callback(quiet: bool) -> dict:
+    """把安装进度输出到 stderr 的回调字典"""
+    if quiet:
+        return {}
+    state = {"max": 0, "percent": -1}
+
+    def set_byte_max(value):
+        state["max"] = value
+
+    def set_byte_progress(value):
+        percent = value * 100 // state["max"] if state["max"] else 100
+        if percent != state["percent"]:
+            state["percent"] = percent
+            print(f"\r{percent:3d}% {value / 1024 / 1024:.1f} MB", end="", file=sys.stderr, flush=True)
+
+    def set_status(status):
+        if state["percent"] >= 0:
+            print(file=sys.stderr)
+            state["percent"] = -1
+        print(status, file=sys.stderr)
+
+    return {"setStatus": set_status, "setByteMax": set_byte_max, "setByteProgress": set_byte_progress}
+
+
+def command_install(args) -> int:
+    from Modules.Minecraft.ModInstall import install_minecraft_version
+
+    plan = install_minecraft_version(args.version, args.minecraft_dir, progress_callback(args.quiet),
+                                     max_workers=args.workers, store_dir=args.store, deep_verify=args.deep)
+    print(f"{plan.version_id}: {len(plan.items)} 个文件已就绪")
+    return 0
+
+
+def command_verify(args) -> int:
+    from Modules.Minecraft.ModInstall import MinecraftInstaller, create_engine
+
+    with create_engine(args.minecraft_dir, args.workers, args.store, args.deep) as engine:
+        plan, missing = MinecraftInstaller(engine).dry_run(args.version, args.minecraft_dir)
+    for item in missing:
+        print(f"{item.kind}\t{item.path}")
+    print(f"{plan.version_id}: 共 {len(plan.items)} 个文件，{len(missing)} 个缺失或损坏", file=sys.stderr)
+    return 1 if missing else 0
+
+
+def command_launch(args) -> int:
+    from Modules.Minecraft.ModLaunch import launch, CLIENT_ID
+    from Modules.Minecraft.ModNetwork import ConnectivityMonitor, STATE_OFFLINE, STARTUP_PROBE_TIMEOUT
+
+    monitor = None
+    if args.no_network:
+        no_network = True
+    else:
+        monitor = ConnectivityMonitor()
+        no_network = monitor.probe(STARTUP_PROBE_TIMEOUT) == STATE_OFFLINE
+        # 登录期间在后台继续探测，安装时按最新的状态决定是否离线
+        monitor.start()
+    if no_network:
+        print("网络不可用，离线启动", file=sys.stderr)
+
+    if args.offline:
+        options = {"username": args.offline, "uuid": offline_uuid(args.offline), "token": "0"}
+    else:
+        from Modules.Minecraft.ModMsAuth import MinecraftMicrosoftLogin
+
+        login = MinecraftMicrosoftLogin(client_id=CLIENT_ID)
+        result = login.login_offline(args.account) if no_network else login.login(args.account)
+        if not result["success"]:
+            print(f"登录失败: {result['error']}", file=sys.stderr)
+            if "details" in result:
+                print(f"详细信息: {result['details']}", file=sys.stderr)
+            return 1
+        profile = result["profile"]
+        options = {"username": profile["name"], "uuid": profile["id"], "token": result["minecraft_token"]}
+
+    if monitor is not None:
+        monitor.stop(wait=False)
+        if monitor.state == STATE_OFFLINE and not no_network:
+            print("网络已断开，使用上次安装成功的文件离线启动", file=sys.stderr)
+        no_network = monitor.state == STATE_OFFLINE
+
+    if args.java:
+        options["executablePath"] = args.java
+    if args.jvm_arg:
+        options["jvmArguments"] = args.jvm_arg
+
+    game = launch(options, args.minecraft_dir, args.version, callback=progress_callback(args.quiet),
+                  offline=no_network, max_workers=args.workers, store_dir=args.store, deep_verify=args.deep)
+    exit_code = game.wait()
+    for cause in game.crash_causes:
+        print(f"可能的崩溃原因: {cause['cause']}", file=sys.stderr)
+    return exit_code
+
+
+def installed_versions(minecraft_dir: str) -> list:
+    """列出 versions 目录中的版本，版本 JSON 缺少字段或损坏时类型记为 unknown"""
+    versions = []
+    versions_dir = os.path.join(minecraft_dir, "versions")
+    for version_id in sorted(os.listdir(versions_dir)) if os.path.isdir(versions_dir) else []:
+        try:
+            with open(os.path.join(versions_dir, version_id, f"{version_id}.json"), "r", encoding="utf-8") as f:
+                version_type = json.load(f).get("type", "unknown")
+        except FileNotFoundError:
+            continue
+        except ValueError:
+            version_type = "unknown"
+        versions.append({"id": version_id, "type": version_type})
+    return versions
+
+
+def command_list(args) -> int:
+    if args.remote:
+        from Modules.Minecraft.ModMetaCache import MetadataCache
+        from Modules.Minecraft.ModPlan import VERSION_MANIFEST_URL
+
+        versions = MetadataCache().get_json(VERSION_MANIFEST_URL)["versions"]
+    else:
+        versions = installed_versions(args.minecraft_dir)
+    for version in versions:
+        if args.type is None or version["type"] == args.type:
+            print(f"{version['id']}\t{version['type']}")
+    return 0
+
+
+def parse_time(value: str) -> float:
+    """把 ISO 8601 格式的本地时间（如 2026-10-01 或 2026-10-01T12:00）转换为时间戳"""
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def command_logs(args) -> int:
+    from Modules.Base.ModLogging import launcher_data_folder
+    from Modules.Base.ModStructuredLog import query_logs, DEFAULT_STRUCTURED_DIR
+
+    paths = args.paths or [os.path.join(launcher_data_folder, DEFAULT_STRUCTURED_DIR)]
+    for path, record in query_logs(paths, args.module, args.level, args.since, args.until, args.grep):
+        if args.json:
+            print(json.dumps(record, ensure_ascii=False))
+            continue
+        timestamp = datetime.datetime.fromtimestamp(record["ts"]).strftime("%Y-%m-%d %H:%M:%S")
+        line = f"{timestamp} [{record['level']}] [{record['module']}] ({record['thread']}) {record['msg']}"
+        print(f"{path}: {line}" if args.with_path else line)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pcl", description="Plain Craft Launcher 2 命令行")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--minecraft-dir", help=".minecraft 目录，默认为官方启动器的目录")
+    common.add_argument("--workers", type=int, default=16, help="并发下载数")
+    common.add_argument("--store", help="共享文件仓库目录")
+    common.add_argument("--deep", action="store_true", help="忽略校验索引，重新计算所有文件的哈希")
+    common.add_argument("--quiet", action="store_true", help="不输出安装进度")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    install = subparsers.add_parser("install", parents=[common], help="安装或修复版本")
+    install.add_argument("version")
+    install.set_defaults(handler=command_install)
+
+    verify = subparsers.add_parser("verify", parents=[common], help="检查版本文件，不下载，有缺失时退出码为 1")
+    verify.add_argument("version")
+    verify.set_defaults(handler=command_verify)
+
+    launch = subparsers.add_parser("launch", parents=[common], help="安装并启动版本，等待游戏退出")
+    launch.add_argument("version")
+    account = launch.add_mutually_exclusive_group()
+    account.add_argument("--account", help="使用的微软账户（邮箱），默认使用缓存中的第一个账户")
+    account.add_argument("--offline", metavar="USERNAME", help="以离线模式使用该用户名启动")
+    launch.add_argument("--java", help="Java 可执行文件路径")
+    launch.add_argument("--jvm-arg", action="append", help="额外的 JVM 参数，可重复")
+    launch.add_argument("--no-network", action="store_true",
+                        help="不访问网络，使用缓存的账户信息与上次安装成功的文件启动；检测到断网时自动启用")
+    launch.set_defaults(handler=command_launch)
+
+    list_parser = subparsers.add_parser("list", parents=[common], help="列出已安装的版本")
+    list_parser.add_argument("--remote", action="store_true", help="列出可安装的版本")
+    list_parser.add_argument("--type", help="只列出该类型的版本，如 release、snapshot")
+    list_parser.set_defaults(handler=command_list)
+
+    logs = subparsers.add_parser("logs", help="筛选结构化日志（JSONL 与 zstd 归档）")
+    logs.add_argument("paths", nargs="*", help="日志文件或目录，目录递归查找，默认为本机的结构化日志目录")
+    logs.add_argument("--module", help="只显示该模块的日志")
+    logs.add_argument("--level", help="只显示不低于该级别的日志，如 Warn")
+    logs.add_argument("--since", type=parse_time, help="开始时间，如 2026-10-01 或 2026-10-01T12:00")
+    logs.add_argument("--until", type=parse_time, help="结束时间")
+    logs.add_argument("--grep", help="只显示消息中包含该字符串的日志")
+    logs.add_argument("--json", action="store_true", help="原样输出 JSON 记录")
+    logs.add_argument("--with-path", action="store_true", help="在每行前显示所在文件")
+    logs.set_defaults(handler=command_logs)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if hasattr(args, "minecraft_dir") and args.minecraft_dir is None:
+        import minecraft_launcher_lib as mclib
+        args.minecraft_dir = mclib.utils.get_minecraft_directory()
+    # 相对路径按调用时的工作目录解析，只写文件名的 Java 仍从 PATH 中查找
+    for name in ("minecraft_dir", "store", "java"):
+        value = getattr(args, name, None)
+        if value and (name != "java" or os.path.dirname(value)):
+            setattr(args, name, os.path.abspath(value))
+    if hasattr(args, "paths"):
+        args.paths = [os.path.abspath(path) for path in args.paths]
+    os.chdir(PROGRAM_DIR)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
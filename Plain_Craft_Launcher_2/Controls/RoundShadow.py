@@ -1,16 +1,18 @@
 # -*- coding: utf-8 -*-
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QRectF, QPoint
+from PyQt5.QtCore import Qt, QRectF, QPoint, pyqtSlot
 from PyQt5.QtGui import QPainter, QPainterPath, QBrush, QColor, QPaintEvent, QCursor
 
 from Modules.Base.ModSetup import ModSetup as Setup
+from Modules.Base.ModSetupSignal import settings_signal
 
 class RoundShadow(QWidget):
     """圆角边框类"""
 
     def __init__(self):
         super().__init__()
-        self.border_width = Setup().get_settings('corner_radius')  # 从设置中获取圆角值
+        self.border_width = Setup().get_settings('corner_radius')  # 从设置中获取圆角值，变化时更新
+        settings_signal().changed.connect(self._on_setting_changed)
         # 设置 窗口无边框和背景透明 *必须
         self.setAttribute(Qt.WA_TranslucentBackground)
         # 修改窗口标志，添加系统菜单和最小化按钮标志
@@ -26,6 +28,13 @@ class RoundShadow(QWidget):
         # 启用鼠标追踪，以便检测鼠标位置
         self.setMouseTracking(True)
         
+    @pyqtSlot(str, object)
+    def _on_setting_changed(self, setting, value):
+        """圆角设置变化时重绘"""
+        if setting == 'corner_radius':
+            self.border_width = value
+            self.update()
+
     def paintEvent(self, a0: QPaintEvent):
         # 阴影
         path = QPainterPath()
@@ -3,7 +3,7 @@ import sys
 import os
 from PyQt5.QtWidgets import QApplication, QWidget
 from PyQt5.QtGui import QResizeEvent
-from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QRect
+from PyQt5.QtCore import Qt, QPropertyAnimation, QEasingCurve, QRect, pyqtSlot
 
 from Modules.Base.ModLogging import ModLogging, LoggingType as LT
 
@@ -13,6 +13,7 @@ os.chdir(os.path.dirname(os.path.abspath(__file__)))
 from FormMain_ui import Ui_FormMain
 from Controls.RoundShadow import RoundShadow
 from Modules.Base.ModSetup import ModSetup as Setup
+from Modules.Base.ModSetupSignal import settings_signal
 
 class FormMain(RoundShadow):
     """主窗口"""
@@ -21,6 +22,8 @@ class FormMain(RoundShadow):
         super().__init__()
         # 初始化日志
         self.logger = ModLogging(module_name="FormMain")
+        # 缓存标题栏高度，设置变化时更新布局，不在每次 resizeEvent 中查询
+        self.title_height = Setup().get_settings('title_height')
         
         # 设置窗口标志，确保最小化时显示在任务栏
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.Window | Qt.WindowSystemMenuHint | Qt.WindowMinimizeButtonHint)
@@ -59,6 +62,8 @@ class FormMain(RoundShadow):
         self.ui.PanTitle.mouseMoveEvent = self.PanTitle_mouseMoveEvent
         self.ui.PanTitle.mouseReleaseEvent = self.PanTitle_mouseReleaseEvent
 
+        settings_signal().changed.connect(self._on_title_height_changed)
+
         self.logger.write("窗口加载第三步完成", LT.INFO)
 
         self.logger.write("FormMain 加载完成", LT.INFO)
@@ -81,13 +86,24 @@ class FormMain(RoundShadow):
             self._drag_start_pos = None
             event.accept()
 
+    @pyqtSlot(str, object)
+    def _on_title_height_changed(self, setting, value):
+        """标题栏高度设置变化时更新布局"""
+        if setting == 'title_height':
+            self.title_height = value
+            self.update_layout()
+
     def resizeEvent(self, a0: QResizeEvent):
         """处理窗口大小变化"""
         super().resizeEvent(a0)
+        self.update_layout()
+
+    def update_layout(self):
+        """按窗口大小与标题栏高度更新控件位置"""
         # 更新容器大小
         self.container.setGeometry(9, 9, self.width() - 18, self.height() - 18)
         
-        title_height = Setup().get_settings('title_height')
+        title_height = self.title_height
         self.ui.PanTitle.setGeometry(0, 0, self.container.width(), title_height)
         self.ui.PanMain.setGeometry(0, title_height, self.container.width(), self.container.height() - title_height)
 
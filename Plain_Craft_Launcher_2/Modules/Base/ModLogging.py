@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
+import atexit
+import collections
 import datetime
+import os
+import threading
+import time
 from enum import Enum
 from traceback import format_exc as getTraceBack
-from os import remove as removeFile, makedirs
+from os import remove as removeFile, replace as replaceFile, makedirs
 from os.path import exists, dirname, abspath, join
 import sys
 
@@ -21,12 +26,38 @@ launcher_data_folder = join(get_program_dir(), 'logs')
 if not exists(launcher_data_folder):
     makedirs(launcher_data_folder)
 
+# 保留的日志文件数量，Log1 为本次运行
+LOG_FILE_COUNT = 5
+
+# 日志文件的写缓冲大小（字节）
+LOG_BUFFER_SIZE = 64 * 1024
+
+# 后台写入线程最多等待多久写入一批日志（秒），Error 与 Fatal 立即写入
+LOG_FLUSH_INTERVAL = 0.5
+
+# 等待写入的日志条数上限
+LOG_QUEUE_SIZE = 10000
+
+# 最低日志级别，格式为 "Info" 或 "Info,ModDownload=Debug"（逗号分隔，模块名=级别），也可在设置中用 log_levels 指定
+LOG_LEVEL_ENV = 'PCL_LOG_LEVEL'
+
+# 是否输出到控制台（1 / 0），默认只在未打包运行时输出，也可在设置中用 log_console 指定
+LOG_CONSOLE_ENV = 'PCL_LOG_CONSOLE'
+
+# 设为 1 时同时写入结构化的 JSONL 日志（见 ModStructuredLog），也可在设置中用 log_jsonl 指定
+LOG_JSONL_ENV = 'PCL_LOG_JSONL'
+
+# 队列已满时的处理方式：丢弃新的 Info 与 Warn 日志并计数，或让调用线程等待；Error 与 Fatal 总是等待，不会丢弃
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+
 
 def now() -> str:
     return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
 
 class LoggingType(Enum):
+    DEBUG = 'Debug'
     INFO = 'Info'
     WARN = 'Warn'
     ERROR = 'Error'
@@ -39,6 +70,256 @@ class LoggingType(Enum):
         return self.value
 
 
+# 级别从低到高的顺序
+LEVEL_ORDER = {level: index for index, level in enumerate(LoggingType)}
+
+
+def parse_level(value: 'LoggingType | str') -> LoggingType:
+    """把 "debug"、"Info" 等字符串转换为 LoggingType"""
+    return value if isinstance(value, LoggingType) else LoggingType(value.strip().capitalize())
+
+
+def is_frozen() -> bool:
+    """是否为打包后的程序（PyInstaller 设置 sys.frozen，Nuitka 定义 __compiled__）"""
+    return getattr(sys, 'frozen', False) or '__compiled__' in globals()
+
+
+class LogManager():
+    """
+    进程内唯一的日志管理器
+
+    第一次使用时轮换一次日志文件（Log1 -> Log2 ... Log4 -> Log5，只重命名不复制）。
+    ModLogging 只把日志放入队列（deque 的 append 与 popleft 在 CPython 中是原子操作，不需要加锁），
+    由后台线程成批格式化后写入 Log1 与控制台，调用线程（通常是 GUI 线程）不做任何 I/O
+    """
+
+    _instance: 'LogManager | None' = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, folder: str = launcher_data_folder, queue_size: int = LOG_QUEUE_SIZE,
+                 overflow: str = OVERFLOW_DROP, flush_interval: float = LOG_FLUSH_INTERVAL) -> None:
+        self.folder = folder
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.flush_interval = flush_interval
+        # 各模块的最低级别，未设置的模块使用 default_level
+        self.default_level = LoggingType.INFO
+        self._module_levels: dict = {}
+        self.console = sys.stdout is not None and not is_frozen()
+        # 附加的日志输出，见 add_sink
+        self._sinks: list = []
+        # 因队列已满被丢弃的日志条数
+        self.dropped = 0
+        self._queue: collections.deque = collections.deque()
+        self._wakeup = threading.Event()
+        self._written = threading.Condition()
+        self._closed = False
+        self._rotate()
+        self._file = open(join(folder, 'Log1.log'), 'w', encoding='utf-8', buffering=LOG_BUFFER_SIZE)
+        try:
+            removeFile('crash.log')
+        except:
+            pass
+        self._writer = threading.Thread(target=self._run, name='LogWriter', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+        self._configure_from_env()
+
+    @classmethod
+    def instance(cls) -> 'LogManager':
+        """返回日志管理器，第一次调用时创建"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def _rotate(self) -> None:
+        for i in range(LOG_FILE_COUNT - 1, 0, -1):
+            try:
+                replaceFile(join(self.folder, f'Log{i}.log'), join(self.folder, f'Log{i + 1}.log'))
+            except FileNotFoundError:
+                pass
+
+    def _configure_from_env(self) -> None:
+        try:
+            if os.environ.get(LOG_LEVEL_ENV):
+                self.configure_levels(os.environ[LOG_LEVEL_ENV])
+        except ValueError:
+            pass
+        if os.environ.get(LOG_CONSOLE_ENV):
+            self.console = os.environ[LOG_CONSOLE_ENV] not in ('0', 'false', 'False')
+        if os.environ.get(LOG_JSONL_ENV) not in (None, '', '0', 'false', 'False'):
+            self.enable_jsonl()
+
+    def add_sink(self, sink) -> None:
+        """添加日志输出
+
+        sink 需要实现 write_records(records) 与 close()，records 为
+        (time.time(), time.monotonic(), 级别, 模块名, 线程名, 消息) 的列表，在写入线程中调用
+        """
+        self._sinks.append(sink)
+
+    def enable_jsonl(self) -> None:
+        """启用日志目录下 structured 文件夹中的 JSONL 日志，重复调用无效；无法创建文件时只记录警告，不影响启动"""
+        from .ModStructuredLog import JsonlLogSink, DEFAULT_STRUCTURED_DIR
+        if not any(isinstance(sink, JsonlLogSink) for sink in self._sinks):
+            try:
+                self.add_sink(JsonlLogSink(join(self.folder, DEFAULT_STRUCTURED_DIR)))
+            except OSError as e:
+                self.submit(LoggingType.WARN, 'Logging', '结构化日志启用失败: %s', (e,))
+
+    def get_logger(self, module_name: str) -> 'ModLogging':
+        """返回写入本管理器的具名日志器"""
+        return ModLogging(module_name=module_name)
+
+    def set_level(self, level: 'LoggingType | str', module_name: str | None = None) -> None:
+        """设置最低日志级别，module_name 为 None 时设置默认级别"""
+        level = parse_level(level)
+        if module_name is None:
+            self.default_level = level
+        else:
+            self._module_levels[module_name] = level
+
+    def configure_levels(self, spec: 'str | dict') -> None:
+        """按 "Info,ModDownload=Debug" 格式的字符串或 {模块名: 级别} 字典设置级别，字典中键 "" 表示默认级别
+
+        Raises:
+            ValueError: 级别名称无效
+        """
+        if isinstance(spec, str):
+            items = [part.split('=', 1) if '=' in part else ('', part) for part in spec.split(',') if part.strip()]
+        else:
+            items = spec.items()
+        for module_name, level in items:
+            self.set_level(level, module_name.strip() or None)
+
+    def is_enabled(self, module_name: str | None, log_level: LoggingType) -> bool:
+        """该模块的该级别日志是否会被记录"""
+        return LEVEL_ORDER[log_level] >= LEVEL_ORDER[self._module_levels.get(module_name, self.default_level)]
+
+    def submit(self, log_level: LoggingType, module_name: str | None, message: str, args: tuple = ()) -> None:
+        """把一条日志放入队列，Error 立即唤醒写入线程，Fatal 等待写入完成后才返回
+
+        args 不为空时在写入线程中以 message % args 格式化
+        """
+        if self._closed:
+            return
+        urgent = log_level in (LoggingType.ERROR, LoggingType.FATAL)
+        if len(self._queue) >= self.queue_size:
+            if self.overflow == OVERFLOW_DROP and not urgent:
+                self.dropped += 1
+                return
+            self._wakeup.set()
+            with self._written:
+                self._written.wait_for(lambda: len(self._queue) < self.queue_size or self._closed)
+        # 需要等待写入的日志带上一个事件，写入线程写完它所在的一批后设置
+        waiter = threading.Event() if log_level == LoggingType.FATAL else None
+        self._queue.append((waiter, time.time(), time.monotonic(), threading.current_thread().name,
+                            log_level, module_name, message, args))
+        if urgent:
+            self._wakeup.set()
+        if waiter is not None:
+            self._wait_written(waiter)
+
+    def flush(self) -> None:
+        """等待调用前已放入队列的日志全部写入磁盘"""
+        # 队列先进先出，这个不产生输出的标记被处理时，之前放入的日志都已写入
+        waiter = threading.Event()
+        self._queue.append((waiter, None, None, None, None, None, None, None))
+        self._wakeup.set()
+        self._wait_written(waiter)
+
+    def _wait_written(self, waiter: threading.Event) -> None:
+        # 写入线程已经结束（程序退出）时不再等待
+        while not waiter.wait(self.flush_interval):
+            if not self._writer.is_alive():
+                return
+
+    def close(self) -> None:
+        """写入剩余的日志并关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            closing = self._closed
+            self._drain()
+            if closing:
+                self._file.close()
+                for sink in self._sinks:
+                    sink.close()
+                with self._written:
+                    self._written.notify_all()
+                return
+
+    def _drain(self) -> None:
+        """取出队列中的全部日志，一次写入文件与控制台"""
+        records = []
+        while True:
+            try:
+                records.append(self._queue.popleft())
+            except IndexError:
+                break
+        dropped, self.dropped = self.dropped, 0
+        if not records and not dropped:
+            return
+        try:
+            file_lines = []
+            console_lines = []
+            console = self.console and sys.stdout is not None
+            structured = []
+            second, timestamp = None, ''
+            for _, created, monotonic, thread_name, log_level, module_name, message, args in records:
+                if log_level is None:
+                    # flush 的标记
+                    continue
+                level = str(log_level)
+                # 同一秒内的日志共用格式化好的时间
+                if int(created) != second:
+                    second = int(created)
+                    timestamp = datetime.datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S')
+                if args:
+                    try:
+                        message = message % args
+                    except (TypeError, ValueError):
+                        message = f'{message} {args!r}'
+                file_lines.append(f'[{level}]{SPACE_MAP[level]}[{module_name}] {timestamp} > {message}\n')
+                if self._sinks:
+                    structured.append((created, monotonic, level, module_name, thread_name, message))
+                if console:
+                    console_lines.append(
+                        f'{COLOR_MAP[level]}[{level}]{clear}{SPACE_MAP[level]}[{module_name}] {timestamp} > {message}\n')
+            if dropped:
+                file_lines.append(f'[Warn]  [Logging] {now()} > 日志队列已满，丢弃了 {dropped} 条日志\n')
+                console_lines.append(f'{yellow}[Warn]{clear}  [Logging] {now()} > 日志队列已满，丢弃了 {dropped} 条日志\n')
+            self._file.write(''.join(file_lines))
+            self._file.flush()
+            for sink in self._sinks:
+                sink.write_records(structured)
+            # 不带控制台打包时 sys.stdout 为 None
+            if console:
+                sys.stdout.write(''.join(console_lines))
+                sys.stdout.flush()
+        except Exception as ex:
+            timestamp = now()
+            with open('crash.log', 'a', encoding='utf-8') as fatal:
+                fatal.write(f'[FATAL] [Logging] {timestamp} > 记录日志时发生错误\n')
+                fatal.write(f'[FATAL] 错误类型：{type(ex).__name__}\n')
+                fatal.write(f'[FATAL] 错误堆栈信息：\n{str(getTraceBack())}\n')
+        finally:
+            for record in records:
+                if record[0] is not None:
+                    record[0].set()
+            with self._written:
+                self._written.notify_all()
+
+
 class ModLogging():
     def __init__(
             self,
@@ -54,28 +335,21 @@ class ModLogging():
         2. Return:
         ---------------
         None
+
+        日志文件只在进程中第一次创建 ModLogging 时轮换一次，之后创建只是记录模块名
         """
         self.module_name = module_name
+        self.manager = LogManager.instance()
 
-        for i in range(4, 0, -1):
-            old_log = f'{launcher_data_folder}/Log{i}.log'
-            new_log = f'{launcher_data_folder}/Log{i + 1}.log'
-            try:
-                with open(old_log, 'r', encoding='utf-8') as f1:
-                    with open(new_log, 'w', encoding='utf-8') as f2:
-                        f2.write(f1.read())
-            except FileNotFoundError:
-                pass
-        open(f'{launcher_data_folder}/Log1.log', 'w', encoding='utf-8').close()
-        try:
-            removeFile('crash.log')
-        except:
-            pass
+    def is_enabled(self, log_level: LoggingType) -> bool:
+        """本模块的该级别日志是否会被记录，用于跳过只为日志准备数据的代码"""
+        return self.manager.is_enabled(self.module_name, log_level)
 
     def write(
             self,
             message: str,
-            log_level: LoggingType
+            log_level: LoggingType,
+            *args
     ) -> None:
         r'''
         Writing A Log Into File
@@ -84,36 +358,24 @@ class ModLogging():
         ---------------------------------
         message : str  # Message want to log
         log_level: str | None = 'INFO' # Log Level
+        *args # 传入时 message 为 % 格式，低于最低级别的日志不会格式化，
+              # 格式化在写入线程中进行，不要传入之后会被修改的可变对象
         
         2. Return:
         ---------------
         None
         '''
+        if not self.manager.is_enabled(self.module_name, log_level):
+            return
         try:
-            space_map = {
-                'Info': '  ',
-                'Warn': '  ',
-                'Error': ' ',
-                'Fatal': ' '
-            }
-            log_level_str = str(log_level)
-            with open(f'{launcher_data_folder}/Log1.log', 'a', encoding='utf-8') as f:
-                f.write(f'[{log_level_str}]{space_map[log_level_str]}[{self.module_name}] {now()} > {message}\n')
-            color_map = {
-                'Info': green,
-                'Warn': yellow,
-                'Error': red,
-                'Fatal': red
-            }
-            print(
-                f'{color_map[log_level_str]}[{log_level_str}]{clear}{space_map[log_level_str]}[{self.module_name}] {now()} > {message}')
+            self.manager.submit(log_level, self.module_name, message, args)
         except Exception as ex:
-            time = now()
-            print(f'[{red}FATAL{clear}] [Logging] {time} > 记录日志时发生错误')
+            timestamp = now()
+            print(f'[{red}FATAL{clear}] [Logging] {timestamp} > 记录日志时发生错误')
             print(f'[{red}FATAL{clear}] 错误信息：{type(ex).__name__}')
             print(f'[{red}FATAL{clear}] 错误堆栈信息：\n{str(getTraceBack())}')
             with open('crash.log', 'a', encoding='utf-8') as fatal:
-                fatal.write(f'[FATAL] [Logging] {time} > 记录日志时发生错误\n')
+                fatal.write(f'[FATAL] [Logging] {timestamp} > 记录日志时发生错误\n')
                 fatal.write(f'[FATAL] 错误类型：{type(ex).__name__}\n')
                 fatal.write(f'[FATAL] 错误堆栈信息：\n{str(getTraceBack())}\n')
 
@@ -128,3 +390,18 @@ blue = '\033[34m'
 magenta = '\033[35m'
 cyan = '\033[36m'
 white = '\033[37m'
+
+SPACE_MAP = {
+    'Debug': ' ',
+    'Info': '  ',
+    'Warn': '  ',
+    'Error': ' ',
+    'Fatal': ' '
+}
+COLOR_MAP = {
+    'Debug': cyan,
+    'Info': green,
+    'Warn': yellow,
+    'Error': red,
+    'Fatal': red
+}
@@ -1,11 +1,86 @@
 # -*- coding: utf-8 -*-
+import atexit
 import json
-from typing import Any
-from .ModLogging import ModLogging, LoggingType as LT
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from .ModLogging import ModLogging, LogManager, LoggingType as LT
+
+# 设置文件路径
+SETTINGS_FILE = "./data/Config.json"
+
+# 设置修改后等待多久没有新的修改再保存（秒），连续拖动滑块等操作只写入一次
+SAVE_DELAY = 0.5
+
+# 持续修改时最长多久保存一次（秒）
+SAVE_MAX_DELAY = 5
+
+# 声明的设置项：名称 -> (类型, 默认值)，只有这些设置项会写入设置文件；默认值为 None 的设置项也可以为 None
+SETTINGS_SCHEMA: Dict[str, Tuple[Union[type, Tuple[type, ...]], Any]] = {
+    "ColorBrush0": (str, "#ffffff"),
+    "ColorBrush1": (str, "#343d4a"),
+    "ColorBrush2": (str, "#0b5bcb"),
+    "ColorBrush3": (str, "#1370f3"),
+    "ColorBrush4": (str, "#4890f5"),
+    "ColorBrush5": (str, "#96c0f9"),
+    "ColorBrush6": (str, "#d5e6fd"),
+    "ColorBrush7": (str, "#e0eafd"),
+    "ColorBrush8": (str, "#eaf2fe"),
+    "ColorBrushBg0": (str, "#96c0f9"),
+    "ColorBrushBg1": (str, "#bee0eafd"),
+    "corner_radius": (int, 10),
+    "size": (tuple, (900, 550)),
+    "title_height": (int, 48),
+    # 日志设置，见 apply_logging_settings
+    "log_levels": ((dict, str), None),
+    "log_console": (bool, None),
+    "log_jsonl": (bool, None)
+}
+
+DEFAULT_SETTINGS: Dict[str, Any] = {key: default for key, (_, default) in SETTINGS_SCHEMA.items()}
+
+# 设置项在 ModSetup._values 中的位置
+_SETTING_INDEX: Dict[str, int] = {key: index for index, key in enumerate(SETTINGS_SCHEMA)}
+
+
+def convert_setting(key: str, value: Any) -> Any:
+    """按声明的类型检查设置值，JSON 读出的列表转换为元组
+
+    Raises:
+        KeyError: 设置项未声明
+        TypeError: 设置值的类型不符
+    """
+    value_type, default = SETTINGS_SCHEMA[key]
+    if value is None and default is None:
+        return value
+    if value_type is tuple and isinstance(value, list):
+        return tuple(value)
+    if value_type is int and isinstance(value, float) and value.is_integer():
+        return int(value)
+    # bool 是 int 的子类，不能当作整数
+    if isinstance(value, value_type) and not (value_type is int and isinstance(value, bool)):
+        return value
+    type_names = "/".join(t.__name__ for t in (value_type if isinstance(value_type, tuple) else (value_type,)))
+    raise TypeError(f"设置项 {key} 应为 {type_names}，实际为 {type(value).__name__}")
 
 
 class ModSetup:
-    """写入/读取设置相关的类"""
+    """写入/读取设置相关的类
+
+    设置值按 SETTINGS_SCHEMA 的顺序存放在列表中，修改时检查类型，值发生变化时通知订阅者。
+    控件可以缓存用到的设置值，在设置变化时更新，不必在 resize、paint 中反复查询；
+    订阅者在调用 set_settings 的线程中执行，界面控件应连接 ModSetupSignal.settings_signal().changed，不直接订阅。
+    set_settings 只修改内存中的设置并标记为未保存，由后台线程在修改停止 SAVE_DELAY 秒后统一保存，
+    程序退出时保存尚未写入的修改；保存时先写入临时文件再替换，写入中途崩溃不会损坏设置文件
+
+    Example:
+        setup = ModSetup()
+        radius = setup.get_settings("corner_radius")
+        setup.subscribe("corner_radius", lambda key, value: ...)
+    """
+    __slots__ = ("_initialized", "logger", "_values", "_extra_settings", "_listeners", "_save_condition",
+                 "_save_lock", "_dirty_since", "_changed_at", "_save_thread")
     _instance = None
 
     def __new__(cls):
@@ -21,57 +96,182 @@ class ModSetup:
         self._initialized = True
 
         self.logger = ModLogging(module_name="ModSetup")
+        self._values: List[Any] = list(DEFAULT_SETTINGS.values())
+        # 设置文件中未声明的设置项（如较新版本写入的），保存时原样写回
+        self._extra_settings: Dict[str, Any] = {}
+        # 设置项 -> 订阅者，键为 None 的订阅者接收所有设置项的变化
+        self._listeners: Dict[Optional[str], List[Callable[[str, Any], None]]] = {}
+        self._save_condition = threading.Condition()
+        self._save_lock = threading.Lock()
+        # 最早一次与最近一次未保存修改的时间（time.monotonic()），None 表示没有未保存的修改
+        self._dirty_since: Optional[float] = None
+        self._changed_at: Optional[float] = None
+        self._save_thread: Optional[threading.Thread] = None
         self.load_settings()
+        atexit.register(self.flush_settings)
         self.logger.write("ModSetup 加载完成", LT.INFO)
 
     def setup_settings(self):
         """初始化设置项"""
-        self.ColorBrush0 = "#ffffff"
-        self.ColorBrush1 = "#343d4a"
-        self.ColorBrush2 = "#0b5bcb"
-        self.ColorBrush3 = "#1370f3"
-        self.ColorBrush4 = "#4890f5"
-        self.ColorBrush5 = "#96c0f9"
-        self.ColorBrush6 = "#d5e6fd"
-        self.ColorBrush7 = "#e0eafd"
-        self.ColorBrush8 = "#eaf2fe"
-        self.ColorBrushBg0 = "#96c0f9"
-        self.ColorBrushBg1 = "#bee0eafd"
-        self.corner_radius = 10
-        self.size = (900, 550)
-        self.title_height = 48
+        self._values = list(DEFAULT_SETTINGS.values())
 
         self.logger.write("设置初始化完成", LT.INFO)
 
-    def load_settings(self, file_path: str = "./data/Config.json"):
-        """读取已经存储的设置"""
+    def load_settings(self, file_path: str = SETTINGS_FILE):
+        """读取已经存储的设置，文件中缺少或类型不符的设置项使用默认值；
+        设置文件损坏（不是合法的 JSON 对象）时使用默认设置，并把损坏的文件移动到 .bak 以便找回"""
+        self.setup_settings()
         try:
-            with open(file_path, "r") as f:
+            with open(file_path, "r", encoding="utf-8") as f:
                 settings = json.load(f)
-            for key, value in settings.items():
-                setattr(self, key, value)
-
-            self.logger.write("设置文件读取成功", LT.INFO)
+            if not isinstance(settings, dict):
+                raise ValueError(f"顶层应为对象，实际为 {type(settings).__name__}")
         except FileNotFoundError:
-            self.logger.write("设置文件未找到，进行初始化", LT.INFO)
-            self.setup_settings()
+            self.logger.write("设置文件未找到，使用默认设置", LT.INFO)
+            return
+        except (ValueError, OSError) as e:
+            self.logger.write(f"设置文件读取失败，使用默认设置: {e}", LT.WARN)
+            if not isinstance(e, OSError):
+                self._backup_broken_settings(file_path)
+            return
 
-    def save_settings(self, file_path: str = "./data/Config.json"):
-        """保存设置"""
-        settings = self.__dict__
-        with open(file_path, "w") as f:
-            json.dump(settings, f)
+        for key, value in settings.items():
+            if key not in _SETTING_INDEX:
+                self._extra_settings[key] = value
+                continue
+            try:
+                self._values[_SETTING_INDEX[key]] = convert_setting(key, value)
+            except TypeError as e:
+                self.logger.write(f"{e}，使用默认值", LT.WARN)
+
+        self.logger.write("设置文件读取成功", LT.INFO)
+        self.apply_logging_settings()
+
+    def _backup_broken_settings(self, file_path: str) -> None:
+        """把损坏的设置文件移动到 file_path.bak，下次保存时不会覆盖用户原来的设置"""
+        try:
+            os.replace(file_path, f"{file_path}.bak")
+            self.logger.write(f"损坏的设置文件已移动到 {file_path}.bak", LT.WARN)
+        except OSError as e:
+            self.logger.write(f"损坏的设置文件备份失败: {e}", LT.WARN)
+
+    def apply_logging_settings(self):
+        """应用设置中的日志级别（log_levels，如 {"": "Info", "ModDownload": "Debug"}）、
+        控制台输出开关（log_console）与结构化日志开关（log_jsonl）"""
+        manager = LogManager.instance()
+        try:
+            manager.configure_levels(self.get_settings("log_levels") or {})
+        except ValueError as e:
+            self.logger.write(f"日志级别设置无效: {e}", LT.WARN)
+        if self.get_settings("log_console") is not None:
+            manager.console = bool(self.get_settings("log_console"))
+        if self.get_settings("log_jsonl"):
+            manager.enable_jsonl()
+
+    def save_settings(self, file_path: str = SETTINGS_FILE):
+        """立即保存设置，只写入声明的设置项"""
+        with self._save_condition:
+            self._dirty_since = self._changed_at = None
+            settings = dict(self._extra_settings)
+            settings.update(zip(SETTINGS_SCHEMA, self._values))
+        # 保存线程与退出时的保存可能同时进行，临时文件不能同时写入
+        with self._save_lock:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            temp_path = f"{file_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(settings, f, ensure_ascii=False, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
 
         self.logger.write("设置文件保存成功", LT.INFO)
 
+    def flush_settings(self) -> None:
+        """立即保存尚未写入的修改，程序退出时自动调用"""
+        with self._save_condition:
+            if self._dirty_since is None:
+                return
+        try:
+            self.save_settings()
+        except Exception as e:
+            self.logger.write(f"设置文件保存失败: {e}", LT.ERROR)
+
     def get_settings(self, setting: str):
-        """获取设置"""
-        return getattr(self, setting, None)
+        """获取设置，未声明的设置项返回 None"""
+        index = _SETTING_INDEX.get(setting)
+        return None if index is None else self._values[index]
 
     def set_settings(self, setting: str, value: Any) -> None:
-        """设置设置"""
-        setattr(self, setting, value)
-        self.save_settings()
+        """设置设置，值发生变化时通知订阅者，修改稍后在后台保存
+
+        Raises:
+            KeyError: 设置项未声明
+            TypeError: 设置值的类型不符
+        """
+        if setting not in _SETTING_INDEX:
+            raise KeyError(f"未声明的设置项 {setting}")
+        value = convert_setting(setting, value)
+        with self._save_condition:
+            index = _SETTING_INDEX[setting]
+            if self._values[index] == value:
+                return
+            self._values[index] = value
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._changed_at = now
+            if self._save_thread is None:
+                self._save_thread = threading.Thread(target=self._save_loop, name="SettingsSaver", daemon=True)
+                self._save_thread.start()
+            self._save_condition.notify()
+            listeners = self._listeners.get(setting, []) + self._listeners.get(None, [])
+        for listener in listeners:
+            try:
+                listener(setting, value)
+            except Exception as e:
+                self.logger.write(f"设置项 {setting} 的订阅者出错: {e}", LT.ERROR)
+
+    def subscribe(self, setting: Optional[str], listener: Callable[[str, Any], None]) -> None:
+        """订阅设置项的变化，参数为 (设置项, 新值)，在调用 set_settings 的线程中调用；
+        setting 为 None 时订阅所有设置项。订阅者不再需要时用 unsubscribe 取消，
+        界面控件请连接 ModSetupSignal.settings_signal().changed
+
+        Raises:
+            KeyError: 设置项未声明
+        """
+        if setting is not None and setting not in _SETTING_INDEX:
+            raise KeyError(f"未声明的设置项 {setting}")
+        with self._save_condition:
+            self._listeners.setdefault(setting, []).append(listener)
+
+    def unsubscribe(self, setting: Optional[str], listener: Callable[[str, Any], None]) -> None:
+        with self._save_condition:
+            self._listeners[setting].remove(listener)
+
+    def _save_loop(self) -> None:
+        """后台保存线程，等到修改停止 SAVE_DELAY 秒或距第一次修改 SAVE_MAX_DELAY 秒后保存"""
+        while True:
+            with self._save_condition:
+                while True:
+                    if self._dirty_since is None:
+                        self._save_condition.wait()
+                        continue
+                    due = min(self._changed_at + SAVE_DELAY, self._dirty_since + SAVE_MAX_DELAY)
+                    timeout = due - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._save_condition.wait(timeout)
+            # 任何错误都不能让保存线程退出，否则之后的修改在退出前都不会保存
+            try:
+                self.save_settings()
+            except Exception as e:
+                self.logger.write(f"设置文件保存失败: {e}", LT.ERROR)
+
+    def __getattr__(self, name: str) -> Any:
+        """兼容以属性方式读取设置"""
+        if name in _SETTING_INDEX:
+            return self.get_settings(name)
+        raise AttributeError(name)
 
     def __getitem__(self, key: str) -> Any:
         """启用索引"""
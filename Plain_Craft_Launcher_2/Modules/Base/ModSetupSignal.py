@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+设置变化的 Qt 信号
+
+ModSetup 不依赖 Qt，订阅者在调用 set_settings 的线程中执行，可能是后台线程。
+界面控件不直接订阅 ModSetup，而是连接 SettingsSignal.changed：它只订阅一次 ModSetup，
+经排队连接在 GUI 线程中重新发出信号；控件销毁时 Qt 自动断开连接，不会留下已销毁的控件
+"""
+
+import threading
+from typing import Any, Optional
+
+from PyQt5.QtCore import QCoreApplication, QObject, Qt, pyqtSignal
+
+from Modules.Base.ModSetup import ModSetup
+
+
+class SettingsSignal(QObject):
+    """把 ModSetup 的设置变化转发到 GUI 线程的信号
+
+    Example:
+        settings_signal().changed.connect(self._on_setting_changed)
+
+        @pyqtSlot(str, object)
+        def _on_setting_changed(self, setting, value):
+            if setting == 'corner_radius':
+                ...
+    """
+
+    # 设置项变化：(设置项, 新值)，总是在 GUI 线程中发出
+    changed = pyqtSignal(str, object)
+    # 在调用 set_settings 的线程中发出，排队转发到 changed
+    _received = pyqtSignal(str, object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        application = QCoreApplication.instance()
+        if parent is None and application is not None:
+            # 无论在哪个线程中创建，都在 GUI 线程中发出 changed
+            self.moveToThread(application.thread())
+        self._received.connect(self.changed, Qt.QueuedConnection)
+        ModSetup().subscribe(None, self._forward)
+
+    def _forward(self, setting: str, value: Any) -> None:
+        self._received.emit(setting, value)
+
+
+_instance: Optional[SettingsSignal] = None
+_instance_lock = threading.Lock()
+
+
+def settings_signal() -> SettingsSignal:
+    """返回进程内唯一的 SettingsSignal，第一次调用时创建"""
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = SettingsSignal()
+    return _instance
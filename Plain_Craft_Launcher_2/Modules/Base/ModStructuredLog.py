@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+结构化日志模块
+
+JsonlLogSink 作为 LogManager 的附加输出，每条日志写成一行 JSON（时间、单调时钟、模块、级别、线程、消息），
+文件达到大小上限或下次启动时用 zstandard 压缩归档，归档总大小超过上限时删除最早的归档。
+每个进程写入各自的 current-<pid>.jsonl，同时运行的多个启动器不会归档或删除彼此正在写入的文件。
+query_logs 以流的方式逐行解压并筛选归档，不会把整个文件读入内存，可以直接用于从多台电脑收集来的日志目录
+"""
+
+import io
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import zstandard
+
+from .ModLogging import LEVEL_ORDER, LOG_BUFFER_SIZE, parse_level
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 没有 fcntl，其他进程打开中的文件无法被重命名，见 JsonlLogSink._archive_stale
+    fcntl = None
+
+# 结构化日志在日志目录下的文件夹名
+DEFAULT_STRUCTURED_DIR = "structured"
+
+# 正在写入的文件名（current-<pid>.jsonl，旧版本为 current.jsonl）的前后缀与归档文件的后缀
+CURRENT_PREFIX = "current"
+CURRENT_SUFFIX = ".jsonl"
+ARCHIVE_SUFFIX = ".jsonl.zst"
+
+# 单个文件达到该大小（字节）后归档
+DEFAULT_MAX_FILE_SIZE = 8 * 1024 * 1024
+
+# 归档总大小上限（字节）
+DEFAULT_MAX_ARCHIVE_BYTES = 64 * 1024 * 1024
+
+COMPRESSION_LEVEL = 9
+
+
+class JsonlLogSink:
+    """把日志写为 JSONL 的 LogManager 输出，只在日志写入线程中调用"""
+
+    def __init__(self, folder: str, max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+                 max_archive_bytes: int = DEFAULT_MAX_ARCHIVE_BYTES):
+        """初始化输出
+
+        Args:
+            folder: 日志文件夹
+            max_file_size: 单个文件达到该大小（字节）后归档
+            max_archive_bytes: 归档总大小上限（字节），超出时删除最早的归档
+        """
+        self.folder = folder
+        self.max_file_size = max_file_size
+        self.max_archive_bytes = max_archive_bytes
+        self._path = os.path.join(folder, f"{CURRENT_PREFIX}-{os.getpid()}{CURRENT_SUFFIX}")
+        self._archive_count = 0
+        os.makedirs(folder, exist_ok=True)
+        # 已退出的进程留下的记录先归档，每个归档只包含一次运行的日志
+        self._archive_stale()
+        self._file = self._open_current()
+
+    def write_records(self, records: List[Tuple[float, float, str, Optional[str], str, str]]) -> None:
+        """写入一批 (时间, 单调时钟, 级别, 模块名, 线程名, 消息)"""
+        if not records:
+            return
+        pid = os.getpid()
+        self._file.write("".join(json.dumps({
+            "ts": created,
+            "mono": monotonic,
+            "pid": pid,
+            "level": level,
+            "module": module_name,
+            "thread": thread_name,
+            "msg": message
+        }, ensure_ascii=False) + "\n" for created, monotonic, level, module_name, thread_name, message in records))
+        self._file.flush()
+        if self._file.tell() >= self.max_file_size:
+            self._file.close()
+            self._archive(self._path)
+            self._file = self._open_current()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def _open_current(self):
+        """打开本进程的文件并加锁，锁在文件关闭（包括进程退出）时释放"""
+        file = open(self._path, "a", encoding="utf-8", buffering=LOG_BUFFER_SIZE)
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return file
+
+    def _archive_stale(self) -> None:
+        """归档已退出的进程留下的文件，仍在写入的文件（其他进程持有锁）跳过
+
+        先把文件重命名为本进程独有的名称再归档，同时启动的进程不会重复归档同一个文件；
+        Windows 上其他进程打开中的文件无法重命名，重命名失败即视为仍在写入
+        """
+        for name in sorted(os.listdir(self.folder)):
+            if not is_current_file(name):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                if fcntl is not None:
+                    with open(path, "rb") as file:
+                        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                claimed = f"{path}.{os.getpid()}.archiving"
+                os.replace(path, claimed)
+            except OSError:
+                continue
+            if os.path.getsize(claimed) > 0:
+                self._archive(claimed)
+            else:
+                os.remove(claimed)
+
+    def _archive(self, path: str) -> None:
+        """压缩文件为归档并删除原文件，归档名按时间排序"""
+        self._archive_count += 1
+        name = f"log-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._archive_count:04d}{ARCHIVE_SUFFIX}"
+        archive_path = os.path.join(self.folder, name)
+        with open(path, "rb") as source, open(f"{archive_path}.tmp", "wb") as target:
+            zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).copy_stream(source, target)
+        os.replace(f"{archive_path}.tmp", archive_path)
+        os.remove(path)
+        self._enforce_cap()
+
+    def _enforce_cap(self) -> None:
+        archives = [os.path.join(self.folder, name) for name in sorted(os.listdir(self.folder))
+                    if name.endswith(ARCHIVE_SUFFIX)]
+        total = sum(os.path.getsize(path) for path in archives)
+        for path in archives:
+            if total <= self.max_archive_bytes:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+
+
+def is_current_file(name: str) -> bool:
+    """是否为正在写入（或进程退出后尚未归档）的 JSONL 文件"""
+    return name.startswith(CURRENT_PREFIX) and name.endswith(CURRENT_SUFFIX)
+
+
+def log_files(paths: Iterable[str]) -> List[str]:
+    """列出路径（文件或目录，目录递归查找）中的所有结构化日志文件，同一目录中按时间从早到晚排序"""
+    result = []
+    for path in paths:
+        if os.path.isfile(path):
+            result.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            archives = sorted(name for name in files if name.endswith(ARCHIVE_SUFFIX))
+            current = sorted(name for name in files if is_current_file(name))
+            result += [os.path.join(root, name) for name in archives + current]
+    return result
+
+
+def iter_lines(path: str) -> Iterator[str]:
+    """逐行读取日志文件，归档边读边解压"""
+    with open(path, "rb") as f:
+        if path.endswith(".zst"):
+            reader = zstandard.ZstdDecompressor().stream_reader(f)
+            yield from io.TextIOWrapper(reader, encoding="utf-8")
+        else:
+            yield from io.TextIOWrapper(f, encoding="utf-8")
+
+
+def query_logs(paths: Iterable[str], module: Optional[str] = None, min_level: Optional[str] = None,
+               since: Optional[float] = None, until: Optional[float] = None,
+               contains: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """筛选结构化日志
+
+    Args:
+        paths: 日志文件或目录，目录递归查找
+        module: 只返回该模块的日志
+        min_level: 只返回不低于该级别的日志
+        since: 只返回该时间戳之后的日志
+        until: 只返回该时间戳之前的日志
+        contains: 只返回消息中包含该字符串的日志
+
+    Returns:
+        (文件路径, 日志记录) 的迭代器
+    """
+    min_order = LEVEL_ORDER[parse_level(min_level)] if min_level else None
+    # 先在原始行上做字符串匹配，只解析可能符合条件的行
+    module_token = json.dumps({"module": module}, ensure_ascii=False)[1:-1] if module else None
+    contains_token = json.dumps(contains, ensure_ascii=False)[1:-1] if contains else None
+    for path in log_files(paths):
+        # 文件最后修改时间早于 since 时其中不会有需要的记录
+        if since is not None and os.path.getmtime(path) < since:
+            continue
+        for line in iter_lines(path):
+            if module_token is not None and module_token not in line:
+                continue
+            if contains_token is not None and contains_token not in line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            # 多个进程写入的日志与不同机器收集的归档中，记录不一定按时间先后排列，只能逐条筛选
+            if until is not None and record["ts"] > until:
+                continue
+            if since is not None and record["ts"] < since:
+                continue
+            if module is not None and record["module"] != module:
+                continue
+            if min_order is not None and LEVEL_ORDER[parse_level(record["level"])] < min_order:
+                continue
+            if contains is not None and contains not in record["msg"]:
+                continue
+            yield path, record
@@ -1,7 +1,23 @@
 from .ModLogging import *
 from .ModSetup import *
-from .ModPage import *
 from .ModSecret import *
 from .ModLanguage import *
 
-__all__ = [ModLogging, ModSetup, ModPage, ModSecret, ModLanguage]
+
+def __getattr__(name):
+    # ModPage 依赖 PyQt5 与全部页面，首次访问时才导入，命令行入口因此不会加载 Qt
+    if name in ("ModPage", "PAGES"):
+        import importlib
+        module = importlib.import_module(".ModPage", __name__)
+        globals().update(ModPage=module.ModPage, PAGES=module.PAGES)
+        return globals()[name]
+    # SettingsSignal 同样依赖 PyQt5
+    if name in ("SettingsSignal", "settings_signal"):
+        import importlib
+        module = importlib.import_module(".ModSetupSignal", __name__)
+        globals().update(SettingsSignal=module.SettingsSignal, settings_signal=module.settings_signal)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["ModLogging", "ModSetup", "ModPage", "ModSecret", "ModLanguage"]
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+多账户管理模块
+
+管理 MSAL 缓存中的所有微软账户，在后台于 Minecraft 令牌过期前提前刷新整条登录链，
+点击启动时 MinecraftMicrosoftLogin.login 直接命中缓存，不需要等待网络。
+同时刷新的账户数量有上限，刷新失败时按指数退避重试；刷新令牌失效、需要用户重新登录的账户不再自动刷新
+"""
+
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModMsAuth import MinecraftMicrosoftLogin
+
+# 账户状态
+STATE_PENDING = "pending"
+STATE_REFRESHING = "refreshing"
+STATE_READY = "ready"
+STATE_BACKOFF = "backoff"
+STATE_INTERACTION_REQUIRED = "interaction_required"
+
+# 默认在 Minecraft 令牌过期前多久刷新（秒），需大于 MinecraftMicrosoftLogin 的 refresh_margin
+DEFAULT_REFRESH_AHEAD = 30 * 60
+
+# 默认同时刷新的账户数量
+DEFAULT_MAX_CONCURRENCY = 2
+
+# 刷新失败后的退避时间范围（秒）
+DEFAULT_MIN_BACKOFF = 30
+DEFAULT_MAX_BACKOFF = 30 * 60
+
+# 重新扫描 MSAL 缓存中账户列表的间隔（秒）
+DEFAULT_RESCAN_INTERVAL = 5 * 60
+
+
+class AccountManager:
+    """多账户管理器
+
+    Example:
+        manager = AccountManager(MinecraftMicrosoftLogin(client_id=CLIENT_ID))
+        manager.start()
+        ...
+        result = manager.login("someone@example.com")  # 已提前刷新，直接使用缓存
+        ...
+        manager.stop()
+    """
+
+    def __init__(self, login: MinecraftMicrosoftLogin, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 refresh_ahead: float = DEFAULT_REFRESH_AHEAD, min_backoff: float = DEFAULT_MIN_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, rescan_interval: float = DEFAULT_RESCAN_INTERVAL):
+        """初始化管理器
+
+        Args:
+            login: 登录实例，所有账户共用它的会话与缓存
+            max_concurrency: 同时刷新的账户数量上限
+            refresh_ahead: 在 Minecraft 令牌过期前多久刷新（秒）
+            min_backoff: 第一次刷新失败后的重试间隔（秒），之后每次翻倍
+            max_backoff: 重试间隔的上限（秒）
+            rescan_interval: 重新扫描账户列表的间隔（秒），用于发现新登录的账户
+        """
+        self.logger = ModLogging(module_name="ModAccount")
+        self.login_client = login
+        self.max_concurrency = max_concurrency
+        self.refresh_ahead = max(refresh_ahead, login.refresh_margin)
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.rescan_interval = rescan_interval
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._status: Dict[str, Dict[str, Any]] = {}
+        # (计划刷新时间, 序号, 用户名)，同一账户重新计划后旧条目按 next_refresh 判断为过期
+        self._queue: List[Tuple[float, int, str]] = []
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """添加刷新结果监听器，参数为 (用户名, 状态)，在后台线程中调用"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        self._listeners.remove(listener)
+
+    def accounts(self) -> List[str]:
+        """返回管理中的账户"""
+        with self._condition:
+            return sorted(self._status)
+
+    def status(self, username: str) -> Dict[str, Any]:
+        """返回账户的状态
+
+        Returns:
+            state 为 STATE_* 之一；next_refresh 为下次计划刷新的时间戳；
+            failures 为连续失败次数；error 为最近一次失败的原因
+        """
+        with self._condition:
+            return dict(self._status[username])
+
+    def start(self) -> None:
+        """启动后台刷新"""
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix="AccountRefresh")
+            self._thread = threading.Thread(target=self._run, name="AccountManager", daemon=True)
+        self.rescan()
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """停止后台刷新，wait 为 True 时等待正在进行的刷新完成"""
+        with self._condition:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._condition.notify_all()
+            thread, executor = self._thread, self._executor
+            self._thread = self._executor = None
+        thread.join()
+        executor.shutdown(wait=wait)
+
+    def rescan(self) -> None:
+        """重新读取 MSAL 缓存中的账户，为新账户按缓存的过期时间安排刷新"""
+        usernames = self.login_client.list_accounts()
+        with self._condition:
+            for username in set(self._status) - set(usernames):
+                del self._status[username]
+            for username in usernames:
+                if username not in self._status:
+                    self._status[username] = {"state": STATE_PENDING, "next_refresh": None,
+                                              "failures": 0, "error": None}
+                    self._schedule(username, self._refresh_time(username))
+            self._condition.notify_all()
+
+    def refresh_now(self, username: str) -> None:
+        """立即刷新账户，也用于用户重新登录后恢复需要交互的账户"""
+        with self._condition:
+            status = self._status.setdefault(username, {"state": STATE_PENDING, "next_refresh": None,
+                                                        "failures": 0, "error": None})
+            if status["state"] == STATE_INTERACTION_REQUIRED:
+                status["state"] = STATE_PENDING
+            self._schedule(username, time.time())
+            self._condition.notify_all()
+
+    def login(self, username: Optional[str] = None, interactive: bool = True) -> Dict[str, Any]:
+        """登录账户，令牌已被提前刷新时直接返回缓存的结果"""
+        result = self.login_client.login(username, interactive=interactive)
+        if result["success"] and username in self.accounts():
+            # 交互式登录后恢复自动刷新
+            self._finish(username, result)
+        return result
+
+    def _refresh_time(self, username: str) -> float:
+        expires_at = self.login_client.chain_expires_at(username)
+        return time.time() if expires_at is None else expires_at - self.refresh_ahead
+
+    def _schedule(self, username: str, when: float) -> None:
+        """安排刷新，需持有 _condition"""
+        self._status[username]["next_refresh"] = when
+        self._sequence += 1
+        heapq.heappush(self._queue, (when, self._sequence, username))
+
+    def _run(self) -> None:
+        """调度线程，把到期的账户交给线程池刷新，同时刷新的账户不超过线程数"""
+        next_rescan = time.monotonic() + self.rescan_interval
+        while True:
+            try:
+                due = []
+                with self._condition:
+                    while not self._stopping:
+                        now = time.time()
+                        # 丢弃已被重新计划或已移除账户的旧条目
+                        while self._queue and (self._queue[0][2] not in self._status or
+                                               self._status[self._queue[0][2]]["next_refresh"] != self._queue[0][0]):
+                            heapq.heappop(self._queue)
+                        if self._queue and self._queue[0][0] <= now:
+                            break
+                        if time.monotonic() >= next_rescan:
+                            break
+                        timeout = min(self._queue[0][0] - now if self._queue else self.rescan_interval,
+                                      next_rescan - time.monotonic())
+                        self._condition.wait(max(timeout, 0))
+                    if self._stopping:
+                        return
+                    while self._queue and self._queue[0][0] <= time.time():
+                        when, _, username = heapq.heappop(self._queue)
+                        status = self._status.get(username)
+                        if status is None or status["next_refresh"] != when:
+                            continue
+                        if status["state"] in (STATE_REFRESHING, STATE_INTERACTION_REQUIRED):
+                            continue
+                        status["state"] = STATE_REFRESHING
+                        status["next_refresh"] = None
+                        due.append(username)
+                for username in due:
+                    self._executor.submit(self._refresh, username)
+                if time.monotonic() >= next_rescan:
+                    next_rescan = time.monotonic() + self.rescan_interval
+                    self.rescan()
+            except Exception as e:
+                # 调度线程退出后所有账户都不会再刷新，出错（如读取 MSAL 缓存失败）时记录并稍后继续
+                self.logger.write(f"账户调度出错: {e}", LT.ERROR)
+                with self._condition:
+                    if not self._stopping:
+                        self._condition.wait(self.min_backoff)
+
+    def _refresh(self, username: str) -> None:
+        """在后台刷新一个账户的登录链，不进行交互式登录"""
+        try:
+            result = self.login_client.login(username, interactive=False, refresh_margin=self.refresh_ahead)
+        except Exception as e:
+            result = {"success": False, "error": "刷新过程中发生错误", "details": str(e)}
+        self._finish(username, result)
+
+    def _finish(self, username: str, result: Dict[str, Any]) -> None:
+        with self._condition:
+            status = self._status.get(username)
+            if status is None:
+                return
+            if result["success"]:
+                status.update(state=STATE_READY, failures=0, error=None)
+                self._schedule(username, self._refresh_time(username))
+                self.logger.write(f"账户 {username} 的令牌已刷新，有效期 {result['expires_in']} 秒", LT.INFO)
+            elif result.get("interaction_required"):
+                status.update(state=STATE_INTERACTION_REQUIRED, next_refresh=None, error=result["error"])
+                self.logger.write(f"账户 {username} 需要重新登录", LT.WARN)
+            else:
+                status["failures"] += 1
+                delay = min(self.min_backoff * 2 ** (status["failures"] - 1), self.max_backoff)
+                # 加入随机抖动，避免多个账户在网络恢复后同时重试
+                delay *= random.uniform(0.5, 1.0)
+                status.update(state=STATE_BACKOFF, error=result["error"])
+                self._schedule(username, time.time() + delay)
+                self.logger.write(f"账户 {username} 刷新失败（第 {status['failures']} 次）: {result['error']}，"
+                                  f"{delay:.0f} 秒后重试", LT.WARN)
+            self._condition.notify_all()
+            snapshot = dict(status)
+        for listener in list(self._listeners):
+            try:
+                listener(username, snapshot)
+            except Exception as e:
+                self.logger.write(f"账户监听器出错: {e}", LT.ERROR)
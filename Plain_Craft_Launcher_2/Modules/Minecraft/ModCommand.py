@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+启动命令缓存模块
+
+minecraft_launcher_lib 每次启动都要重新合并继承的版本 JSON、计算规则、拼接类路径，
+大型整合包（数百个库）的耗时相当可观。这里用占位符代替用户名、UUID 与令牌生成一次命令模板，
+按 (版本 JSON 链的哈希, Java 路径, 启动选项, 平台, minecraft_launcher_lib 版本) 缓存到磁盘，之后启动只需替换占位符
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+import minecraft_launcher_lib as mclib
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModInstall import LAUNCHER_DATA_DIR
+from Modules.Minecraft.ModNatives import get_platform_tag
+
+# 每次启动都会变化的选项及其在命令模板中的占位符
+VOLATILE_OPTIONS = {
+    "username": "${pcl_username}",
+    "uuid": "${pcl_uuid}",
+    "token": "${pcl_token}"
+}
+
+# 缓存格式版本，格式变化时递增以废弃旧缓存
+CACHE_VERSION = 1
+
+# minecraft_launcher_lib 的版本，升级后参数的生成方式可能变化，旧的命令模板随之失效
+MCLIB_VERSION = mclib.utils.get_library_version()
+
+
+class LaunchCommandCache:
+    """启动命令模板缓存"""
+
+    def __init__(self, cache_dir: str):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，每个版本对应一个文件
+        """
+        self.logger = ModLogging(module_name="ModCommand")
+        self.cache_dir = cache_dir
+        # 最近一次 get_command 的统计：命中与否、耗时与节省的时间（毫秒）
+        self.last_stats: Dict[str, Any] = {}
+
+    def cache_key(self, version_id: str, minecraft_dir: str, options: Dict[str, Any]) -> str:
+        """计算缓存键
+
+        Raises:
+            VersionNotFound: 版本或其父版本的 JSON 不存在
+        """
+        key = hashlib.sha256()
+        key.update(f"{CACHE_VERSION}\0{MCLIB_VERSION}\0{get_platform_tag()}\0{os.path.abspath(minecraft_dir)}\0"
+                   .encode("utf-8"))
+
+        # 版本 JSON 及其继承链
+        current_id, java_component = version_id, None
+        while current_id:
+            try:
+                with open(os.path.join(minecraft_dir, "versions", current_id, f"{current_id}.json"), "rb") as f:
+                    content = f.read()
+            except OSError:
+                raise mclib.exceptions.VersionNotFound(current_id)
+            key.update(hashlib.sha256(content).digest())
+            data = json.loads(content)
+            if java_component is None and "javaVersion" in data:
+                java_component = data["javaVersion"]["component"]
+            current_id = data.get("inheritsFrom")
+
+        # 未指定 Java 时，运行时安装与否会改变命令中的 Java 路径
+        java_path = options.get("executablePath")
+        if java_path is None and java_component is not None:
+            java_path = mclib.runtime.get_executable_path(java_component, minecraft_dir)
+        key.update(f"{java_path}\0".encode("utf-8"))
+
+        stable_options = {k: v for k, v in options.items() if k not in VOLATILE_OPTIONS}
+        key.update(json.dumps(stable_options, sort_keys=True, default=str).encode("utf-8"))
+        return key.hexdigest()
+
+    def _cache_path(self, version_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{hashlib.sha1(version_id.encode('utf-8')).hexdigest()}.json")
+
+    def get_command(self, version_id: str, minecraft_dir: str, options: Dict[str, Any]) -> List[str]:
+        """获取启动命令，参数与 minecraft_launcher_lib.command.get_minecraft_command 相同
+
+        Raises:
+            VersionNotFound: 版本不存在
+        """
+        minecraft_dir = str(minecraft_dir)
+        start = time.perf_counter()
+        key = self.cache_key(version_id, minecraft_dir, options)
+        cache_path = self._cache_path(version_id)
+
+        entry = None
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        hit = entry is not None and entry.get("key") == key
+        if not hit:
+            template_options = dict(options)
+            template_options.update(VOLATILE_OPTIONS)
+            template = mclib.command.get_minecraft_command(version_id, minecraft_dir, template_options)
+            entry = {
+                "key": key,
+                "command": template,
+                "volatile": [i for i, arg in enumerate(template)
+                             if any(marker in arg for marker in VOLATILE_OPTIONS.values())],
+                "build_ms": (time.perf_counter() - start) * 1000
+            }
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(f"{cache_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(f"{cache_path}.tmp", cache_path)
+
+        command = list(entry["command"])
+        for index in entry["volatile"]:
+            for name, marker in VOLATILE_OPTIONS.items():
+                command[index] = command[index].replace(marker, str(options.get(name, f"{{{name}}}")))
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.last_stats = {
+            "hit": hit,
+            "elapsed_ms": elapsed,
+            "saved_ms": max(entry["build_ms"] - elapsed, 0) if hit else 0
+        }
+        if hit:
+            self.logger.write(f"启动命令缓存命中: {version_id}，用时 {elapsed:.1f} ms，"
+                              f"节省约 {self.last_stats['saved_ms']:.1f} ms", LT.INFO)
+        else:
+            self.logger.write(f"已生成启动命令模板: {version_id}，用时 {elapsed:.1f} ms", LT.INFO)
+        return command
+
+
+def get_minecraft_command(version_id: str, minecraft_dir: str, options: Dict[str, Any],
+                          cache_dir: Optional[str] = None) -> List[str]:
+    """minecraft_launcher_lib.command.get_minecraft_command 的带缓存版本
+
+    Args:
+        cache_dir: 缓存目录，默认为游戏目录下的 PCL/command_cache
+    """
+    cache_dir = cache_dir or os.path.join(str(minecraft_dir), LAUNCHER_DATA_DIR, "command_cache")
+    return LaunchCommandCache(cache_dir).get_command(version_id, minecraft_dir, options)
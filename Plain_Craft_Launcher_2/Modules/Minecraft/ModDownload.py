@@ -0,0 +1,477 @@
+# -*- coding: utf-8 -*-
+"""
+Minecraft 下载引擎
+
+使用有界线程池并发下载文件，所有任务共享一个按主机划分的 keep-alive 连接池，
+从而把安装时间从“逐个请求的往返延迟之和”降低到接近带宽上限。
+传输先写入 .part 文件并把进度记录到日志（journal）中，中断后可以用 Range 请求续传；
+SHA-1 在接收数据时同步计算，单次写入即可完成校验
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModStore import SharedStore, make_writable
+from Modules.Minecraft.ModVerify import VerifyIndex, get_sha1_hash
+
+USER_AGENT = "PCL2-Python"
+
+# 每次写入的块大小
+CHUNK_SIZE = 64 * 1024
+
+# 每传输这么多字节就在日志中记录一次进度
+JOURNAL_STEP = 1024 * 1024
+
+# 日志文件两次落盘之间的最短间隔（秒）
+JOURNAL_SAVE_INTERVAL = 1.0
+
+
+class DownloadError(Exception):
+    """下载失败时抛出的异常，failures 为 (任务, 错误信息) 列表"""
+
+    def __init__(self, failures: List[Tuple["DownloadTask", str]]):
+        self.failures = failures
+        summary = "; ".join(f"{task.url}: {error}" for task, error in failures[:5])
+        super().__init__(f"{len(failures)} 个文件下载失败: {summary}")
+
+
+class DownloadTask:
+    """单个下载任务"""
+
+    def __init__(self, url: str, path: str, sha1: Optional[str] = None, size: Optional[int] = None,
+                 priority: int = 0):
+        """初始化下载任务
+
+        Args:
+            url: 下载地址
+            path: 保存路径
+            sha1: 期望的 SHA-1，为 None 时不校验
+            size: 期望的文件大小（字节），为 None 时不校验
+            priority: 优先级，数值越小越先下载
+        """
+        self.url = url
+        self.path = path
+        self.sha1 = sha1
+        self.size = size
+        self.priority = priority
+
+    def __repr__(self) -> str:
+        return f"DownloadTask({self.url!r}, {self.path!r})"
+
+
+class DownloadJournal:
+    """未完成传输的日志
+
+    以 .part 文件路径为键记录 url、期望的 SHA-1、已落盘的字节数以及服务器返回的 ETag / Last-Modified，
+    续传时用它们构造 Range 与 If-Range 请求头。内存中实时更新，按时间间隔写回磁盘
+    """
+
+    def __init__(self, path: str):
+        """初始化日志
+
+        Args:
+            path: 日志文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries: Dict[str, Dict[str, Any]] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._entries = {}
+
+    def get(self, part_path: str) -> Optional[Dict[str, Any]]:
+        """获取一条记录的副本"""
+        with self._lock:
+            entry = self._entries.get(part_path)
+            return dict(entry) if entry else None
+
+    def update(self, part_path: str, **fields: Any) -> None:
+        """更新一条记录，必要时写回磁盘"""
+        with self._lock:
+            self._entries.setdefault(part_path, {}).update(fields)
+            self._dirty = True
+        self.save()
+
+    def remove(self, part_path: str) -> None:
+        """删除一条记录"""
+        with self._lock:
+            if self._entries.pop(part_path, None) is not None:
+                self._dirty = True
+        self.save()
+
+    def save(self, force: bool = False) -> None:
+        """写回磁盘，先写临时文件再替换，避免日志本身被写坏"""
+        with self._lock:
+            if not self._dirty or (not force and time.monotonic() - self._last_save < JOURNAL_SAVE_INTERVAL):
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+            self._last_save = time.monotonic()
+            self._dirty = False
+
+
+class DownloadJob:
+    """一组已提交到线程池的下载任务
+
+    任务按优先级提交，线程池按提交顺序取任务，因此优先级高的文件总是先开始下载。
+    wait 可以只等待某个优先级及以上的任务完成，其余任务继续在后台下载
+    """
+
+    def __init__(self, engine: "DownloadEngine", tasks: List[DownloadTask], futures: Dict[Future, DownloadTask],
+                 callback: Dict[str, Any]):
+        self.engine = engine
+        self.tasks = tasks
+        self.futures = futures
+        self.callback = callback
+
+    def wait(self, max_priority: Optional[int] = None) -> None:
+        """等待优先级数值不大于 max_priority 的任务全部完成，为 None 时等待全部任务
+
+        Raises:
+            DownloadError: 等待的任务中有下载失败的文件
+        """
+        futures = [future for future, task in self.futures.items()
+                   if max_priority is None or task.priority <= max_priority]
+        wait(futures)
+        failures = [(self.futures[future], str(future.exception())) for future in futures if future.exception()]
+        if failures:
+            raise DownloadError(failures)
+
+    def done(self) -> bool:
+        """是否所有任务都已结束"""
+        return all(future.done() for future in self.futures)
+
+    def cancel(self) -> None:
+        """取消尚未开始的任务并等待正在下载的任务结束，之后才能关闭下载引擎"""
+        for future in self.futures:
+            future.cancel()
+        wait(self.futures)
+
+    def result(self) -> int:
+        """等待全部任务完成并报告进度，回调在调用本方法的线程中触发
+
+        Returns:
+            实际下载的文件数量
+
+        Raises:
+            DownloadError: 任意文件在重试后仍然失败
+        """
+        set_progress = self.callback.get("setProgress", lambda _: None)
+        set_byte_progress = self.callback.get("setByteProgress", lambda _: None)
+        started = time.perf_counter()
+
+        skipped = len(self.tasks) - len(self.futures)
+        done_bytes = sum(task.size or 0 for task in self.tasks) - sum(task.size or 0 for task in self.futures.values())
+        set_progress(skipped)
+        set_byte_progress(done_bytes)
+
+        downloaded = 0
+        failures = []
+        for count, future in enumerate(as_completed(self.futures), start=skipped + 1):
+            task = self.futures[future]
+            try:
+                if future.result():
+                    downloaded += 1
+            except Exception as e:
+                failures.append((task, str(e)))
+                self.engine.logger.write(f"下载 {task.url} 失败: {e}", LT.ERROR)
+            done_bytes += task.size or 0
+            set_progress(count)
+            set_byte_progress(done_bytes)
+
+        self.engine.logger.write(
+            f"下载完成: 新下载 {downloaded} 个，失败 {len(failures)} 个，耗时 {time.perf_counter() - started:.2f} 秒",
+            LT.INFO)
+        if failures:
+            raise DownloadError(failures)
+        return downloaded
+
+
+class DownloadEngine:
+    """并行下载引擎
+
+    所有请求共享同一个 requests.Session，底层的 urllib3 会为每个主机维护一个独立的连接池，
+    pool_block=True 保证同一主机的并发连接数不会超过 connections_per_host
+    """
+
+    def __init__(self, max_workers: int = 16, connections_per_host: Optional[int] = None,
+                 timeout: Tuple[float, float] = (10, 60), retries: int = 3, store: Optional[SharedStore] = None,
+                 journal_path: Optional[str] = None, verify_index: Optional[VerifyIndex] = None,
+                 deep_verify: bool = False):
+        """初始化下载引擎
+
+        Args:
+            max_workers: 最大并发下载数
+            connections_per_host: 每个主机的最大 keep-alive 连接数，默认与 max_workers 相同
+            timeout: (连接超时, 读取超时)，单位为秒
+            retries: 单个文件失败后的重试次数
+            store: 共享文件仓库，带 SHA-1 的文件会优先从仓库链接，下载后收入仓库
+            journal_path: 传输日志路径，为 None 时中断的传输不会续传
+            verify_index: 文件校验索引，元数据未变化的文件跳过哈希计算
+            deep_verify: 为 True 时忽略校验索引，重新计算所有文件的哈希
+        """
+        self.logger = ModLogging(module_name="ModDownload")
+        self.max_workers = max(1, max_workers)
+        self.connections_per_host = connections_per_host or self.max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.store = store
+        self.journal = DownloadJournal(journal_path) if journal_path else None
+        self.verify_index = verify_index
+        self.deep_verify = deep_verify
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=self.connections_per_host, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self) -> None:
+        """关闭所有连接"""
+        self.session.close()
+        self.save_state()
+        if self.store is not None:
+            self.store.close()
+
+    def save_state(self) -> None:
+        """把传输日志与校验索引写回磁盘，下载仍在进行时也可以调用"""
+        if self.journal is not None:
+            self.journal.save(force=True)
+        if self.verify_index is not None:
+            self.verify_index.save()
+
+    def __enter__(self) -> "DownloadEngine":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def is_valid(self, task: DownloadTask) -> bool:
+        """检查本地文件是否已经满足任务要求"""
+        if task.sha1 is not None and self.verify_index is not None:
+            return self.verify_index.check(task.path, task.sha1, task.size, deep=self.deep_verify)
+        if not os.path.isfile(task.path):
+            return False
+        if task.size is not None and os.path.getsize(task.path) != task.size:
+            return False
+        if task.sha1 is None:
+            return True
+        return get_sha1_hash(task.path) == task.sha1
+
+    def is_valid_fast(self, task: DownloadTask) -> bool:
+        """只依据校验索引（stat）判断文件是否有效，不计算哈希"""
+        if self.deep_verify or self.verify_index is None:
+            return False
+        if task.sha1 is None:
+            return os.path.isfile(task.path)
+        return self.verify_index.check_fast(task.path, task.sha1, task.size)
+
+    def download_file(self, task: DownloadTask) -> bool:
+        """下载单个文件，失败时按指数退避重试
+
+        Args:
+            task: 下载任务
+
+        Returns:
+            是否真的进行了下载，本地文件已有效或从共享仓库链接时返回 False
+        """
+        use_store = self.store is not None and task.sha1 is not None
+        # 深度校验不走仓库的快速路径，先计算目标文件本身的哈希
+        if use_store and not self.deep_verify:
+            # 链接与对象是同一份数据时，对象本身也要校验过（每次运行一次）才可信
+            if self.store.is_linked(task.path, task.sha1) and self.store.verify_object(task.sha1):
+                self._record_verified(task)
+                return False
+            if self.store.link(task.sha1, task.path):
+                self._record_verified(task)
+                return False
+
+        if self.is_valid(task):
+            if use_store:
+                self.store.adopt(task.path, task.sha1)
+                # 收入仓库后文件被替换为链接，按新的元数据重新记录
+                self._record_verified(task)
+            return False
+
+        if use_store and self.deep_verify and self.store.link(task.sha1, task.path, deep=True):
+            self._record_verified(task)
+            return False
+
+        os.makedirs(os.path.dirname(task.path), exist_ok=True)
+
+        for attempt in range(self.retries + 1):
+            try:
+                self._transfer(task)
+                if use_store:
+                    self.store.adopt(task.path, task.sha1)
+                self._record_verified(task)
+                self.logger.write("已下载 %s（%s 字节）", LT.DEBUG, task.url, task.size)
+                return True
+            except (requests.exceptions.RequestException, ValueError) as e:
+                if attempt >= self.retries:
+                    raise
+                self.logger.write(f"下载 {task.url} 失败（第 {attempt + 1} 次）: {e}，准备重试", LT.WARN)
+                time.sleep(0.5 * 2 ** attempt)
+        return True
+
+    def _record_verified(self, task: DownloadTask) -> None:
+        """把刚写入且已计算过哈希的文件（或刚校验过的仓库对象的链接）记入校验索引"""
+        if task.sha1 is not None and self.verify_index is not None:
+            self.verify_index.record(task.path, task.sha1)
+
+    def _transfer(self, task: DownloadTask) -> None:
+        """执行一次传输：写入 .part 文件，大小与摘要都匹配后才原子替换为目标文件"""
+        part_path = f"{task.path}.part"
+        offset = self._resume_offset(task, part_path)
+
+        headers = {}
+        if offset:
+            entry = self.journal.get(part_path)
+            headers["Range"] = f"bytes={offset}-"
+            validator = entry.get("etag") or entry.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+
+        with self.session.get(task.url, stream=True, timeout=self.timeout, headers=headers) as response:
+            if response.status_code == 416 and offset:
+                # 服务器认为范围无效，丢弃已下载部分从头开始
+                self._discard(part_path)
+                raise ValueError("服务器拒绝了续传范围")
+            response.raise_for_status()
+            if response.status_code != 206 or not response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+                # 服务器不支持 Range 或文件已变化（If-Range 不匹配），从头下载
+                offset = 0
+
+            if self.journal is not None:
+                self.journal.update(part_path, url=task.url, sha1=task.sha1, offset=offset,
+                                    etag=response.headers.get("ETag"),
+                                    last_modified=response.headers.get("Last-Modified"))
+
+            # 摘要随数据块增量计算，校验时无需再把文件读一遍
+            sha1 = hashlib.sha1()
+            with open(part_path, "r+b" if offset else "wb") as f:
+                if offset:
+                    # 续传时只需补算已有部分的摘要
+                    remaining = offset
+                    while remaining:
+                        data = f.read(min(CHUNK_SIZE, remaining))
+                        if not data:
+                            break
+                        sha1.update(data)
+                        remaining -= len(data)
+                f.seek(offset)
+                f.truncate()
+                written = offset
+                recorded = offset
+                try:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        sha1.update(chunk)
+                        written += len(chunk)
+                        if self.journal is not None and written - recorded >= JOURNAL_STEP:
+                            f.flush()
+                            self.journal.update(part_path, offset=written)
+                            recorded = written
+                finally:
+                    if self.journal is not None:
+                        f.flush()
+                        self.journal.update(part_path, offset=written)
+
+        if task.size is not None and written != task.size:
+            if written > task.size:
+                self._discard(part_path)
+            # 连接提前关闭时保留 .part，下次重试从断点继续
+            raise ValueError(f"文件大小不匹配: 期望 {task.size}，实际 {written}")
+        if task.sha1 is not None and sha1.hexdigest() != task.sha1:
+            self._discard(part_path)
+            raise ValueError(f"SHA-1 不匹配: 期望 {task.sha1}，实际 {sha1.hexdigest()}")
+
+        make_writable(task.path)
+        os.replace(part_path, task.path)
+        if self.journal is not None:
+            self.journal.remove(part_path)
+
+    def _resume_offset(self, task: DownloadTask, part_path: str) -> int:
+        """根据日志与 .part 文件计算可以续传的位置，无法续传时返回 0"""
+        if self.journal is None or not os.path.isfile(part_path):
+            return 0
+        entry = self.journal.get(part_path)
+        if not entry or entry.get("url") != task.url or entry.get("sha1") != task.sha1:
+            return 0
+        # 只信任日志中记录过的长度，之后写入的部分可能没有真正落盘
+        return min(entry.get("offset", 0), os.path.getsize(part_path))
+
+    def _discard(self, part_path: str) -> None:
+        """删除损坏的 .part 文件及其日志记录"""
+        try:
+            os.remove(part_path)
+        except FileNotFoundError:
+            pass
+        if self.journal is not None:
+            self.journal.remove(part_path)
+
+    @staticmethod
+    def _unique(tasks: Iterable[DownloadTask]) -> List[DownloadTask]:
+        """按保存路径去重"""
+        return list({os.path.normcase(os.path.abspath(task.path)): task for task in tasks}.values())
+
+    def diff(self, tasks: Iterable[DownloadTask]) -> List[DownloadTask]:
+        """与磁盘比较，返回缺失或损坏、需要下载的任务，不进行任何下载"""
+        pending = [task for task in self._unique(tasks) if not self.is_valid_fast(task)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            valid = list(executor.map(self.is_valid, pending))
+        return [task for task, ok in zip(pending, valid) if not ok]
+
+    def start(self, tasks: Iterable[DownloadTask], callback: Optional[Dict[str, Any]] = None) -> DownloadJob:
+        """按优先级提交一组下载任务并立即返回
+
+        Args:
+            tasks: 下载任务，保存路径相同的任务只会执行一次
+            callback: 与 minecraft_launcher_lib 相同格式的回调字典（setStatus / setProgress / setMax），
+                另外支持 setByteMax / setByteProgress 以字节为单位报告进度
+
+        Returns:
+            下载任务组，调用其 result 等待完成并报告进度
+        """
+        callback = callback or {}
+        unique_tasks = self._unique(tasks)
+
+        # 先在当前线程里用 stat 过滤掉索引中确认有效的文件，只有剩下的才交给线程池
+        pending = sorted((task for task in unique_tasks if not self.is_valid_fast(task)), key=lambda t: t.priority)
+
+        callback.get("setMax", lambda _: None)(len(unique_tasks))
+        callback.get("setByteMax", lambda _: None)(sum(task.size or 0 for task in unique_tasks))
+        self.logger.write(f"共 {len(unique_tasks)} 个文件，索引确认有效 {len(unique_tasks) - len(pending)} 个，"
+                          f"需要检查或下载 {len(pending)} 个，并发数 {self.max_workers}", LT.INFO)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {executor.submit(self.download_file, task): task for task in pending}
+        # 已提交的任务在 shutdown 之后仍会执行完，线程在任务结束后自动退出
+        executor.shutdown(wait=False)
+        return DownloadJob(self, unique_tasks, futures, callback)
+
+    def download(self, tasks: Iterable[DownloadTask], callback: Optional[Dict[str, Any]] = None) -> int:
+        """并发下载一组文件并等待全部完成，回调只在调用线程中触发，避免在工作线程中操作界面
+
+        Returns:
+            实际下载的文件数量
+
+        Raises:
+            DownloadError: 任意文件在重试后仍然失败
+        """
+        return self.start(tasks, callback).result()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+游戏进程管理模块
+
+以非阻塞方式启动游戏进程，stdout / stderr 由后台线程逐行读取并保存在有界的环形缓冲区中，
+进程的生命周期（启动中、已启动、窗口已显示、已退出，或启动失败）以事件形式通知监听器；
+附加了日志解析器时，进程异常退出后会立即给出可能的崩溃原因。
+事件与日志行回调都在后台线程中触发，不会访问 GUI 线程，Qt 界面应通过信号转发
+"""
+
+import collections
+import itertools
+import locale
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModGameLog import GameLogParser
+
+EVENT_STARTING = "starting"
+EVENT_STARTED = "started"
+EVENT_WINDOW_SHOWN = "window_shown"
+EVENT_EXITED = "exited"
+# 进程未能启动，与 EVENT_EXITED 一样是最后一个事件
+EVENT_FAILED = "failed"
+
+STREAM_STDOUT = "stdout"
+STREAM_STDERR = "stderr"
+
+# 出现这些内容的日志行说明游戏窗口已经创建
+WINDOW_MARKERS = ("Backend library:", "LWJGL Version:", "Created: ")
+
+# 每个输出流默认保留的行数
+DEFAULT_BUFFER_LINES = 2000
+
+
+class GameProcess:
+    """一个被管理的游戏进程"""
+
+    def __init__(self, process_id: int, command: List[str], cwd: Optional[str], buffer_lines: int):
+        self.id = process_id
+        self.command = command
+        self.cwd = cwd
+        self.popen: Optional[subprocess.Popen] = None
+        self.state = EVENT_STARTING
+        self.exit_code: Optional[int] = None
+        self.started_at: Optional[float] = None
+        self.window_shown_at: Optional[float] = None
+        self.exited_at: Optional[float] = None
+        # 进程未能启动时的异常
+        self.error: Optional[OSError] = None
+        self.log_parser: Optional[GameLogParser] = None
+        # 异常退出时由日志解析器给出的可能原因
+        self.crash_causes: List[Dict[str, Any]] = []
+        self._buffers: Dict[str, Deque[str]] = {
+            STREAM_STDOUT: collections.deque(maxlen=buffer_lines),
+            STREAM_STDERR: collections.deque(maxlen=buffer_lines)
+        }
+        self._buffer_lock = threading.Lock()
+        self._line_handlers: List[Callable[["GameProcess", str, str], None]] = []
+        self._exited = threading.Event()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.popen.pid if self.popen is not None else None
+
+    def add_line_handler(self, handler: Callable[["GameProcess", str, str], None]) -> None:
+        """添加日志行回调，参数为 (进程, 输出流名称, 行内容)，在读取线程中调用"""
+        self._line_handlers.append(handler)
+
+    def lines(self, stream: str = STREAM_STDOUT) -> List[str]:
+        """返回缓冲区中保留的最近若干行"""
+        with self._buffer_lock:
+            return list(self._buffers[stream])
+
+    def is_running(self) -> bool:
+        return not self._exited.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[int]:
+        """等待进程退出且输出读取完毕
+
+        Returns:
+            退出码，超时或进程未能启动时返回 None
+        """
+        self._exited.wait(timeout)
+        return self.exit_code
+
+    def terminate(self) -> None:
+        if self.popen is not None and self.popen.poll() is None:
+            self.popen.terminate()
+
+    def kill(self) -> None:
+        if self.popen is not None and self.popen.poll() is None:
+            self.popen.kill()
+
+
+class GameSupervisor:
+    """游戏进程管理器，可以同时管理多个游戏进程"""
+
+    def __init__(self, buffer_lines: int = DEFAULT_BUFFER_LINES):
+        """初始化管理器
+
+        Args:
+            buffer_lines: 每个输出流保留的行数
+        """
+        self.logger = ModLogging(module_name="ModGame")
+        self.buffer_lines = buffer_lines
+        self._listeners: List[Callable[[str, GameProcess], None]] = []
+        self._processes: Dict[int, GameProcess] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def add_listener(self, listener: Callable[[str, GameProcess], None]) -> None:
+        """添加生命周期事件监听器，参数为 (事件, 进程)，在后台线程中调用"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, GameProcess], None]) -> None:
+        self._listeners.remove(listener)
+
+    def processes(self) -> List[GameProcess]:
+        """返回正在运行的游戏进程"""
+        with self._lock:
+            return list(self._processes.values())
+
+    def launch(self, command: List[str], cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+               line_handlers: Optional[List[Callable[[GameProcess, str, str], None]]] = None,
+               log_parser: Optional[GameLogParser] = None) -> GameProcess:
+        """启动游戏进程，进程创建后立即返回
+
+        进程在后台线程中创建，EVENT_STARTING、EVENT_STARTED 以及启动失败时的 EVENT_FAILED 都在该线程中触发
+
+        Args:
+            command: 启动命令
+            cwd: 工作目录
+            env: 环境变量，默认继承当前进程
+            line_handlers: 日志行回调，在开始读取输出前添加，因此不会错过任何一行
+            log_parser: 日志解析器，进程以非零退出码退出时据此填写 crash_causes
+
+        Returns:
+            游戏进程
+
+        Raises:
+            OSError: 无法启动进程
+        """
+        process = GameProcess(next(self._ids), command, cwd, self.buffer_lines)
+        for handler in line_handlers or []:
+            process.add_line_handler(handler)
+        if log_parser is not None:
+            process.log_parser = log_parser
+            process.add_line_handler(log_parser.handle_line)
+
+        spawned = threading.Event()
+        threading.Thread(target=self._run, args=(process, env, spawned), name="GameWatcher", daemon=True).start()
+        spawned.wait()
+        if process.error is not None:
+            raise process.error
+        return process
+
+    def stop_all(self) -> None:
+        """结束所有游戏进程"""
+        for process in self.processes():
+            process.terminate()
+
+    def _read_stream(self, process: GameProcess, stream: str, pipe) -> None:
+        """逐行读取输出流"""
+        encoding = locale.getpreferredencoding(False)
+        buffer = process._buffers[stream]
+        for raw in iter(pipe.readline, b""):
+            line = raw.decode(encoding, errors="replace").rstrip("\r\n")
+            with process._buffer_lock:
+                buffer.append(line)
+            for handler in process._line_handlers:
+                try:
+                    handler(process, stream, line)
+                except Exception as e:
+                    self.logger.write(f"日志行回调出错: {e}", LT.ERROR)
+            if process.window_shown_at is None and any(marker in line for marker in WINDOW_MARKERS):
+                process.window_shown_at = time.time()
+                self._emit(EVENT_WINDOW_SHOWN, process)
+        pipe.close()
+
+    def _run(self, process: GameProcess, env: Optional[Dict[str, str]], spawned: threading.Event) -> None:
+        """创建进程并等待其退出，所有生命周期事件都在这个线程中触发"""
+        self._emit(EVENT_STARTING, process)
+        try:
+            process.popen = subprocess.Popen(process.command, cwd=process.cwd, env=env, stdin=subprocess.DEVNULL,
+                                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            self.logger.write(f"启动游戏进程失败: {e}", LT.ERROR)
+            process.error = e
+            process.exited_at = time.time()
+            self._emit(EVENT_FAILED, process)
+            process._exited.set()
+            spawned.set()
+            return
+        process.started_at = time.time()
+        with self._lock:
+            self._processes[process.id] = process
+        self.logger.write(f"游戏进程 {process.pid} 已启动", LT.INFO)
+        self._emit(EVENT_STARTED, process)
+        spawned.set()
+
+        readers = [
+            threading.Thread(target=self._read_stream, args=(process, STREAM_STDOUT, process.popen.stdout),
+                             daemon=True),
+            threading.Thread(target=self._read_stream, args=(process, STREAM_STDERR, process.popen.stderr),
+                             daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        self._watch(process, readers)
+
+    def _watch(self, process: GameProcess, readers: List[threading.Thread]) -> None:
+        """等待进程退出并读取完剩余输出"""
+        process.exit_code = process.popen.wait()
+        for reader in readers:
+            reader.join()
+        process.exited_at = time.time()
+        with self._lock:
+            self._processes.pop(process.id, None)
+        self.logger.write(f"游戏进程 {process.pid} 已退出，退出码 {process.exit_code}",
+                          LT.INFO if process.exit_code == 0 else LT.WARN)
+        if process.exit_code != 0 and process.log_parser is not None:
+            process.crash_causes = process.log_parser.analyze()
+            for cause in process.crash_causes:
+                self.logger.write(f"可能的崩溃原因: {cause['cause']}（第 {cause['line_no'] + 1} 行: {cause['line']}）", LT.ERROR)
+        self._emit(EVENT_EXITED, process)
+        process._exited.set()
+
+    def _emit(self, event: str, process: GameProcess) -> None:
+        process.state = event
+        for listener in list(self._listeners):
+            try:
+                listener(event, process)
+            except Exception as e:
+                self.logger.write(f"事件监听器出错: {e}", LT.ERROR)
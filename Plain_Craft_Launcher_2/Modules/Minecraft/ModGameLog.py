@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+游戏日志解析模块
+
+在游戏输出的同时逐行解析日志：按级别与线程建立行号索引，
+并用 Aho–Corasick 自动机一次扫描匹配所有已知的崩溃特征，而不是每条规则一个正则。
+游戏异常退出时直接根据索引给出可能的原因，不需要重新读取日志文件。
+整合包的日志可能有数百 MB，因此只保存行号、最近若干行与命中的行，不保存全部内容
+"""
+
+import collections
+import re
+import threading
+from array import array
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+
+class CrashSignature(NamedTuple):
+    """崩溃特征，越靠前的特征越具体，分析结果按此顺序排列"""
+    pattern: str
+    cause: str
+
+
+CRASH_SIGNATURES: List[CrashSignature] = [
+    CrashSignature("Could not reserve enough space for", "分配的内存过多，或使用了 32 位 Java"),
+    CrashSignature("java.lang.OutOfMemoryError", "内存不足，请增加分配给游戏的内存"),
+    CrashSignature("UnsupportedClassVersionError", "Java 版本过低"),
+    CrashSignature("Unsupported class file major version", "Java 版本过高"),
+    CrashSignature("class jdk.internal.loader.ClassLoaders$AppClassLoader cannot be cast to class",
+                   "Java 版本过高，旧版 Forge 需要 Java 8"),
+    CrashSignature("Pixel format not accelerated", "显卡驱动不支持当前版本，请更新显卡驱动"),
+    CrashSignature("The driver does not appear to support OpenGL", "显卡驱动不支持 OpenGL，请更新显卡驱动"),
+    CrashSignature("GLFW error 65542", "显卡驱动不支持 OpenGL，请更新显卡驱动"),
+    CrashSignature("EXCEPTION_ACCESS_VIOLATION", "原生代码崩溃，可能由显卡驱动或 natives 文件引起"),
+    CrashSignature("DuplicateModsFoundException", "存在重复的 Mod"),
+    CrashSignature("Found a duplicate mod", "存在重复的 Mod"),
+    CrashSignature("Incompatible mods found", "Mod 之间不兼容"),
+    CrashSignature("Incompatible mod set", "Mod 之间不兼容"),
+    CrashSignature("Missing or unsupported mandatory dependencies", "Mod 缺少前置或前置版本不正确"),
+    CrashSignature("requires any version of", "Mod 缺少前置"),
+    CrashSignature("Mixin apply failed", "Mod 的 Mixin 注入失败，通常是 Mod 不兼容"),
+    CrashSignature("MixinApplyError", "Mod 的 Mixin 注入失败，通常是 Mod 不兼容"),
+    CrashSignature("Could not find or load main class", "游戏文件缺失，请重新安装该版本"),
+    CrashSignature("java.lang.NoSuchMethodError", "Mod 与游戏或其他 Mod 的版本不匹配"),
+    CrashSignature("java.lang.NoClassDefFoundError", "Mod 缺少前置或版本不匹配"),
+    CrashSignature("java.lang.ClassNotFoundException", "Mod 缺少前置或版本不匹配"),
+    CrashSignature("Manually triggered debug crash", "手动触发的调试崩溃（F3 + C）"),
+]
+
+# log4j 控制台格式，如 [12:34:56] [Render thread/INFO]: 或 [12:34:56] [main/INFO] [minecraft/Main]:
+LINE_PATTERN = re.compile(r"^\[([\d:.]+)\] \[(.+?)/([A-Z]+)\]")
+
+# 没有日志前缀的行（堆栈、JVM 输出）沿用同一输出流上一行的线程与级别
+UNKNOWN = "UNKNOWN"
+
+# 用于快速跳过的模式前缀长度
+SKIP_PREFIX = 3
+
+
+class AhoCorasick:
+    """Aho–Corasick 多模式匹配自动机
+
+    构建时把失配转移展开为完整的状态转移表，扫描时每个字符只需一次字典查找
+    """
+
+    def __init__(self, patterns: List[str]):
+        # 构建字典树
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append(index)
+
+        # 按层计算失配指针，同时把失配状态的转移与输出合并进来
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = collections.deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+
+        self._delta = delta
+        self._outputs = outputs
+        self._accepting = frozenset(i for i, output in enumerate(outputs) if output)
+        # 自动机回到根状态时，用各模式的前缀在 C 层跳到下一个可能匹配的位置
+        prefixes = sorted({pattern[:SKIP_PREFIX] for pattern in patterns if pattern})
+        self._skip = re.compile("(?=" + "|".join(re.escape(prefix) for prefix in prefixes) + ")") if prefixes else None
+
+    def search(self, text: str) -> List[int]:
+        """返回在 text 中出现的模式下标（按首次出现的位置排列，不重复）"""
+        if self._skip is None:
+            return []
+        found: List[int] = []
+        delta, accepting = self._delta, self._accepting
+        state, position, length = 0, 0, len(text)
+        while position < length:
+            if state == 0:
+                match = self._skip.search(text, position)
+                if match is None:
+                    break
+                position = match.start()
+            state = delta[state].get(text[position], 0)
+            if state in accepting:
+                for index in self._outputs[state]:
+                    if index not in found:
+                        found.append(index)
+            position += 1
+        return found
+
+
+class GameLogParser:
+    """增量游戏日志解析器"""
+
+    def __init__(self, signatures: Optional[List[CrashSignature]] = None, tail_lines: int = 200):
+        """初始化解析器
+
+        Args:
+            signatures: 崩溃特征，默认使用 CRASH_SIGNATURES
+            tail_lines: 保留的最近行数
+        """
+        self.signatures = signatures if signatures is not None else CRASH_SIGNATURES
+        self._automaton = AhoCorasick([signature.pattern for signature in self.signatures])
+        self.line_count = 0
+        self.tail: Deque[str] = collections.deque(maxlen=tail_lines)
+        # 级别 / 线程 -> 行号（从 0 开始）
+        self._by_level: Dict[str, array] = {}
+        self._by_thread: Dict[str, array] = {}
+        # 特征下标 -> (第一次命中的行号, 行内容)
+        self._hits: Dict[int, Tuple[int, str]] = {}
+        # 输出流 -> 最近一行带头部的日志的 (线程, 级别)，堆栈等续行沿用所在输出流的上一行，
+        # 两个输出流的行交错到达时不会互相影响
+        self._stream_state: Dict[str, Tuple[str, str]] = {}
+        # stdout 与 stderr 由两个线程同时读取
+        self._lock = threading.Lock()
+
+    def feed(self, line: str, stream: str = "stdout") -> None:
+        """解析一行日志，stream 为该行所在的输出流（stdout / stderr）"""
+        hits = self._automaton.search(line)
+        match = LINE_PATTERN.match(line)
+        with self._lock:
+            line_no = self.line_count
+            self.line_count += 1
+            self.tail.append(line)
+
+            if match is not None:
+                self._stream_state[stream] = thread, level = match.group(2), match.group(3)
+            else:
+                thread, level = self._stream_state.get(stream, (UNKNOWN, UNKNOWN))
+            self._by_level.setdefault(level, array("L")).append(line_no)
+            self._by_thread.setdefault(thread, array("L")).append(line_no)
+
+            for index in hits:
+                if index not in self._hits:
+                    self._hits[index] = (line_no, line)
+
+    def handle_line(self, process, stream: str, line: str) -> None:
+        """作为 GameProcess 的日志行回调使用"""
+        self.feed(line, stream)
+
+    def lines_by_level(self, level: str) -> array:
+        """返回指定级别（如 ERROR）的行号"""
+        return self._by_level.get(level, array("L"))
+
+    def lines_by_thread(self, thread: str) -> array:
+        """返回指定线程的行号"""
+        return self._by_thread.get(thread, array("L"))
+
+    def level_counts(self) -> Dict[str, int]:
+        """各级别的行数"""
+        return {level: len(lines) for level, lines in self._by_level.items()}
+
+    def analyze(self) -> List[Dict[str, object]]:
+        """根据已命中的崩溃特征给出可能的原因，越靠前越可能
+
+        Returns:
+            [{"cause": 原因, "pattern": 特征, "line_no": 行号, "line": 行内容}, ...]
+        """
+        with self._lock:
+            hits = dict(self._hits)
+        causes = []
+        seen = set()
+        for index in sorted(hits):
+            signature = self.signatures[index]
+            if signature.cause in seen:
+                continue
+            seen.add(signature.cause)
+            line_no, line = hits[index]
+            causes.append({"cause": signature.cause, "pattern": signature.pattern, "line_no": line_no, "line": line})
+        return causes
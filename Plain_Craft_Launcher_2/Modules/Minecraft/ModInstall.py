@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Minecraft 安装模块
+
+替代 minecraft_launcher_lib.install.install_minecraft_version：
+先由 DownloadPlanner 构建完整的下载计划，再交给 DownloadEngine 统一并发下载，
+最后从 natives 缓存准备 natives 目录、安装 Java 运行时。
+每次安装成功后保存本次的文件清单，断网时据此离线检查文件，不发起任何网络请求
+"""
+
+import contextlib
+import os
+import shutil
+import threading
+from typing import Dict, Any, Callable, Optional, List
+
+import minecraft_launcher_lib as mclib
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModDownload import DownloadEngine, DownloadError, DownloadJob
+from Modules.Minecraft.ModMetaCache import CacheMissError, MetadataCache
+from Modules.Minecraft.ModNatives import NativesCache
+from Modules.Minecraft.ModPlan import DownloadPlan, DownloadPlanner, PlanItem, KIND_NATIVE, LAUNCH_PRIORITY
+from Modules.Minecraft.ModStore import SharedStore
+from Modules.Minecraft.ModTrace import LaunchTrace, PHASE_METADATA, PHASE_FILES, PHASE_NATIVES, PHASE_JAVA
+from Modules.Minecraft.ModVerify import VerifyIndex
+
+# 启动器在游戏目录中存放自身数据（传输日志、缓存等）的文件夹
+LAUNCHER_DATA_DIR = "PCL"
+
+
+def last_good_plan_path(minecraft_dir: str, version_id: str) -> str:
+    """版本上次安装成功时的文件清单路径"""
+    return os.path.join(minecraft_dir, LAUNCHER_DATA_DIR, "last_good", f"{version_id}.json")
+
+
+class MinecraftInstaller:
+    """Minecraft 版本安装类
+
+    与 minecraft_launcher_lib 相同，安装时会校验并修复已有文件，因此可以在每次启动前调用；
+    下载引擎带有校验索引时，元数据未变化的文件只需 stat 一次
+    """
+
+    def __init__(self, engine: Optional[DownloadEngine] = None, max_workers: int = 16,
+                 meta_cache: Optional[MetadataCache] = None):
+        """初始化安装器
+
+        Args:
+            engine: 使用的下载引擎，默认新建一个
+            max_workers: 新建下载引擎时的并发数
+            meta_cache: 版本清单、版本 JSON 与资源索引的缓存，默认新建一个并共用下载引擎的会话
+        """
+        self.logger = ModLogging(module_name="ModInstall")
+        self.engine = engine or DownloadEngine(max_workers=max_workers)
+        self.planner = DownloadPlanner(self.engine, meta_cache)
+
+    def plan(self, version_id: str, minecraft_dir: str) -> DownloadPlan:
+        """只构建下载计划，不下载任何文件
+
+        Raises:
+            VersionNotFound: 版本不存在
+        """
+        return self.planner.build(version_id, str(minecraft_dir))
+
+    def dry_run(self, version_id: str, minecraft_dir: str) -> tuple:
+        """演练安装，返回 (下载计划, 需要下载的计划项)"""
+        plan = self.plan(version_id, minecraft_dir)
+        return plan, self.engine.diff(plan.items)
+
+    def install(self, version_id: str, minecraft_dir: str, callback: Optional[Dict[str, Any]] = None,
+                launch_early: bool = False, on_background_done: Optional[Callable[[], None]] = None,
+                trace: Optional[LaunchTrace] = None) -> DownloadPlan:
+        """安装指定版本
+
+        文件按优先级下载：客户端与库、natives、纹理与语言等资源、声音
+
+        Args:
+            version_id: 版本号，如 1.20.1
+            minecraft_dir: .minecraft 目录
+            callback: 与 minecraft_launcher_lib 相同格式的回调字典，
+                另外支持 setByteMax / setByteProgress 以字节为单位报告进度
+            launch_early: 为 True 时只等待进入标题画面所需的文件，声音与音乐在后台继续下载，
+                此时进度回调会在后台线程中触发
+            on_background_done: 后台下载结束（无论成败）后调用
+            trace: 启动耗时记录，传入时记录元数据、文件、natives 与 Java 运行时各阶段的耗时
+
+        Returns:
+            本次安装使用的下载计划
+
+        Raises:
+            VersionNotFound: 版本不存在
+            DownloadError: 有文件下载失败
+        """
+        minecraft_dir = str(minecraft_dir)
+        callback = callback or {}
+        set_status = callback.get("setStatus", lambda _: None)
+        span = trace.span if trace is not None else lambda _: contextlib.nullcontext()
+
+        self.logger.write(f"开始安装版本 {version_id}", LT.INFO)
+        set_status("构建下载计划")
+        with span(PHASE_METADATA):
+            plan = self.plan(version_id, minecraft_dir)
+        version_data = plan.version_data
+
+        set_status("下载文件")
+        job = None
+        try:
+            with span(PHASE_FILES):
+                job = self.engine.start(plan.items, callback)
+                if launch_early:
+                    job.wait(LAUNCH_PRIORITY)
+                    # 后台下载在进程退出时会被直接结束，先保存启动所需文件的校验结果
+                    self.engine.save_state()
+                else:
+                    job.result()
+
+            set_status("解压 natives")
+            with span(PHASE_NATIVES):
+                self._extract_natives(plan.of_kind(KIND_NATIVE), minecraft_dir,
+                                      os.path.join(minecraft_dir, "versions", version_data["id"], "natives"))
+
+            # 旧版 Forge 需要复制父版本的 jar
+            jar_path = os.path.join(minecraft_dir, "versions", version_data["id"], f"{version_data['id']}.jar")
+            if not os.path.isfile(jar_path) and "inheritsFrom" in version_data:
+                parent_id = version_data["inheritsFrom"]
+                shutil.copyfile(os.path.join(minecraft_dir, "versions", parent_id, f"{parent_id}.jar"), jar_path)
+
+            if "javaVersion" in version_data:
+                component = version_data["javaVersion"]["component"]
+                # 运行时的校验会重新计算全部文件的哈希，已安装时只在深度校验模式下执行
+                if self.engine.deep_verify or mclib.runtime.get_executable_path(component, minecraft_dir) is None:
+                    set_status("安装 Java 运行时")
+                    with span(PHASE_JAVA):
+                        mclib.runtime.install_jvm_runtime(component, minecraft_dir, callback=callback)
+        except BaseException:
+            # 出错时其余文件可能仍在下载，等正在进行的传输结束后调用方才能关闭下载引擎
+            if job is not None:
+                job.cancel()
+            raise
+
+        self._save_last_good(plan, minecraft_dir)
+
+        if launch_early and not job.done():
+            self.logger.write(f"版本 {version_id} 启动所需文件已就绪，其余资源在后台下载", LT.INFO)
+            threading.Thread(target=self._finish_background, args=(job, on_background_done), daemon=True).start()
+        else:
+            if launch_early:
+                job.result()
+                if on_background_done is not None:
+                    on_background_done()
+            set_status("安装完成")
+            self.logger.write(f"版本 {version_id} 安装完成", LT.INFO)
+        return plan
+
+    def install_offline(self, version_id: str, minecraft_dir: str, callback: Optional[Dict[str, Any]] = None,
+                        trace: Optional[LaunchTrace] = None) -> DownloadPlan:
+        """离线安装：使用上次安装成功时保存的文件清单，只检查启动必需文件是否存在，不发起任何网络请求
+
+        Args:
+            version_id: 版本号
+            minecraft_dir: .minecraft 目录
+            callback: 与 install 相同格式的回调字典
+            trace: 启动耗时记录
+
+        Returns:
+            上次安装成功时的下载计划，不含 version_data
+
+        Raises:
+            CacheMissError: 版本从未安装成功过，或启动必需的文件已经缺失
+        """
+        minecraft_dir = str(minecraft_dir)
+        set_status = (callback or {}).get("setStatus", lambda _: None)
+        span = trace.span if trace is not None else lambda _: contextlib.nullcontext()
+
+        self.logger.write(f"离线检查版本 {version_id}", LT.INFO)
+        set_status("读取文件清单")
+        with span(PHASE_METADATA):
+            try:
+                plan = DownloadPlan.load(last_good_plan_path(minecraft_dir, version_id), minecraft_dir)
+            except (OSError, ValueError, KeyError):
+                raise CacheMissError(f"版本 {version_id} 没有安装成功的记录")
+
+        set_status("检查文件")
+        with span(PHASE_FILES):
+            missing = [item.path for item in plan.items
+                       if item.priority <= LAUNCH_PRIORITY and not os.path.isfile(item.path)]
+        if missing:
+            raise CacheMissError(f"版本 {version_id} 缺少 {len(missing)} 个文件，例如 {missing[0]}")
+
+        set_status("解压 natives")
+        with span(PHASE_NATIVES):
+            self._extract_natives(plan.of_kind(KIND_NATIVE), minecraft_dir,
+                                  os.path.join(minecraft_dir, "versions", version_id, "natives"))
+        set_status("安装完成")
+        return plan
+
+    def _save_last_good(self, plan: DownloadPlan, minecraft_dir: str) -> None:
+        """保存本次安装的文件清单，供离线启动使用"""
+        path = last_good_plan_path(minecraft_dir, plan.version_id)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            plan.save(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            self.logger.write(f"保存文件清单失败: {e}", LT.WARN)
+
+    def _finish_background(self, job: DownloadJob, on_done: Optional[Callable[[], None]]) -> None:
+        """在后台线程中等待剩余的下载完成"""
+        try:
+            job.result()
+            self.logger.write("后台资源下载完成", LT.INFO)
+        except DownloadError as e:
+            self.logger.write(f"后台资源下载失败: {e}", LT.ERROR)
+        finally:
+            if on_done is not None:
+                on_done()
+
+    def _extract_natives(self, natives: List[PlanItem], minecraft_dir: str, natives_dir: str) -> None:
+        """准备 versions/<id>/natives，解压结果缓存在 PCL/natives-cache 中供所有版本复用"""
+        for item in natives:
+            if not os.path.isfile(item.path):
+                self.logger.write(f"natives 文件不存在: {item.path}", LT.WARN)
+        cache = NativesCache(os.path.join(minecraft_dir, LAUNCHER_DATA_DIR, "natives-cache"))
+        cache.prepare(natives, natives_dir)
+
+
+def create_engine(minecraft_dir: str, max_workers: int = 16, store_dir: Optional[str] = None,
+                  deep_verify: bool = False) -> DownloadEngine:
+    """为游戏目录创建下载引擎，传输日志与校验索引保存在游戏目录的 PCL 文件夹中
+
+    Args:
+        store_dir: 共享文件仓库目录，多个游戏目录使用同一仓库时库文件与资源只保存一份
+        deep_verify: 忽略校验索引，重新计算所有文件的哈希
+    """
+    store = SharedStore(store_dir) if store_dir else None
+    data_dir = os.path.join(minecraft_dir, LAUNCHER_DATA_DIR)
+    verify_index = VerifyIndex(os.path.join(data_dir, "verify_index.json"))
+    return DownloadEngine(max_workers=max_workers, store=store,
+                          journal_path=os.path.join(data_dir, "download_journal.json"),
+                          verify_index=verify_index, deep_verify=deep_verify)
+
+
+def install_minecraft_version(version_id: str, minecraft_dir: str, callback: Optional[Dict[str, Any]] = None,
+                              max_workers: int = 16, store_dir: Optional[str] = None,
+                              deep_verify: bool = False, launch_early: bool = False,
+                              trace: Optional[LaunchTrace] = None, offline: bool = False) -> DownloadPlan:
+    """minecraft_launcher_lib.install.install_minecraft_version 的直接替代
+
+    Args:
+        store_dir: 共享文件仓库目录，多个游戏目录使用同一仓库时库文件与资源只保存一份
+        deep_verify: 忽略校验索引，重新计算所有文件的哈希
+        launch_early: 启动所需文件就绪后立即返回，声音与音乐在后台继续下载
+        trace: 启动耗时记录
+        offline: 离线模式，只按上次安装成功时的文件清单检查文件，见 MinecraftInstaller.install_offline
+    """
+    engine = create_engine(minecraft_dir, max_workers, store_dir, deep_verify)
+    if offline:
+        with engine:
+            return MinecraftInstaller(engine).install_offline(version_id, minecraft_dir, callback, trace)
+    try:
+        # 后台下载结束后才能关闭下载引擎
+        plan = MinecraftInstaller(engine).install(version_id, minecraft_dir, callback, launch_early,
+                                                  on_background_done=engine.close, trace=trace)
+    except Exception:
+        engine.close()
+        raise
+    if not launch_early:
+        engine.close()
+    return plan
@@ -3,43 +3,93 @@
 Minecraft 启动模块
 
 使用 MinecraftMicrosoftLogin 类进行 Minecraft 微软账户登录
-使用 minecraft_launcher_lib 进行游戏启动
+使用 ModInstall 并行安装游戏，使用 ModCommand 生成并缓存启动命令，使用 GameSupervisor 以非阻塞方式运行游戏
+各阶段耗时记录在 LaunchTrace 中，并保存到本地启动历史
+断网时使用缓存的个人资料与上次安装成功的文件清单离线启动，不等待任何网络请求
 """
 
 import sys
-from ModMsAuth import MinecraftMicrosoftLogin
-import minecraft_launcher_lib as mclib
 
-from Modules.Base import ModSecret
+from Modules.Base.ModSecret import ModSecret
+from Modules.Minecraft.ModCommand import get_minecraft_command
+from Modules.Minecraft.ModGame import GameSupervisor, GameProcess, EVENT_EXITED, EVENT_FAILED
+from Modules.Minecraft.ModGameLog import GameLogParser
+from Modules.Minecraft.ModInstall import install_minecraft_version
+from Modules.Minecraft.ModMsAuth import MinecraftMicrosoftLogin
+from Modules.Minecraft.ModNetwork import ConnectivityMonitor, STATE_OFFLINE, STARTUP_PROBE_TIMEOUT
+from Modules.Minecraft.ModTrace import (LaunchTrace, LaunchHistory, game_line_handler,
+                                        PHASE_AUTH, PHASE_COMMAND, PHASE_SPAWN, MARK_EXITED)
 
 CLIENT_ID = ModSecret().client_id
 
-def launch(options):
-    minecraft_dir = input("minecraft_dir: \n> ")
+def launch(options, minecraft_dir: str = None, version_id: str = "1.20.1", supervisor: GameSupervisor = None,
+           trace: LaunchTrace = None, history: LaunchHistory = None, callback: dict = None,
+           offline: bool = False, **install_options) -> GameProcess:
+    """安装并启动游戏，不等待游戏退出
+
+    游戏退出（包括创建窗口前崩溃）或进程启动失败时在监视线程中记录 MARK_EXITED 并保存启动历史，
+    命令行等不等待窗口创建的调用方也会留下记录
+
+    Args:
+        options: minecraft_launcher_lib 格式的启动选项
+        minecraft_dir: .minecraft 目录，为 None 时在终端中询问
+        version_id: 版本号
+        callback: 安装进度回调
+        offline: 离线启动，不下载也不校验哈希，只检查上次安装成功时的文件是否存在
+        install_options: 传给 install_minecraft_version 的其他参数
+    """
+    if minecraft_dir is None:
+        minecraft_dir = input("minecraft_dir: \n> ")
     if not minecraft_dir:
         minecraft_dir = ".minecraft"
 
-    # 安装游戏版本 1.20.1
-    version_id = "1.20.1"
-    mclib.install.install_minecraft_version(version_id, minecraft_dir)
-
-    launch_command = mclib.command.get_minecraft_command(
-        version_id,
-        minecraft_dir,
-        options
-    )
-
-    # 启动游戏
-    import subprocess
-    subprocess.run(launch_command)
+    trace = trace or LaunchTrace(version_id)
+    history = history or LaunchHistory()
+    install_minecraft_version(version_id, minecraft_dir, callback=callback, trace=trace, offline=offline,
+                              **install_options)
+
+    with trace.span(PHASE_COMMAND):
+        launch_command = get_minecraft_command(
+            version_id,
+            minecraft_dir,
+            options
+        )
+
+    # 启动游戏，不等待游戏退出
+    supervisor = supervisor or GameSupervisor()
+
+    def on_event(event: str, process: GameProcess) -> None:
+        # 监听器接收管理器中所有进程的事件，按启动命令对象区分本次启动的进程
+        if process.command is not launch_command or event not in (EVENT_EXITED, EVENT_FAILED):
+            return
+        supervisor.remove_listener(on_event)
+        if event == EVENT_FAILED:
+            trace.mark(MARK_EXITED, error=str(process.error))
+        else:
+            trace.mark(MARK_EXITED, exit_code=process.exit_code)
+        history.save(trace)
+
+    supervisor.add_listener(on_event)
+    with trace.span(PHASE_SPAWN):
+        game = supervisor.launch(launch_command, cwd=minecraft_dir, log_parser=GameLogParser(),
+                                 line_handlers=[game_line_handler(trace, lambda: history.save(trace))])
+    return game
 
 
 def main():
     """主登录流程"""
     # 初始化登录模块
     mc_login = MinecraftMicrosoftLogin(client_id=CLIENT_ID)
+    monitor = ConnectivityMonitor()
+    offline = monitor.probe(STARTUP_PROBE_TIMEOUT) == STATE_OFFLINE
+    # 登录（尤其是设备代码登录）可能持续数分钟，期间在后台继续探测，安装时按最新的状态决定是否离线
+    monitor.start()
 
-    result = mc_login.login()
+    trace = LaunchTrace()
+    with trace.span(PHASE_AUTH, offline=offline):
+        result = mc_login.login_offline() if offline else mc_login.login()
+    offline = monitor.state == STATE_OFFLINE
+    monitor.stop(wait=False)
 
     if result["success"]:
         # 登录成功，显示用户信息
@@ -53,7 +103,14 @@ def main():
             "uuid": profile['id'],  # 离线模式留空
             "token": result['minecraft_token']  # 正版需填写微软令牌
         }
-        launch(options)
+        if offline:
+            print("网络不可用，使用上次安装成功的文件离线启动")
+        history = LaunchHistory()
+        game = launch(options, trace=trace, history=history, offline=offline)
+        exit_code = game.wait()
+        for cause in game.crash_causes:
+            print(f"可能的崩溃原因: {cause['cause']}")
+        return exit_code
 
     else:
         # 登录失败，显示错误信息
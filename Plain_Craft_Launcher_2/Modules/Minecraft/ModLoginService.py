@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+微软账户异步登录服务
+
+在后台线程中执行 MinecraftMicrosoftLogin 的登录链，通过 Qt 信号通知界面设备代码、每一跳的完成情况与最终结果，
+登录（包括等待用户输入设备代码）期间界面保持响应，安装等其他任务可以同时进行，登录可以随时取消。
+信号在后台线程中发出，连接到界面控件的槽时 Qt 会自动排队到 GUI 线程执行
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModAccount import AccountManager
+from Modules.Minecraft.ModMsAuth import MinecraftMicrosoftLogin
+
+
+class MicrosoftLoginService(QObject):
+    """微软账户异步登录服务
+
+    Example:
+        service = MicrosoftLoginService(MinecraftMicrosoftLogin(client_id=CLIENT_ID))
+        service.code_ready.connect(lambda code, uri, expires_in: label.setText(f"在 {uri} 输入 {code}"))
+        service.succeeded.connect(on_login)
+        service.start()
+        ...
+        service.cancel()
+    """
+
+    # 需要用户在浏览器中输入设备代码：(代码, 验证地址, 有效期（秒）)
+    code_ready = pyqtSignal(str, str, int)
+    # 登录链完成一跳：该跳的耗时记录 {stage, status, error, elapsed_ms}
+    stage_completed = pyqtSignal(dict)
+    # 登录成功：MinecraftMicrosoftLogin.login 的结果
+    succeeded = pyqtSignal(dict)
+    # 登录失败：MinecraftMicrosoftLogin.login 的结果，包含 error 与 details
+    failed = pyqtSignal(dict)
+    # 登录已取消
+    cancelled = pyqtSignal()
+
+    def __init__(self, login: MinecraftMicrosoftLogin, account_manager: Optional[AccountManager] = None,
+                 parent: Optional[QObject] = None):
+        """初始化服务
+
+        Args:
+            login: 登录实例
+            account_manager: 账户管理器，登录成功后让它接管新账户的后台刷新
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.logger = ModLogging(module_name="ModLoginService")
+        self.login_client = login
+        self.account_manager = account_manager
+        self._thread: Optional[threading.Thread] = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._thread is not None
+
+    def start(self, username: Optional[str] = None) -> bool:
+        """在后台开始登录，立即返回
+
+        Args:
+            username: 使用缓存中的哪个微软账户（邮箱），默认使用第一个账户，没有缓存的账户时进行设备代码登录
+
+        Returns:
+            已有登录正在进行时返回 False
+        """
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._cancel_event = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(username, self._cancel_event),
+                                            name="MicrosoftLogin", daemon=True)
+            self._thread.start()
+        return True
+
+    def cancel(self) -> None:
+        """取消正在进行的登录，正在等待的请求结束后（设备代码轮询最多一秒）发出 cancelled"""
+        self._cancel_event.set()
+
+    def _run(self, username: Optional[str], cancel_event: threading.Event) -> None:
+        try:
+            result = self.login_client.login(username, on_device_code=self._on_device_code,
+                                             on_stage=self.stage_completed.emit, cancel_event=cancel_event)
+        except Exception as e:
+            result = {"success": False, "error": "登录过程中发生错误", "details": str(e)}
+        with self._lock:
+            self._thread = None
+
+        if result.get("cancelled"):
+            self.logger.write("登录已取消", LT.INFO)
+            self.cancelled.emit()
+        elif result["success"]:
+            self.logger.write(f"登录成功: {result['profile']['name']}", LT.INFO)
+            if self.account_manager is not None:
+                self.account_manager.rescan()
+            self.succeeded.emit(result)
+        else:
+            self.logger.write(f"登录失败: {result['error']} {result.get('details', '')}", LT.WARN)
+            self.failed.emit(result)
+
+    def _on_device_code(self, flow: Dict[str, Any]) -> None:
+        self.code_ready.emit(flow["user_code"], flow["verification_uri"], int(flow.get("expires_in", 0)))
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+元数据缓存模块
+
+缓存版本清单、版本 JSON 与资源索引。响应体用 zstandard 压缩保存，同时记录 ETag 与 Last-Modified：
+在 TTL 内直接使用缓存，过期后用 If-None-Match / If-Modified-Since 重新验证，
+服务器返回 304 时不需要重新下载；离线模式下只使用缓存，不发起任何请求
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+import zstandard
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+
+DEFAULT_CACHE_DIR = "./data/cache/meta"
+
+# 默认的缓存有效期（秒）
+DEFAULT_TTL = 10 * 60
+
+
+class CacheMissError(Exception):
+    """离线模式下请求了缓存中不存在的资源"""
+
+
+class MetadataCache:
+    """基于 HTTP 条件请求的元数据缓存"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, session: Optional[requests.Session] = None,
+                 ttl: float = DEFAULT_TTL, offline: bool = False, timeout: float = 10):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            session: 发起请求使用的会话，默认新建一个
+            ttl: 缓存有效期（秒），有效期内不发起任何请求
+            offline: 离线模式，只读缓存
+            timeout: 请求超时（秒）
+        """
+        self.logger = ModLogging(module_name="ModMetaCache")
+        self.cache_dir = cache_dir
+        self.session = session or requests.Session()
+        self.ttl = ttl
+        self.offline = offline
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.zst")
+
+    def _read(self, url: str) -> tuple:
+        """读取缓存，返回 (元数据, 压缩的响应体)，不存在时返回 (None, None)"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        if meta.get("url") != url:
+            return None, None
+        return meta, body
+
+    def _write_meta(self, url: str, meta: Dict[str, Any]) -> None:
+        meta_path, _ = self._paths(url)
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def _write(self, url: str, meta: Dict[str, Any], content: bytes) -> None:
+        _, body_path = self._paths(url)
+        with open(f"{body_path}.tmp", "wb") as f:
+            f.write(zstandard.ZstdCompressor(level=10).compress(content))
+        os.replace(f"{body_path}.tmp", body_path)
+        self._write_meta(url, meta)
+
+    def get(self, url: str, ttl: Optional[float] = None) -> bytes:
+        """获取资源内容
+
+        Args:
+            url: 资源地址
+            ttl: 覆盖默认的缓存有效期，内容由地址中的哈希决定的资源可以传入 float("inf")
+
+        Returns:
+            资源内容
+
+        Raises:
+            CacheMissError: 离线模式且没有缓存
+            requests.RequestException: 在线模式下请求失败且没有缓存
+        """
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            meta, body = self._read(url)
+
+        if meta is not None and (self.offline or time.time() - meta["fetched_at"] < ttl):
+            return zstandard.ZstdDecompressor().decompress(body)
+        if self.offline:
+            raise CacheMissError(url)
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and meta is not None:
+                meta["fetched_at"] = time.time()
+                with self._lock:
+                    self._write_meta(url, meta)
+                return zstandard.ZstdDecompressor().decompress(body)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if meta is None:
+                raise
+            self.logger.write(f"重新验证 {url} 失败: {e}，使用过期缓存", LT.WARN)
+            return zstandard.ZstdDecompressor().decompress(body)
+
+        new_meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time()
+        }
+        with self._lock:
+            self._write(url, new_meta, response.content)
+        return response.content
+
+    def get_json(self, url: str, ttl: Optional[float] = None) -> Any:
+        """获取并解析 JSON 资源"""
+        return json.loads(self.get(url, ttl))
@@ -4,14 +4,166 @@ Minecraft Microsoft 账户登录模块
 
 使用 Microsoft Authentication Library (MSAL) for Python 实现 Minecraft 微软账户登录
 再根据账户登录信息获取 Minecraft Profile 用于启动 Minecraft
+
+Xbox Live、XSTS、Minecraft 令牌与个人资料按账户加密缓存，令牌仍然有效时跳过对应的网络请求；
+所有请求共用一个保持连接的会话，每一跳有独立的超时，整个登录链有总的时限，并记录每一跳的耗时
 """
 
+import base64
+import json
 import os
+import threading
+import time
 import webbrowser
-from typing import Dict, Any, Optional, List
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional, List
 
 import msal
 import requests
+from cryptography.fernet import Fernet, InvalidToken
+from requests.adapters import HTTPAdapter
+
+# 登录链的各个阶段
+STAGE_MICROSOFT = "microsoft"
+STAGE_XBOX = "xbox"
+STAGE_XSTS = "xsts"
+STAGE_MINECRAFT = "minecraft"
+STAGE_PROFILE = "profile"
+
+# 各阶段的 (连接超时, 读取超时)（秒）
+STAGE_TIMEOUTS = {
+    STAGE_MICROSOFT: (5, 15),
+    STAGE_XBOX: (5, 10),
+    STAGE_XSTS: (5, 10),
+    STAGE_MINECRAFT: (5, 15),
+    STAGE_PROFILE: (5, 10)
+}
+
+# 登录链（不含等待用户输入设备代码的时间）默认的总时限（秒）
+DEFAULT_LOGIN_DEADLINE = 30
+
+# Xbox 响应缺少 NotAfter 时假定的有效期（秒）
+DEFAULT_XBOX_LIFETIME = 60 * 60
+
+# 表示令牌被拒绝（过期或已被吊销）的 HTTP 状态码
+AUTH_REJECTED_STATUS = (401, 403)
+
+
+def parse_not_after(value: Optional[str], default_lifetime: float = DEFAULT_XBOX_LIFETIME) -> float:
+    """把 Xbox 响应中的 NotAfter（ISO 8601）转换为时间戳，无法解析时使用默认有效期"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return time.time() + default_lifetime
+
+
+def account_id_from_token(token: Dict[str, Any]) -> Optional[str]:
+    """从 MSAL 的令牌结果中取出账户标识，与令牌缓存中的 home_account_id 一致，无法确定时返回 None"""
+    client_info = token.get("client_info")
+    if client_info:
+        try:
+            info = json.loads(base64.urlsafe_b64decode(client_info + "=" * (-len(client_info) % 4)))
+            return f"{info['uid']}.{info['utid']}"
+        except (ValueError, KeyError, TypeError):
+            pass
+    claims = token.get("id_token_claims") or {}
+    if claims.get("oid") and claims.get("tid"):
+        return f"{claims['oid']}.{claims['tid']}"
+    return None
+
+
+def failure_result(error: str, exception: Exception) -> Dict[str, Any]:
+    """把一跳请求的异常转换为失败结果，服务器拒绝令牌时 auth_rejected 为 True"""
+    result = {"success": False, "error": error, "details": str(exception)}
+    response = getattr(exception, "response", None)
+    if (isinstance(exception, requests.HTTPError) and response is not None
+            and response.status_code in AUTH_REJECTED_STATUS):
+        result["auth_rejected"] = True
+    return result
+
+
+class LoginDeadlineExceeded(requests.Timeout):
+    """登录链的总时限已经用完"""
+
+
+class LoginCancelled(Exception):
+    """登录已被取消"""
+
+
+class TokenChainCache:
+    """加密的登录链缓存
+
+    内容以 Fernet 加密保存，密钥保存在同目录下的文件中（类 Unix 系统上权限为 0600，Windows 上没有额外保护）。
+    这只能防止缓存文件被单独复制或误传后泄露令牌，能读取整个目录的程序或用户仍然可以解密，
+    安全性与 MSAL 的明文令牌缓存相当。密钥文件损坏时重新生成密钥并丢弃已缓存的登录链，下次登录重新请求
+    """
+
+    def __init__(self, path: str, key_path: str):
+        """初始化缓存
+
+        Args:
+            path: 缓存文件路径
+            key_path: 密钥文件路径，不存在时生成
+        """
+        self.path = path
+        self.key_path = key_path
+        self._lock = threading.Lock()
+        self._fernet = self._load_fernet()
+
+    def _load_fernet(self) -> Fernet:
+        try:
+            with open(self.key_path, "rb") as f:
+                return Fernet(f.read().strip())
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            # 密钥无法使用时缓存也无法解密，与缓存无效同样处理
+            print(f"登录链缓存的密钥无法读取，重新生成: {e}")
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+        key = Fernet.generate_key()
+        temp_path = f"{self.key_path}.tmp"
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(key)
+            os.replace(temp_path, self.key_path)
+        except OSError as e:
+            # 密钥保存失败时本次运行仍可使用，缓存在下次运行时视为无效
+            print(f"保存登录链缓存的密钥失败: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return Fernet(key)
+
+    def _read_all(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "rb") as f:
+                return json.loads(self._fernet.decrypt(f.read()))
+        except (OSError, ValueError, InvalidToken):
+            return {}
+
+    def load(self, account_id: str) -> Dict[str, Any]:
+        """读取一个账户的登录链，不存在时返回空字典"""
+        with self._lock:
+            return self._read_all().get(account_id, {})
+
+    def store(self, account_id: str, chain: Optional[Dict[str, Any]]) -> None:
+        """保存一个账户的登录链，chain 为 None 时删除"""
+        with self._lock:
+            chains = self._read_all()
+            if chain is None:
+                chains.pop(account_id, None)
+            else:
+                chains[account_id] = chain
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(self._fernet.encrypt(json.dumps(chains).encode("utf-8")))
+            os.replace(temp_path, self.path)
 
 
 class MinecraftMicrosoftLogin:
@@ -40,17 +192,35 @@ class MinecraftMicrosoftLogin:
     # 默认的令牌缓存文件路径
     DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".minecraft", "msal_token_cache.json")
 
-    def __init__(self, client_id: str, cache_path: Optional[str] = None, scopes: Optional[List[str]] = None):
+    # 登录链缓存与密钥的文件名，保存在令牌缓存文件所在目录
+    CHAIN_CACHE_NAME = "token_chain_cache.bin"
+    CHAIN_KEY_NAME = "token_chain.key"
+
+    # 默认要求令牌至少还有多长时间有效（秒）
+    DEFAULT_REFRESH_MARGIN = 10 * 60
+
+    def __init__(self, client_id: str, cache_path: Optional[str] = None, scopes: Optional[List[str]] = None,
+                 refresh_margin: float = DEFAULT_REFRESH_MARGIN, session: Optional[requests.Session] = None,
+                 login_deadline: float = DEFAULT_LOGIN_DEADLINE):
         """初始化 MinecraftMicrosoftLogin 实例
 
         Args:
             client_id: 应用程序的客户端 ID
             cache_path: 令牌缓存文件路径，默认为 ~/.minecraft/msal_token_cache.json
             scopes: 请求的权限范围，默认为 ['XboxLive.signin']
+            refresh_margin: 缓存的令牌剩余有效期不足该时长（秒）时视为过期
+            session: 发起请求使用的会话，默认新建一个，MSAL 也使用这个会话
+            login_deadline: 一次登录中所有网络请求的总时限（秒）
         """
         self.client_id = client_id
         self.cache_path = cache_path or self.DEFAULT_CACHE_PATH
         self.scopes = scopes or ["XboxLive.signin"]
+        self.refresh_margin = refresh_margin
+        self.login_deadline = login_deadline
+        self.session = session or self._create_session()
+        # 每一跳的耗时与总时限按线程保存，同一实例可以在多个线程中同时登录不同的账户
+        self._local = threading.local()
+        self._save_lock = threading.Lock()
 
         # 确保缓存目录存在
         os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
@@ -66,37 +236,141 @@ class MinecraftMicrosoftLogin:
             except Exception as e:
                 print(f"加载令牌缓存失败: {e}")
 
-        # 创建 MSAL 应用实例
-        self.app = msal.PublicClientApplication(
-            client_id=self.client_id,
-            authority=self.AUTHORITY,
-            token_cache=self.token_cache
-        )
+        # MSAL 应用实例在构造时就会请求 OpenID 配置，因此延迟到第一次需要时创建
+        self._app: Optional[msal.PublicClientApplication] = None
+        self._app_lock = threading.Lock()
+
+        cache_dir = os.path.dirname(self.cache_path)
+        self.chain_cache = TokenChainCache(os.path.join(cache_dir, self.CHAIN_CACHE_NAME),
+                                           os.path.join(cache_dir, self.CHAIN_KEY_NAME))
+
+    @property
+    def app(self) -> msal.PublicClientApplication:
+        """MSAL 应用实例"""
+        with self._app_lock:
+            if self._app is None:
+                self._app = msal.PublicClientApplication(
+                    client_id=self.client_id,
+                    authority=self.AUTHORITY,
+                    token_cache=self.token_cache,
+                    http_client=self.session,
+                    timeout=STAGE_TIMEOUTS[STAGE_MICROSOFT]
+                )
+            return self._app
+
+    @property
+    def metrics(self) -> List[Dict[str, Any]]:
+        """当前线程最近一次登录中每一跳的耗时"""
+        return getattr(self._local, "metrics", [])
+
+    @metrics.setter
+    def metrics(self, value: List[Dict[str, Any]]) -> None:
+        self._local.metrics = value
+
+    @property
+    def _deadline(self) -> Optional[float]:
+        return getattr(self._local, "deadline", None)
+
+    @_deadline.setter
+    def _deadline(self, value: Optional[float]) -> None:
+        self._local.deadline = value
+
+    @property
+    def _cancel_event(self) -> Optional[threading.Event]:
+        return getattr(self._local, "cancel_event", None)
+
+    def _cancelled(self) -> bool:
+        return self._cancel_event is not None and self._cancel_event.is_set()
+
+    def _record(self, metric: Dict[str, Any]) -> None:
+        """记录一跳的耗时，并通知当前登录的 on_stage 回调"""
+        self.metrics.append(metric)
+        on_stage = getattr(self._local, "on_stage", None)
+        if on_stage is not None:
+            on_stage(metric)
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """创建登录使用的会话，登录链涉及的主机不多，每个主机保持少量连接即可"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, stage: str, method: str, url: str, **kwargs) -> requests.Response:
+        """发起一跳请求，超时取该阶段的超时与剩余总时限中较小的一个，并记录耗时
+
+        Raises:
+            LoginCancelled: 登录已被取消
+            LoginDeadlineExceeded: 总时限已经用完
+            requests.RequestException: 请求失败
+        """
+        if self._cancelled():
+            raise LoginCancelled("登录已取消")
+        connect_timeout, read_timeout = STAGE_TIMEOUTS[stage]
+        if self._deadline is not None:
+            remaining = self._deadline - time.monotonic()
+            if remaining <= 0:
+                self._record({"stage": stage, "elapsed_ms": 0.0, "status": None, "error": "deadline"})
+                raise LoginDeadlineExceeded(f"登录超过 {self.login_deadline} 秒时限")
+            connect_timeout, read_timeout = min(connect_timeout, remaining), min(read_timeout, remaining)
+
+        start = time.perf_counter()
+        metric = {"stage": stage, "status": None, "error": None}
+        try:
+            response = self.session.request(method, url, timeout=(connect_timeout, read_timeout), **kwargs)
+            metric["status"] = response.status_code
+            return response
+        except requests.RequestException as e:
+            metric["error"] = type(e).__name__
+            raise
+        finally:
+            metric["elapsed_ms"] = (time.perf_counter() - start) * 1000
+            self._record(metric)
 
     def _save_cache(self) -> None:
         """保存令牌缓存到文件"""
-        if self.token_cache.has_state_changed:
-            try:
-                with open(self.cache_path, "w") as cache_file:
-                    cache_file.write(self.token_cache.serialize())
-            except Exception as e:
-                print(f"保存令牌缓存失败: {e}")
-
-    def get_microsoft_token(self) -> Dict[str, Any]:
+        with self._save_lock:
+            if self.token_cache.has_state_changed:
+                try:
+                    with open(self.cache_path, "w") as cache_file:
+                        cache_file.write(self.token_cache.serialize())
+                    self.token_cache.has_state_changed = False
+                except Exception as e:
+                    print(f"保存令牌缓存失败: {e}")
+
+    def get_microsoft_token(self, username: Optional[str] = None, interactive: bool = True,
+                            on_device_code: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """获取微软账户的访问令牌
 
         首先尝试从缓存中获取令牌，如果缓存中没有有效的令牌，则使用交互式登录获取新令牌
 
+        Args:
+            username: 使用缓存中的哪个微软账户（邮箱），默认使用第一个账户
+            interactive: 为 False 时不进行交互式登录，缓存中没有有效令牌时直接失败，
+                失败结果中 interaction_required 为 True
+            on_device_code: 设备代码生成后调用，参数为 MSAL 的设备代码流程字典，
+                默认在终端中输出代码并打开浏览器
+
         Returns:
-            包含访问令牌的字典，如果失败则包含错误信息
+            包含访问令牌的字典，如果失败则包含错误信息；
+            成功时 account_id 为实际登录的账户在 MSAL 缓存中的标识，无法确定时为 None
         """
-        # 尝试从缓存中获取令牌
-        accounts = self.app.get_accounts()
         result = None
+        account_id = None
+        try:
+            # 尝试从缓存中获取令牌；第一次使用 self.app 时会请求 OpenID 配置，静默获取也可能联网刷新令牌
+            accounts = self.app.get_accounts(username=username)
+            if accounts:
+                # 使用第一个账户尝试静默获取令牌
+                result = self.app.acquire_token_silent(self.scopes, account=accounts[0])
+                account_id = accounts[0].get("home_account_id")
+        except Exception as e:
+            return {"success": False, "error": "获取缓存的微软令牌失败", "details": str(e)}
 
-        if accounts:
-            # 使用第一个账户尝试静默获取令牌
-            result = self.app.acquire_token_silent(self.scopes, account=accounts[0])
+        if not result and not interactive:
+            return {"success": False, "error": "需要重新登录", "interaction_required": True}
 
         if not result:
             # 如果缓存中没有令牌，则使用交互式登录
@@ -107,17 +381,23 @@ class MinecraftMicrosoftLogin:
                 if "user_code" not in flow:
                     return {"success": False, "error": "无法创建设备代码流程", "details": flow.get("error")}
 
-                # 显示用户代码和验证 URL
-                print(f"请访问: {flow['verification_uri']} 并输入代码: {flow['user_code']}")
-
-                # 尝试自动打开浏览器
-                try:
-                    webbrowser.open(flow["verification_uri"])
-                except Exception:
-                    pass  # 如果无法打开浏览器，用户可以手动访问 URL
-
-                # 等待用户完成登录
-                result = self.app.acquire_token_by_device_flow(flow)
+                if on_device_code is not None:
+                    on_device_code(flow)
+                else:
+                    # 显示用户代码和验证 URL
+                    print(f"请访问: {flow['verification_uri']} 并输入代码: {flow['user_code']}")
+
+                    # 尝试自动打开浏览器
+                    try:
+                        webbrowser.open(flow["verification_uri"])
+                    except Exception:
+                        pass  # 如果无法打开浏览器，用户可以手动访问 URL
+
+                # 等待用户完成登录，每秒检查一次是否已取消
+                result = self.app.acquire_token_by_device_flow(
+                    flow, exit_condition=lambda f: self._cancelled() or f.get("expires_at", 0) < time.time())
+                # 设备代码登录的可能是缓存中没有的另一个账户
+                account_id = account_id_from_token(result)
             except Exception as e:
                 return {"success": False, "error": "登录过程中发生错误", "details": str(e)}
 
@@ -125,7 +405,7 @@ class MinecraftMicrosoftLogin:
         self._save_cache()
 
         if "access_token" in result:
-            return {"success": True, "token": result}
+            return {"success": True, "token": result, "account_id": account_id}
         else:
             return {"success": False, "error": "获取访问令牌失败", "details": result.get("error")}
 
@@ -154,16 +434,17 @@ class MinecraftMicrosoftLogin:
         }
 
         try:
-            response = requests.post(self.XBOX_AUTH_URL, headers=headers, json=payload)
+            response = self._request(STAGE_XBOX, "POST", self.XBOX_AUTH_URL, headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
             return {
                 "success": True,
                 "token": data["Token"],
-                "user_hash": data["DisplayClaims"]["xui"][0]["uhs"]
+                "user_hash": data["DisplayClaims"]["xui"][0]["uhs"],
+                "expires_at": parse_not_after(data.get("NotAfter"))
             }
         except Exception as e:
-            return {"success": False, "error": "获取 Xbox Live 令牌失败", "details": str(e)}
+            return failure_result("获取 Xbox Live 令牌失败", e)
 
     def get_xsts_token(self, xbox_token: str) -> Dict[str, Any]:
         """使用 Xbox Live 令牌获取 XSTS 令牌
@@ -189,13 +470,14 @@ class MinecraftMicrosoftLogin:
         }
 
         try:
-            response = requests.post(self.XSTS_AUTH_URL, headers=headers, json=payload)
+            response = self._request(STAGE_XSTS, "POST", self.XSTS_AUTH_URL, headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
             return {
                 "success": True,
                 "token": data["Token"],
-                "user_hash": data["DisplayClaims"]["xui"][0]["uhs"]
+                "user_hash": data["DisplayClaims"]["xui"][0]["uhs"],
+                "expires_at": parse_not_after(data.get("NotAfter"))
             }
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 401:
@@ -210,9 +492,9 @@ class MinecraftMicrosoftLogin:
                                 "details": "XErr: 2148916238"}
                 except Exception:
                     pass
-            return {"success": False, "error": "获取 XSTS 令牌失败", "details": str(e)}
+            return failure_result("获取 XSTS 令牌失败", e)
         except Exception as e:
-            return {"success": False, "error": "获取 XSTS 令牌失败", "details": str(e)}
+            return failure_result("获取 XSTS 令牌失败", e)
 
     def get_minecraft_token(self, user_hash: str, xsts_token: str) -> Dict[str, Any]:
         """使用 XSTS 令牌获取 Minecraft 令牌
@@ -234,12 +516,12 @@ class MinecraftMicrosoftLogin:
         }
 
         try:
-            response = requests.post(self.MC_LOGIN_URL, headers=headers, json=payload)
+            response = self._request(STAGE_MINECRAFT, "POST", self.MC_LOGIN_URL, headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
             return {"success": True, "token": data["access_token"], "expires_in": data["expires_in"]}
         except Exception as e:
-            return {"success": False, "error": "获取 Minecraft 令牌失败", "details": str(e)}
+            return failure_result("获取 Minecraft 令牌失败", e)
 
     def get_minecraft_profile(self, mc_token: str) -> Dict[str, Any]:
         """获取 Minecraft 个人资料
@@ -255,48 +537,169 @@ class MinecraftMicrosoftLogin:
         }
 
         try:
-            response = requests.get(self.MC_PROFILE_URL, headers=headers)
+            response = self._request(STAGE_PROFILE, "GET", self.MC_PROFILE_URL, headers=headers)
             response.raise_for_status()
             return {"success": True, "profile": response.json()}
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 return {"success": False, "error": "此账户未拥有 Minecraft", "details": "HTTP 404"}
-            return {"success": False, "error": "获取 Minecraft 个人资料失败", "details": str(e)}
+            return failure_result("获取 Minecraft 个人资料失败", e)
         except Exception as e:
-            return {"success": False, "error": "获取 Minecraft 个人资料失败", "details": str(e)}
+            return failure_result("获取 Minecraft 个人资料失败", e)
 
-    def login(self) -> Dict[str, Any]:
-        """执行完整的登录流程
+    def list_accounts(self) -> List[str]:
+        """返回 MSAL 缓存中所有账户的用户名（邮箱），不发起网络请求"""
+        accounts = self.token_cache.find(msal.TokenCache.CredentialType.ACCOUNT)
+        return sorted({account["username"] for account in accounts if account.get("username")})
+
+    def _account_id(self, username: Optional[str]) -> Optional[str]:
+        """返回 MSAL 缓存中账户的标识，没有缓存的账户时返回 None
+
+        直接读取令牌缓存，不创建 MSAL 应用实例，因此不会发起网络请求
+        """
+        query = {"username": username} if username else None
+        accounts = self.token_cache.find(msal.TokenCache.CredentialType.ACCOUNT, query=query)
+        return accounts[0]["home_account_id"] if accounts else None
+
+    def _is_valid(self, stage: Optional[Dict[str, Any]], refresh_margin: Optional[float] = None) -> bool:
+        margin = self.refresh_margin if refresh_margin is None else refresh_margin
+        return bool(stage) and stage["expires_at"] - margin > time.time()
+
+    def chain_expires_at(self, username: Optional[str] = None) -> Optional[float]:
+        """返回账户缓存的 Minecraft 令牌的过期时间，没有缓存时返回 None"""
+        account_id = self._account_id(username)
+        minecraft = self.chain_cache.load(account_id).get(STAGE_MINECRAFT) if account_id is not None else None
+        return minecraft["expires_at"] if minecraft else None
+
+    def clear_chain(self, username: Optional[str] = None) -> None:
+        """删除账户缓存的登录链，下次登录时重新走完整流程"""
+        account_id = self._account_id(username)
+        if account_id is not None:
+            self.chain_cache.store(account_id, None)
+
+    def login_offline(self, username: Optional[str] = None) -> Dict[str, Any]:
+        """使用缓存的个人资料与 Minecraft 令牌登录，不发起任何网络请求
 
-        执行从微软账户登录到获取 Minecraft 令牌的完整流程
+        断网时使用，令牌即使已经过期也会返回，单人游戏只需要个人资料
 
         Returns:
-            包含登录结果的字典，成功时包含 Minecraft 令牌和个人资料，失败时包含错误信息
+            与 login 相同格式的结果，offline 为 True，expires_in 可能为负数；没有缓存的个人资料时失败
         """
-        # 获取微软令牌
-        ms_result = self.get_microsoft_token()
-        if not ms_result["success"]:
-            return ms_result
+        account_id = self._account_id(username)
+        chain = self.chain_cache.load(account_id) if account_id is not None else {}
+        minecraft = chain.get(STAGE_MINECRAFT)
+        if not minecraft or not chain.get("profile"):
+            return {"success": False, "error": "没有缓存的账户信息，无法离线登录", "offline": True}
+        return {
+            "success": True,
+            "minecraft_token": minecraft["token"],
+            "profile": chain["profile"],
+            "expires_in": int(minecraft["expires_at"] - time.time()),
+            "resumed_from": None,
+            "metrics": [],
+            "offline": True
+        }
+
+    def login(self, username: Optional[str] = None, interactive: bool = True,
+              refresh_margin: Optional[float] = None,
+              on_device_code: Optional[Callable[[Dict[str, Any]], None]] = None,
+              on_stage: Optional[Callable[[Dict[str, Any]], None]] = None,
+              cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """执行完整的登录流程
+
+        执行从微软账户登录到获取 Minecraft 令牌的完整流程。
+        缓存的 Minecraft 令牌仍然有效时直接返回，否则从最早过期的阶段开始继续；
+        继续时服务器拒绝了缓存的令牌才从微软账户登录重新开始，连接失败、超时等错误直接返回
 
-        ms_token = ms_result["token"]["access_token"]
+        Args:
+            username: 使用缓存中的哪个微软账户（邮箱），默认使用第一个账户
+            interactive: 为 False 时不进行交互式登录，用于后台刷新
+            refresh_margin: 本次登录要求令牌至少还有多长时间有效（秒），默认使用实例的设置
+            on_device_code: 需要交互式登录时以设备代码流程字典调用，见 get_microsoft_token
+            on_stage: 每完成一跳以该跳的耗时记录调用
+            cancel_event: 设置后尽快停止登录，包括等待用户输入设备代码，结果中 cancelled 为 True
 
-        # 获取 Xbox Live 令牌
-        xbox_result = self.get_xbox_token(ms_token)
-        if not xbox_result["success"]:
-            return xbox_result
+        Returns:
+            包含登录结果的字典，成功时包含 Minecraft 令牌和个人资料，失败时包含错误信息；
+            resumed_from 为实际开始请求的阶段，完全使用缓存时为 None；
+            metrics 为每一跳的耗时，同时保存在 self.metrics 中
+        """
+        self.metrics = []
+        account_id = self._account_id(username)
+        chain = self.chain_cache.load(account_id) if account_id is not None else {}
 
-        xbox_token = xbox_result["token"]
-        user_hash = xbox_result["user_hash"]
+        minecraft = chain.get(STAGE_MINECRAFT)
+        if self._is_valid(minecraft, refresh_margin) and chain.get("profile"):
+            return {
+                "success": True,
+                "minecraft_token": minecraft["token"],
+                "profile": chain["profile"],
+                "expires_in": int(minecraft["expires_at"] - time.time()),
+                "resumed_from": None,
+                "metrics": []
+            }
 
-        # 获取 XSTS 令牌
-        xsts_result = self.get_xsts_token(xbox_token)
-        if not xsts_result["success"]:
-            return xsts_result
+        if self._is_valid(chain.get(STAGE_XSTS), refresh_margin):
+            resumed_from = STAGE_MINECRAFT
+        elif self._is_valid(chain.get(STAGE_XBOX), refresh_margin):
+            resumed_from = STAGE_XSTS
+        else:
+            resumed_from = STAGE_MICROSOFT
 
-        xsts_token = xsts_result["token"]
+        self._local.on_stage = on_stage
+        self._local.cancel_event = cancel_event
+        self._deadline = time.monotonic() + self.login_deadline
+        try:
+            result = self._login_from(resumed_from, username, account_id, chain, interactive, on_device_code)
+            if (not result["success"] and result.get("auth_rejected") and resumed_from != STAGE_MICROSOFT
+                    and not self._cancelled() and time.monotonic() < self._deadline):
+                # 缓存的令牌已被吊销，从头再走一次
+                result = self._login_from(STAGE_MICROSOFT, username, account_id, {}, interactive, on_device_code)
+        finally:
+            self._deadline = None
+            self._local.on_stage = self._local.cancel_event = None
+        if not result["success"] and cancel_event is not None and cancel_event.is_set():
+            result = {"success": False, "error": "登录已取消", "cancelled": True}
+        result["metrics"] = self.metrics
+        return result
+
+    def _login_from(self, resumed_from: str, username: Optional[str], account_id: Optional[str],
+                    chain: Dict[str, Any], interactive: bool = True,
+                    on_device_code: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """从指定阶段开始执行登录链，chain 中需要包含之前各阶段的令牌"""
+        chain = dict(chain)
+        if resumed_from == STAGE_MICROSOFT:
+            # 获取微软令牌，可能需要等待用户输入设备代码，不计入总时限
+            start = time.perf_counter()
+            ms_result = self.get_microsoft_token(username, interactive, on_device_code)
+            self._record({"stage": STAGE_MICROSOFT, "elapsed_ms": (time.perf_counter() - start) * 1000,
+                          "status": None, "error": None if ms_result["success"] else ms_result["error"]})
+            if not ms_result["success"]:
+                return ms_result
+
+            ms_token = ms_result["token"]["access_token"]
+            # 以实际登录的账户保存登录链；未指定用户名时缓存中的第一个账户不一定是刚登录的账户
+            account_id = ms_result.get("account_id") or (self._account_id(username) if username else None)
+            self._deadline = time.monotonic() + self.login_deadline
+
+            # 获取 Xbox Live 令牌
+            xbox_result = self.get_xbox_token(ms_token)
+            if not xbox_result["success"]:
+                return xbox_result
+            chain = {STAGE_XBOX: {"token": xbox_result["token"], "user_hash": xbox_result["user_hash"],
+                                  "expires_at": xbox_result["expires_at"]}}
+
+        if resumed_from in (STAGE_MICROSOFT, STAGE_XSTS):
+            # 获取 XSTS 令牌
+            xsts_result = self.get_xsts_token(chain[STAGE_XBOX]["token"])
+            if not xsts_result["success"]:
+                return xsts_result
+            chain[STAGE_XSTS] = {"token": xsts_result["token"], "user_hash": xsts_result["user_hash"],
+                                 "expires_at": xsts_result["expires_at"]}
 
         # 获取 Minecraft 令牌
-        mc_result = self.get_minecraft_token(user_hash, xsts_token)
+        xsts = chain[STAGE_XSTS]
+        mc_result = self.get_minecraft_token(xsts["user_hash"], xsts["token"])
         if not mc_result["success"]:
             return mc_result
 
@@ -307,11 +710,16 @@ class MinecraftMicrosoftLogin:
         if not profile_result["success"]:
             return profile_result
 
+        chain[STAGE_MINECRAFT] = {"token": mc_token, "expires_at": time.time() + mc_result["expires_in"]}
+        chain["profile"] = profile_result["profile"]
+        if account_id is not None:
+            self.chain_cache.store(account_id, chain)
+
         # 返回完整的登录结果
         return {
             "success": True,
             "minecraft_token": mc_token,
             "profile": profile_result["profile"],
-            "expires_in": mc_result["expires_in"]
+            "expires_in": mc_result["expires_in"],
+            "resumed_from": resumed_from
         }
-
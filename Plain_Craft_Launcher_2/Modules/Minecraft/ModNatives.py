@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+natives 解压缓存模块
+
+natives jar 的解压结果按 (jar 的 SHA-1, 目标平台, 排除规则) 缓存，
+各版本的 natives 目录只是指向缓存文件的硬链接（不支持时复制）。
+natives 目录中的标记文件记录了当前使用的缓存键，键未变化时启动前无需任何解压
+"""
+
+import hashlib
+import json
+import os
+import platform
+import shutil
+import zipfile
+from typing import List
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModPlan import PlanItem
+from Modules.Minecraft.ModVerify import get_sha1_hash
+
+# natives 目录中记录缓存键的标记文件
+MARKER_FILE = ".pcl_natives.json"
+
+
+def get_platform_tag() -> str:
+    """当前平台的标识，如 Windows-AMD64"""
+    return f"{platform.system()}-{platform.machine()}"
+
+
+class NativesCache:
+    """natives 解压缓存"""
+
+    def __init__(self, cache_dir: str):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，每个缓存键对应其中的一个子目录
+        """
+        self.logger = ModLogging(module_name="ModNatives")
+        self.cache_dir = cache_dir
+
+    def cache_key(self, item: PlanItem) -> str:
+        """计算 natives jar 的缓存键"""
+        sha1 = item.sha1 or get_sha1_hash(item.path)
+        exclude = hashlib.sha1("\n".join(sorted(item.extract_exclude)).encode("utf-8")).hexdigest()[:8]
+        return f"{sha1}-{get_platform_tag()}-{exclude}"
+
+    def prepare(self, natives: List[PlanItem], natives_dir: str) -> bool:
+        """确保 natives 目录中是这些 jar 解压后的内容
+
+        Args:
+            natives: natives 计划项
+            natives_dir: 版本的 natives 目录
+
+        Returns:
+            是否进行了解压或链接，缓存键未变化时返回 False
+        """
+        natives = [item for item in natives if os.path.isfile(item.path)]
+        keys = sorted(self.cache_key(item) for item in natives)
+        marker_path = os.path.join(natives_dir, MARKER_FILE)
+        try:
+            with open(marker_path, "r", encoding="utf-8") as f:
+                if json.load(f) == keys:
+                    return False
+        except (OSError, ValueError):
+            pass
+
+        # 旧内容可能来自其他版本的 natives，整体重建
+        shutil.rmtree(natives_dir, ignore_errors=True)
+        os.makedirs(natives_dir, exist_ok=True)
+        for item in natives:
+            self._link_tree(self._extract(item), natives_dir)
+
+        with open(marker_path, "w", encoding="utf-8") as f:
+            json.dump(keys, f)
+        self.logger.write(f"已准备 {len(natives)} 个 natives 到 {natives_dir}", LT.INFO)
+        return True
+
+    def _extract(self, item: PlanItem) -> str:
+        """把 jar 解压到缓存，已缓存时直接返回缓存目录"""
+        target = os.path.join(self.cache_dir, self.cache_key(item))
+        if os.path.isdir(target):
+            return target
+
+        # 先解压到临时目录再重命名，避免中断后留下不完整的缓存
+        temp_dir = f"{target}.tmp"
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        with zipfile.ZipFile(item.path, "r") as zf:
+            for name in zf.namelist():
+                if not any(name.startswith(prefix) for prefix in item.extract_exclude):
+                    zf.extract(name, temp_dir)
+        os.makedirs(temp_dir, exist_ok=True)
+        try:
+            os.replace(temp_dir, target)
+        except OSError:
+            # 其他进程已经完成了相同的解压
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self.logger.write("已解压 %s 到缓存", LT.DEBUG, item.name)
+        return target
+
+    @staticmethod
+    def _link_tree(source_dir: str, target_dir: str) -> None:
+        """把缓存目录中的文件逐个链接到目标目录"""
+        for root, _, files in os.walk(source_dir):
+            relative = os.path.relpath(root, source_dir)
+            os.makedirs(os.path.join(target_dir, relative), exist_ok=True)
+            for name in files:
+                source = os.path.join(root, name)
+                target = os.path.normpath(os.path.join(target_dir, relative, name))
+                if os.path.lexists(target):
+                    os.remove(target)
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copyfile(source, target)
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+网络连接状态模块
+
+并行向登录与下载用到的几个主机发起 TCP 连接，任意一个在短时限内连通即视为在线，
+断网时不会在 DNS 解析与连接重试上等待十几秒；后台按状态以不同间隔重新探测，状态变化时通知监听器
+"""
+
+import socket
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+
+STATE_UNKNOWN = "unknown"
+STATE_ONLINE = "online"
+STATE_OFFLINE = "offline"
+
+# 探测的主机，覆盖元数据下载与微软账户登录
+DEFAULT_PROBE_HOSTS = (
+    ("launchermeta.mojang.com", 443),
+    ("api.minecraftservices.com", 443),
+    ("login.microsoftonline.com", 443)
+)
+
+# 单次探测的时限（秒），包括 DNS 解析
+DEFAULT_PROBE_TIMEOUT = 1.5
+
+# 启动前阻塞探测最多等待的时间（秒）。丢包的网络（防火墙、需要认证的热点）上连接不会失败而是一直等待，
+# 超过这个时间仍未连通时先按离线启动，连接尝试继续进行到 DEFAULT_PROBE_TIMEOUT，之后连通时状态更新为在线
+STARTUP_PROBE_TIMEOUT = 0.3
+
+# 在线与离线时重新探测的间隔（秒），离线时更频繁，以便尽快恢复
+DEFAULT_ONLINE_INTERVAL = 60
+DEFAULT_OFFLINE_INTERVAL = 10
+
+
+class ConnectivityMonitor:
+    """网络连接状态监视器
+
+    Example:
+        monitor = ConnectivityMonitor()
+        offline = monitor.probe(STARTUP_PROBE_TIMEOUT) == STATE_OFFLINE
+        monitor.start()  # 之后在后台更新 monitor.state
+        ...  # 登录
+        if monitor.state == STATE_OFFLINE:
+            ...  # 使用离线安装
+        monitor.stop(wait=False)
+    """
+
+    def __init__(self, hosts: Sequence[Tuple[str, int]] = DEFAULT_PROBE_HOSTS,
+                 timeout: float = DEFAULT_PROBE_TIMEOUT, online_interval: float = DEFAULT_ONLINE_INTERVAL,
+                 offline_interval: float = DEFAULT_OFFLINE_INTERVAL):
+        """初始化监视器
+
+        Args:
+            hosts: 探测的 (主机, 端口)
+            timeout: 单次探测的时限（秒）
+            online_interval: 在线时重新探测的间隔（秒）
+            offline_interval: 离线时重新探测的间隔（秒）
+        """
+        self.logger = ModLogging(module_name="ModNetwork")
+        self.hosts = list(hosts)
+        self.timeout = timeout
+        self.online_interval = online_interval
+        self.offline_interval = offline_interval
+        self.state = STATE_UNKNOWN
+        # 最近一次探测完成的时间（time.time()）
+        self.checked_at: Optional[float] = None
+        self._listeners: List[Callable[[str], None]] = []
+        self._probe_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """添加状态变化监听器，参数为新状态，在探测所在的线程中调用"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str], None]) -> None:
+        self._listeners.remove(listener)
+
+    def is_online(self) -> bool:
+        """最近一次探测的结果是否在线，不发起探测；尚未探测时按在线处理"""
+        return self.state != STATE_OFFLINE
+
+    def probe(self, wait: Optional[float] = None) -> str:
+        """立即探测一次，最多等待 wait 秒（默认为 timeout）
+
+        wait 小于 timeout 时，到时仍未连通先返回离线，连接尝试继续进行，在 timeout 内连通时状态更新为在线
+
+        Returns:
+            STATE_ONLINE 或 STATE_OFFLINE
+        """
+        with self._probe_lock:
+            connected = threading.Event()
+            finished = threading.Semaphore(0)
+            # probe 已经返回后才连通的尝试自己更新状态，与 probe 的更新互斥，避免在线被之后的离线覆盖
+            returned = threading.Event()
+            state_lock = threading.Lock()
+            start = time.perf_counter()
+
+            def attempt(host: str, port: int) -> None:
+                try:
+                    # getaddrinfo 无法设置超时，探测线程可能在时限后才结束，因此不等待它们
+                    socket.create_connection((host, port), timeout=self.timeout).close()
+                    connected.set()
+                    with state_lock:
+                        if returned.is_set():
+                            self.checked_at = time.time()
+                            self._set_state(STATE_ONLINE, (time.perf_counter() - start) * 1000)
+                except OSError:
+                    pass
+                finally:
+                    finished.release()
+
+            for host, port in self.hosts:
+                threading.Thread(target=attempt, args=(host, port), name="ConnectivityProbe", daemon=True).start()
+            deadline = time.monotonic() + min(self.timeout if wait is None else wait, self.timeout)
+            for _ in self.hosts:
+                if connected.is_set() or not finished.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                    break
+            with state_lock:
+                returned.set()
+                state = STATE_ONLINE if connected.is_set() else STATE_OFFLINE
+                self.checked_at = time.time()
+                self._set_state(state, (time.perf_counter() - start) * 1000)
+            return state
+
+    def start(self) -> None:
+        """在后台定期重新探测"""
+        if self._thread is not None:
+            return
+        # 每次启动使用新的事件，不等待就停止的旧线程不会被重新唤醒
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), name="ConnectivityMonitor",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """停止后台探测，wait 为 False 时不等待正在进行的探测结束"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if wait:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self, stop_event: threading.Event) -> None:
+        # start 之前已经探测过时先等待一个间隔
+        if self.state == STATE_UNKNOWN:
+            self.probe()
+        while not stop_event.wait(self.online_interval if self.state == STATE_ONLINE else self.offline_interval):
+            self.probe()
+
+    def _set_state(self, state: str, elapsed_ms: float) -> None:
+        if state == self.state:
+            return
+        self.state = state
+        self.logger.write(f"网络状态变为 {state}（探测耗时 {elapsed_ms:.0f} ms）",
+                          LT.INFO if state == STATE_ONLINE else LT.WARN)
+        for listener in list(self._listeners):
+            try:
+                listener(state)
+            except Exception as e:
+                self.logger.write(f"网络状态监听器出错: {e}", LT.ERROR)
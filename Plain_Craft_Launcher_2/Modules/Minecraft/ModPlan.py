@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""
+下载计划模块
+
+在传输任何文件之前，先把版本 JSON（含 inheritsFrom）、库、natives、资源索引、资源文件、
+日志配置与客户端 jar 解析为一份去重后的下载计划，每一项都带有大小与哈希。
+下载引擎据此与磁盘上的文件做差异比较，从而得到准确的总字节数进度；计划也可以导出为 JSON
+用于基准测试与演练（dry run）
+"""
+
+import hashlib
+import json
+import os
+import platform
+import re
+import sys
+from typing import Dict, Any, Optional, List
+
+from minecraft_launcher_lib.exceptions import VersionNotFound
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModDownload import DownloadEngine, DownloadTask
+from Modules.Minecraft.ModMetaCache import MetadataCache
+
+VERSION_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest_v2.json"
+LIBRARIES_URL = "https://libraries.minecraft.net"
+RESOURCES_URL = "https://resources.download.minecraft.net"
+
+# 计划项的类型
+KIND_CLIENT = "client"
+KIND_LIBRARY = "library"
+KIND_NATIVE = "native"
+KIND_ASSET_INDEX = "asset_index"
+KIND_ASSET = "asset"
+KIND_LOGGING = "logging"
+
+# 下载优先级，数值越小越先下载：先客户端与库，再 natives，再纹理、语言等资源，声音最后
+PRIORITY_CRITICAL = 0
+PRIORITY_NATIVE = 1
+PRIORITY_ASSET = 2
+PRIORITY_SOUND = 3
+
+# 进入标题画面之前必须存在的文件的最低优先级，声音与音乐可以在游戏启动后继续下载
+LAUNCH_PRIORITY = PRIORITY_ASSET
+
+# 当前 Python 是否为 32 位，与 platform.architecture()[0] == "32bit" 相同，
+# 但不会像 platform.architecture() 那样在每次调用时启动 file 命令
+IS_32BIT = sys.maxsize <= 2 ** 32
+
+
+def get_priority(kind: str, name: Optional[str] = None) -> int:
+    """根据计划项的类型与名称计算下载优先级"""
+    if kind == KIND_NATIVE:
+        return PRIORITY_NATIVE
+    if kind == KIND_ASSET:
+        name = name or ""
+        if name.endswith(".ogg") or "/sounds/" in name or "/music/" in name or name.startswith(("sounds/", "music/")):
+            return PRIORITY_SOUND
+        return PRIORITY_ASSET
+    return PRIORITY_CRITICAL
+
+
+def parse_rule(rule: Dict[str, Any]) -> bool:
+    """判断单条规则是否允许当前系统（不启用任何 features）"""
+    allow = rule["action"] == "allow"
+    for key, value in rule.get("os", {}).items():
+        if key == "name":
+            system = {"windows": "Windows", "osx": "Darwin", "linux": "Linux"}.get(value)
+            if platform.system() != system:
+                return not allow
+        elif key == "arch":
+            if value == "x86" and not IS_32BIT:
+                return not allow
+        elif key == "version":
+            if not re.match(value, platform.release()):
+                return not allow
+    if rule.get("features"):
+        return not allow
+    return allow
+
+
+def parse_rule_list(rules: List[Dict[str, Any]]) -> bool:
+    """判断规则列表是否允许当前系统"""
+    return all(parse_rule(rule) for rule in rules)
+
+
+def get_natives(library: Dict[str, Any]) -> str:
+    """获取库在当前系统下的 natives 分类名，没有则返回空字符串"""
+    arch = "32" if IS_32BIT else "64"
+    system = {"Windows": "windows", "Darwin": "osx"}.get(platform.system(), "linux")
+    return library.get("natives", {}).get(system, "").replace("${arch}", arch)
+
+
+def get_library_path(name: str, minecraft_dir: str) -> str:
+    """根据 Maven 坐标获取库文件路径，如 org.lwjgl:lwjgl:3.3.1:natives-windows"""
+    name, _, extension = name.partition("@")
+    group, artifact, version, *classifiers = name.split(":")
+    filename = "-".join([artifact, version, *classifiers]) + "." + (extension or "jar")
+    return os.path.join(minecraft_dir, "libraries", *group.split("."), artifact, version, filename)
+
+
+def inherit_json(version_data: Dict[str, Any], minecraft_dir: str) -> Dict[str, Any]:
+    """合并 inheritsFrom 指向的父版本 JSON，行为与 minecraft_launcher_lib 保持一致"""
+    parent_id = version_data["inheritsFrom"]
+    with open(os.path.join(minecraft_dir, "versions", parent_id, f"{parent_id}.json"), "r", encoding="utf-8") as f:
+        parent_data = json.load(f)
+
+    # 子版本中已经存在（不论版本号）的库不再继承
+    own_libraries = version_data.get("libraries", [])
+    own_names = {library["name"].rsplit(":", 1)[0] for library in own_libraries}
+    parent_data["libraries"] = own_libraries + [
+        library for library in parent_data["libraries"] if library["name"].rsplit(":", 1)[0] not in own_names
+    ]
+
+    for key, value in version_data.items():
+        if key == "libraries":
+            continue
+        if isinstance(value, list) and isinstance(parent_data.get(key), list):
+            parent_data[key] = value + parent_data[key]
+        elif isinstance(value, dict) and isinstance(parent_data.get(key), dict):
+            for sub_key, sub_value in value.items():
+                if isinstance(sub_value, list):
+                    parent_data[key][sub_key] = parent_data[key].get(sub_key, []) + sub_value
+        else:
+            parent_data[key] = value
+    return parent_data
+
+
+class PlanItem(DownloadTask):
+    """下载计划中的一项"""
+
+    def __init__(self, kind: str, url: str, path: str, sha1: Optional[str] = None, size: Optional[int] = None,
+                 name: Optional[str] = None, extract_exclude: Optional[List[str]] = None):
+        """初始化计划项
+
+        Args:
+            kind: 类型，见 KIND_* 常量
+            url: 下载地址
+            path: 保存路径
+            sha1: 期望的 SHA-1
+            size: 期望的大小（字节）
+            name: 可读名称，如库的 Maven 坐标、资源的逻辑路径
+            extract_exclude: natives 解压时需要排除的路径前缀
+        """
+        super().__init__(url, path, sha1, size, get_priority(kind, name))
+        self.kind = kind
+        self.name = name
+        self.extract_exclude = extract_exclude or []
+
+    def __repr__(self) -> str:
+        return f"PlanItem({self.kind!r}, {self.name or self.url!r})"
+
+
+class DownloadPlan:
+    """一个版本的完整下载计划"""
+
+    def __init__(self, version_id: str, minecraft_dir: str, items: Optional[List[PlanItem]] = None,
+                 version_data: Optional[Dict[str, Any]] = None, versions: Optional[List[str]] = None):
+        """初始化下载计划
+
+        Args:
+            version_id: 版本号
+            minecraft_dir: .minecraft 目录
+            items: 计划项，按保存路径去重
+            version_data: 合并 inheritsFrom 之后的版本 JSON，从导出文件加载的计划中为 None
+            versions: 解析过的版本链，子版本在前
+        """
+        self.version_id = version_id
+        self.minecraft_dir = minecraft_dir
+        self.version_data = version_data
+        self.versions = versions or [version_id]
+        self._items: Dict[str, PlanItem] = {}
+        for item in items or []:
+            self.add(item)
+
+    def add(self, item: PlanItem) -> None:
+        """添加一项，保存路径已存在时保留先添加的一项，但优先级取两者中较高的
+
+        多个资源名可能指向同一个对象，只要有一个名称是启动必需的资源，该对象就按启动必需下载
+        """
+        existing = self._items.setdefault(os.path.normcase(os.path.abspath(item.path)), item)
+        existing.priority = min(existing.priority, item.priority)
+
+    @property
+    def items(self) -> List[PlanItem]:
+        return list(self._items.values())
+
+    @property
+    def total_size(self) -> int:
+        """计划中所有已知大小的文件的总字节数"""
+        return sum(item.size or 0 for item in self._items.values())
+
+    def of_kind(self, kind: str) -> List[PlanItem]:
+        """获取某一类型的全部计划项"""
+        return [item for item in self._items.values() if item.kind == kind]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为可序列化的字典，路径相对于 minecraft_dir"""
+        # 计划项的路径都由 minecraft_dir 拼接而来，直接去掉前缀，比逐个 os.path.relpath 快得多
+        prefix = os.path.join(self.minecraft_dir, "")
+
+        def relative(path: str) -> str:
+            return path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, self.minecraft_dir)
+
+        return {
+            "version_id": self.version_id,
+            "versions": self.versions,
+            "total_size": self.total_size,
+            "items": [{
+                "kind": item.kind,
+                "name": item.name,
+                "url": item.url,
+                "path": relative(item.path).replace(os.sep, "/"),
+                "sha1": item.sha1,
+                "size": item.size,
+                "extract_exclude": item.extract_exclude,
+                "priority": item.priority
+            } for item in self._items.values()]
+        }
+
+    def save(self, file_path: str) -> None:
+        """导出为 JSON 文件，每次安装都会保存，不缩进以使用 json 的 C 实现"""
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, file_path: str, minecraft_dir: str) -> "DownloadPlan":
+        """从导出的 JSON 文件加载计划
+
+        Args:
+            file_path: 导出文件路径
+            minecraft_dir: 计划所对应的 .minecraft 目录
+        """
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        items = []
+        for data_item in data["items"]:
+            item = PlanItem(data_item["kind"], data_item["url"], os.path.join(minecraft_dir, *data_item["path"].split("/")),
+                            data_item["sha1"], data_item["size"], data_item["name"], data_item["extract_exclude"])
+            item.priority = data_item.get("priority", item.priority)
+            items.append(item)
+        return cls(data["version_id"], minecraft_dir, items, versions=data["versions"])
+
+
+class DownloadPlanner:
+    """下载计划构建类
+
+    构建计划时只会获取元数据（版本清单、版本 JSON、资源索引），不会下载任何其他文件
+    """
+
+    def __init__(self, engine: DownloadEngine, meta_cache: Optional[MetadataCache] = None):
+        """初始化计划构建器
+
+        Args:
+            engine: 下载引擎，用于校验与写入元数据文件
+            meta_cache: 元数据缓存，默认新建一个并共用下载引擎的会话
+        """
+        self.logger = ModLogging(module_name="ModPlan")
+        self.engine = engine
+        self.meta_cache = meta_cache or MetadataCache(session=engine.session)
+
+    def build(self, version_id: str, minecraft_dir: str) -> DownloadPlan:
+        """构建指定版本的下载计划
+
+        Args:
+            version_id: 版本号
+            minecraft_dir: .minecraft 目录
+
+        Raises:
+            VersionNotFound: 版本不存在
+        """
+        minecraft_dir = str(minecraft_dir)
+        version_data = self.load_version_json(version_id, minecraft_dir)
+        plan = DownloadPlan(version_id, minecraft_dir, version_data=version_data)
+
+        # Forge 等版本需要父版本的全部文件
+        if "inheritsFrom" in version_data:
+            try:
+                parent_plan = self.build(version_data["inheritsFrom"], minecraft_dir)
+                plan.versions += parent_plan.versions
+            except VersionNotFound:
+                parent_plan = None
+            version_data = plan.version_data = inherit_json(version_data, minecraft_dir)
+        else:
+            parent_plan = None
+
+        for item in self._library_items(version_data, minecraft_dir):
+            plan.add(item)
+        for item in self._asset_items(version_data, minecraft_dir):
+            plan.add(item)
+        for item in self._misc_items(version_data, minecraft_dir):
+            plan.add(item)
+        if parent_plan is not None:
+            for item in parent_plan.items:
+                plan.add(item)
+
+        self.logger.write(f"版本 {version_id} 的下载计划: {len(plan.items)} 个文件，共 {plan.total_size} 字节", LT.INFO)
+        return plan
+
+    def load_version_json(self, version_id: str, minecraft_dir: str) -> Dict[str, Any]:
+        """读取版本 JSON，本地不存在时从版本清单下载"""
+        path = os.path.join(minecraft_dir, "versions", version_id, f"{version_id}.json")
+        if not os.path.isfile(path):
+            manifest = self.meta_cache.get_json(VERSION_MANIFEST_URL)
+            for version in manifest["versions"]:
+                if version["id"] == version_id:
+                    self._fetch_metadata(DownloadTask(version["url"], path, version["sha1"]))
+                    break
+            else:
+                raise VersionNotFound(version_id)
+
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _fetch_metadata(self, task: DownloadTask) -> None:
+        """通过元数据缓存获取带 SHA-1 的 JSON 文件并写入游戏目录"""
+        if self.engine.is_valid(task):
+            return
+        # 地址中带有内容哈希，缓存永不过期
+        content = self.meta_cache.get(task.url, ttl=float("inf"))
+        if hashlib.sha1(content).hexdigest() != task.sha1:
+            # 缓存内容与期望不符时绕过缓存直接下载
+            self.engine.download_file(task)
+            return
+        os.makedirs(os.path.dirname(task.path), exist_ok=True)
+        with open(f"{task.path}.tmp", "wb") as f:
+            f.write(content)
+        os.replace(f"{task.path}.tmp", task.path)
+        if self.engine.verify_index is not None:
+            self.engine.verify_index.record(task.path, task.sha1)
+
+    def _library_items(self, version_data: Dict[str, Any], minecraft_dir: str) -> List[PlanItem]:
+        """收集库文件与 natives"""
+        items = []
+        for library in version_data.get("libraries", []):
+            if "rules" in library and not parse_rule_list(library["rules"]):
+                continue
+
+            name = library["name"]
+            downloads = library.get("downloads", {})
+            artifact = downloads.get("artifact")
+            if artifact and artifact.get("url") and "path" in artifact:
+                items.append(PlanItem(KIND_LIBRARY, artifact["url"],
+                                      os.path.join(minecraft_dir, "libraries", artifact["path"]),
+                                      artifact.get("sha1"), artifact.get("size"), name))
+            elif "downloads" not in library:
+                # 没有 downloads 字段的库（Forge / Fabric）按 Maven 坐标拼出地址
+                path = get_library_path(name, minecraft_dir)
+                base_url = library.get("url", LIBRARIES_URL).rstrip("/")
+                relative = os.path.relpath(path, os.path.join(minecraft_dir, "libraries")).replace(os.sep, "/")
+                items.append(PlanItem(KIND_LIBRARY, f"{base_url}/{relative}", path, name=name))
+
+            native = get_natives(library)
+            classifier = downloads.get("classifiers", {}).get(native)
+            if native and classifier:
+                items.append(PlanItem(KIND_NATIVE, classifier["url"], get_library_path(f"{name}:{native}", minecraft_dir),
+                                      classifier.get("sha1"), classifier.get("size"), f"{name}:{native}",
+                                      library.get("extract", {}).get("exclude", [])))
+        return items
+
+    def _asset_items(self, version_data: Dict[str, Any], minecraft_dir: str) -> List[PlanItem]:
+        """获取资源索引并收集资源文件"""
+        if "assetIndex" not in version_data:
+            return []
+
+        asset_index = version_data["assetIndex"]
+        index_item = PlanItem(KIND_ASSET_INDEX, asset_index["url"],
+                              os.path.join(minecraft_dir, "assets", "indexes", f"{version_data['assets']}.json"),
+                              asset_index["sha1"], asset_index.get("size"), version_data["assets"])
+        self._fetch_metadata(index_item)
+        with open(index_item.path, "r", encoding="utf-8") as f:
+            objects = json.load(f)["objects"]
+
+        items = [index_item]
+        for name, obj in objects.items():
+            file_hash = obj["hash"]
+            items.append(PlanItem(KIND_ASSET, f"{RESOURCES_URL}/{file_hash[:2]}/{file_hash}",
+                                  os.path.join(minecraft_dir, "assets", "objects", file_hash[:2], file_hash),
+                                  file_hash, obj.get("size"), name))
+        return items
+
+    def _misc_items(self, version_data: Dict[str, Any], minecraft_dir: str) -> List[PlanItem]:
+        """收集日志配置与客户端 jar"""
+        items = []
+        logging_file = version_data.get("logging", {}).get("client", {}).get("file")
+        if logging_file:
+            items.append(PlanItem(KIND_LOGGING, logging_file["url"],
+                                  os.path.join(minecraft_dir, "assets", "log_configs", logging_file["id"]),
+                                  logging_file.get("sha1"), logging_file.get("size"), logging_file["id"]))
+
+        client = version_data.get("downloads", {}).get("client")
+        if client:
+            version_id = version_data["id"]
+            items.append(PlanItem(KIND_CLIENT, client["url"],
+                                  os.path.join(minecraft_dir, "versions", version_id, f"{version_id}.jar"),
+                                  client.get("sha1"), client.get("size"), version_id))
+        return items
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+共享文件仓库模块
+
+多个游戏目录的 libraries 与 assets/objects 以 SHA-1 为键保存在同一个仓库中，
+每个游戏目录中的文件只是指向仓库对象的链接（reflink 或硬链接，都不支持时才复制）。
+仓库用 SQLite 记录每个对象被哪些路径引用，引用计数归零的对象才会在垃圾回收时删除。
+硬链接与仓库对象共用同一份数据，因此对象设为只读，防止某个游戏目录中的文件被原地修改后波及仓库与其他游戏目录；
+对象在每次运行中第一次被使用前会重新计算 SHA-1，内容不符时逐出仓库，之后重新下载
+"""
+
+import os
+import shutil
+import sqlite3
+import stat
+import sys
+import threading
+from typing import Dict, List, Set
+
+from Modules.Base.ModLogging import ModLogging, LoggingType as LT
+from Modules.Minecraft.ModVerify import get_sha1_hash
+
+# Linux 上 FICLONE ioctl 的请求码，用于在 Btrfs / XFS 等文件系统上创建 reflink
+FICLONE = 0x40049409
+
+LINK_REFLINK = "reflink"
+LINK_HARDLINK = "hardlink"
+LINK_COPY = "copy"
+
+# 仓库对象的权限（0444）
+OBJECT_MODE = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+def reflink(source: str, target: str) -> bool:
+    """尝试以写时复制的方式克隆文件，不支持时返回 False"""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    try:
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+        return False
+
+
+def make_writable(path: str) -> None:
+    """去掉文件的只读属性，Windows 上只读文件不能被删除或替换"""
+    if os.name == "nt" and os.path.isfile(path) and not os.access(path, os.W_OK):
+        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+
+
+class SharedStore:
+    """以 SHA-1 寻址的共享文件仓库"""
+
+    def __init__(self, root: str):
+        """初始化仓库
+
+        Args:
+            root: 仓库根目录，对象保存在 root/objects/<前两位>/<sha1>
+        """
+        self.logger = ModLogging(module_name="ModStore")
+        self.root = os.path.abspath(root)
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # 本次运行中已经计算过 SHA-1 的对象
+        self._verified: Set[str] = set()
+        self._db = sqlite3.connect(os.path.join(self.root, "index.db"), check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS objects (sha1 TEXT PRIMARY KEY, size INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS links (
+                path TEXT PRIMARY KEY,
+                sha1 TEXT NOT NULL REFERENCES objects(sha1),
+                mode TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS links_sha1 ON links(sha1);
+        """)
+
+    def close(self) -> None:
+        """关闭索引数据库"""
+        with self._lock:
+            self._db.close()
+
+    def object_path(self, sha1: str) -> str:
+        """获取对象在仓库中的路径"""
+        return os.path.join(self.root, "objects", sha1[:2], sha1)
+
+    def contains(self, sha1: str) -> bool:
+        """仓库中是否已经存在该对象"""
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM objects WHERE sha1 = ?", (sha1,)).fetchone()
+        return row is not None and os.path.isfile(self.object_path(sha1))
+
+    def refcount(self, sha1: str) -> int:
+        """获取对象当前的引用计数"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM links WHERE sha1 = ?", (sha1,)).fetchone()[0]
+
+    def is_linked(self, path: str, sha1: str) -> bool:
+        """目标路径是否已经是指向该对象的有效链接"""
+        path = os.path.abspath(path)
+        with self._lock:
+            row = self._db.execute("SELECT mode FROM links WHERE path = ? AND sha1 = ?", (path, sha1)).fetchone()
+        return row is not None and self._link_alive(path, sha1, row[0])
+
+    def verify_object(self, sha1: str, deep: bool = False) -> bool:
+        """校验对象的内容，每个对象每次运行只计算一次 SHA-1，内容不符时逐出仓库
+
+        Args:
+            sha1: 对象的 SHA-1
+            deep: 为 True 时总是重新计算
+
+        Returns:
+            对象是否存在且内容有效
+        """
+        with self._lock:
+            if not deep and sha1 in self._verified:
+                return True
+        try:
+            valid = get_sha1_hash(self.object_path(sha1)) == sha1
+        except OSError:
+            valid = False
+        if not valid:
+            self.evict(sha1)
+            return False
+        with self._lock:
+            self._verified.add(sha1)
+        return True
+
+    def evict(self, sha1: str) -> None:
+        """删除损坏的对象及指向它的所有引用，需要时会重新下载"""
+        object_path = self.object_path(sha1)
+        with self._lock:
+            self._verified.discard(sha1)
+            self._db.execute("DELETE FROM links WHERE sha1 = ?", (sha1,))
+            self._db.execute("DELETE FROM objects WHERE sha1 = ?", (sha1,))
+            self._db.commit()
+        try:
+            make_writable(object_path)
+            os.remove(object_path)
+        except FileNotFoundError:
+            pass
+        self.logger.write(f"仓库对象 {sha1} 的内容与 SHA-1 不符，已逐出仓库", LT.WARN)
+
+    def link(self, sha1: str, path: str, deep: bool = False) -> bool:
+        """校验仓库中的对象并链接到目标路径
+
+        Args:
+            sha1: 对象的 SHA-1
+            path: 游戏目录中的目标路径
+            deep: 为 True 时总是重新计算对象的 SHA-1
+
+        Returns:
+            仓库中没有该对象或对象已损坏（随即被逐出）时返回 False
+        """
+        if not self.contains(sha1) or not self.verify_object(sha1, deep):
+            return False
+
+        path = os.path.abspath(path)
+        object_path = self.object_path(sha1)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.link"
+        mode = self._make_link(object_path, temp_path)
+        make_writable(path)
+        os.replace(temp_path, path)
+        # Windows 上替换硬链接前去掉的只读属性由对象共享，这里重新设置
+        os.chmod(object_path, OBJECT_MODE)
+        self._record(path, sha1, mode)
+        return True
+
+    def adopt(self, path: str, sha1: str) -> None:
+        """把已校验的文件收入仓库，并把原路径替换为指向仓库的链接
+
+        Args:
+            path: 已下载且校验通过的文件
+            sha1: 文件的 SHA-1
+        """
+        path = os.path.abspath(path)
+        object_path = self.object_path(sha1)
+        # 已有的对象损坏时会被逐出，用这个已校验的文件重新收入
+        if not os.path.isfile(object_path) or not self.verify_object(sha1):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            temp_path = f"{object_path}.{threading.get_ident()}.tmp"
+            try:
+                os.link(path, temp_path)
+            except OSError:
+                # 仓库与游戏目录不在同一文件系统时只能复制
+                shutil.copyfile(path, temp_path)
+            os.replace(temp_path, object_path)
+            os.chmod(object_path, OBJECT_MODE)
+        with self._lock:
+            self._verified.add(sha1)
+            self._db.execute("INSERT OR IGNORE INTO objects (sha1, size) VALUES (?, ?)",
+                             (sha1, os.path.getsize(object_path)))
+            self._db.commit()
+        self.link(sha1, path)
+
+    def release(self, path: str) -> None:
+        """删除一条引用（不删除文件本身）"""
+        with self._lock:
+            self._db.execute("DELETE FROM links WHERE path = ?", (os.path.abspath(path),))
+            self._db.commit()
+
+    def release_dir(self, directory: str) -> int:
+        """删除某个游戏目录下的全部引用，在删除游戏目录前调用
+
+        Returns:
+            删除的引用数量
+        """
+        prefix = os.path.join(os.path.abspath(directory), "")
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM links WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+            self._db.commit()
+            return cursor.rowcount
+
+    def gc(self) -> Dict[str, int]:
+        """垃圾回收
+
+        先清除已经失效的引用（文件被删除或被替换），再删除引用计数为 0 的对象
+
+        Returns:
+            {"stale_links": 失效引用数, "objects": 删除的对象数, "bytes": 释放的字节数}
+        """
+        with self._lock:
+            links: List[tuple] = self._db.execute("SELECT path, sha1, mode FROM links").fetchall()
+            stale = [(path,) for path, sha1, mode in links if not self._link_alive(path, sha1, mode)]
+            self._db.executemany("DELETE FROM links WHERE path = ?", stale)
+
+            orphans = self._db.execute(
+                "SELECT sha1, size FROM objects WHERE sha1 NOT IN (SELECT DISTINCT sha1 FROM links)").fetchall()
+            freed = 0
+            for sha1, size in orphans:
+                try:
+                    make_writable(self.object_path(sha1))
+                    os.remove(self.object_path(sha1))
+                    freed += size
+                except FileNotFoundError:
+                    pass
+            self._db.executemany("DELETE FROM objects WHERE sha1 = ?", [(sha1,) for sha1, _ in orphans])
+            self._db.commit()
+
+        self.logger.write(f"垃圾回收完成: 清除 {len(stale)} 条失效引用，删除 {len(orphans)} 个对象，释放 {freed} 字节",
+                          LT.INFO)
+        return {"stale_links": len(stale), "objects": len(orphans), "bytes": freed}
+
+    def _link_alive(self, path: str, sha1: str, mode: str) -> bool:
+        """检查一条引用是否仍然有效"""
+        object_path = self.object_path(sha1)
+        if not os.path.isfile(path) or not os.path.isfile(object_path):
+            return False
+        if mode == LINK_HARDLINK:
+            return os.path.samefile(path, object_path)
+        return os.path.getsize(path) == os.path.getsize(object_path)
+
+    def _make_link(self, source: str, target: str) -> str:
+        """依次尝试 reflink、硬链接、复制，返回实际使用的方式"""
+        if os.path.lexists(target):
+            make_writable(target)
+            os.remove(target)
+        if reflink(source, target):
+            return LINK_REFLINK
+        try:
+            os.link(source, target)
+            return LINK_HARDLINK
+        except OSError:
+            shutil.copyfile(source, target)
+            return LINK_COPY
+
+    def _record(self, path: str, sha1: str, mode: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO links (path, sha1, mode) VALUES (?, ?, ?)", (path, sha1, mode))
+            self._db.commit()
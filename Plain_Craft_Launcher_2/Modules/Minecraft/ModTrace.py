@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+启动耗时追踪模块
+
+记录一次启动中各阶段（登录、元数据、文件校验、natives、启动命令、进程启动、首行日志、窗口创建）的耗时，
+可以导出为 Chrome trace JSON（在 chrome://tracing 或 Perfetto 中打开），
+每次启动的记录保存在本地历史中，用于比较启动器更新前后的启动耗时
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from Modules.Minecraft.ModGame import WINDOW_MARKERS
+
+DEFAULT_HISTORY_DIR = "./data/launch_history"
+
+# 默认保留的历史记录数量
+DEFAULT_HISTORY_SIZE = 100
+
+# 阶段名称
+PHASE_AUTH = "auth"
+PHASE_METADATA = "metadata"
+PHASE_FILES = "files"
+PHASE_NATIVES = "natives"
+PHASE_JAVA = "java_runtime"
+PHASE_COMMAND = "command"
+PHASE_SPAWN = "spawn"
+
+# 标记名称
+MARK_FIRST_LOG_LINE = "first_log_line"
+MARK_SETTING_USER = "setting_user"
+MARK_WINDOW_CREATED = "window_created"
+MARK_EXITED = "exited"
+
+# 出现这些内容的日志行说明正在设置玩家信息
+SETTING_USER_MARKERS = ("Setting user:",)
+
+
+def event_ms(event: Dict[str, Any]) -> float:
+    """阶段事件返回耗时，标记事件返回距开始的时间（毫秒）"""
+    return (event["dur"] if event["ph"] == "X" else event["ts"]) / 1000
+
+
+class LaunchTrace:
+    """一次启动的耗时记录"""
+
+    def __init__(self, name: str = "launch"):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1_000_000
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args) -> Iterator[None]:
+        """记录一个阶段的耗时
+
+        Example:
+            with trace.span(PHASE_AUTH):
+                login()
+        """
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            self._add({"name": name, "ph": "X", "ts": start, "dur": self._now_us() - start, "args": args})
+
+    def mark(self, name: str, **args) -> None:
+        """记录一个时间点"""
+        self._add({"name": name, "ph": "i", "s": "g", "ts": self._now_us(), "args": args})
+
+    def _add(self, event: Dict[str, Any]) -> None:
+        event["pid"] = os.getpid()
+        event["tid"] = threading.get_ident()
+        with self._lock:
+            self._spans.append(event)
+
+    def durations(self) -> Dict[str, float]:
+        """各阶段耗时（毫秒）与各标记距开始的时间（毫秒）"""
+        with self._lock:
+            events = list(self._spans)
+        return {event["name"]: event_ms(event) for event in events}
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """导出为 Chrome trace 格式"""
+        with self._lock:
+            events = [dict(event) for event in self._spans]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"id": self.id, "name": self.name, "started_at": self.started_at}
+        }
+
+    def save(self, path: str) -> None:
+        """保存为 Chrome trace JSON 文件"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        os.replace(f"{path}.tmp", path)
+
+
+class LaunchHistory:
+    """本地启动耗时历史"""
+
+    def __init__(self, history_dir: str = DEFAULT_HISTORY_DIR, max_entries: int = DEFAULT_HISTORY_SIZE):
+        """初始化历史
+
+        Args:
+            history_dir: 历史目录，每次启动保存为一个 Chrome trace 文件
+            max_entries: 保留的记录数量，超出时删除最早的记录
+        """
+        self.history_dir = history_dir
+        self.max_entries = max_entries
+
+    def _path(self, trace: LaunchTrace) -> str:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(trace.started_at))
+        return os.path.join(self.history_dir, f"{stamp}-{trace.id[:8]}.json")
+
+    def save(self, trace: LaunchTrace) -> str:
+        """保存（或更新）一次启动的记录
+
+        Returns:
+            记录文件路径
+        """
+        path = self._path(trace)
+        trace.save(path)
+        for old in self.entries()[:-self.max_entries]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        return path
+
+    def entries(self) -> List[str]:
+        """按时间从早到晚返回所有记录文件"""
+        try:
+            names = os.listdir(self.history_dir)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.history_dir, name) for name in sorted(names) if name.endswith(".json")]
+
+    def load(self, path: str) -> Dict[str, Any]:
+        """读取一条记录"""
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def summary(self, last: Optional[int] = None) -> List[Dict[str, float]]:
+        """返回最近若干次启动各阶段的耗时（毫秒），用于比较不同版本间的变化"""
+        result = []
+        for path in self.entries()[-last if last else 0:]:
+            events = self.load(path)["traceEvents"]
+            result.append({event["name"]: event_ms(event) for event in events})
+        return result
+
+
+def game_line_handler(trace: LaunchTrace, on_window_created: Optional[Callable[[], None]] = None) -> Callable:
+    """生成 GameProcess 的日志行回调，记录首行日志、设置玩家与窗口创建的时间点
+
+    Args:
+        trace: 启动耗时记录
+        on_window_created: 窗口创建后调用，通常用于保存记录
+    """
+    pending = {MARK_FIRST_LOG_LINE, MARK_SETTING_USER, MARK_WINDOW_CREATED}
+
+    def handler(process, stream: str, line: str) -> None:
+        if not pending:
+            return
+        if MARK_FIRST_LOG_LINE in pending:
+            pending.discard(MARK_FIRST_LOG_LINE)
+            trace.mark(MARK_FIRST_LOG_LINE)
+        if MARK_SETTING_USER in pending and any(marker in line for marker in SETTING_USER_MARKERS):
+            pending.discard(MARK_SETTING_USER)
+            trace.mark(MARK_SETTING_USER)
+        if MARK_WINDOW_CREATED in pending and any(marker in line for marker in WINDOW_MARKERS):
+            pending.discard(MARK_WINDOW_CREATED)
+            trace.mark(MARK_WINDOW_CREATED)
+            if on_window_created is not None:
+                on_window_created()
+
+    return handler
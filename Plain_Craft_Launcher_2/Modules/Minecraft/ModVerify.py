@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+文件校验索引模块
+
+为每个已校验的库与资源文件记录 (大小, 修改时间, SHA-1)，
+之后的启动前检查只需 stat 一次，元数据未变化的文件不再重新计算哈希
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+# 计算哈希时每次读取的块大小
+READ_SIZE = 1024 * 1024
+
+
+def get_sha1_hash(path: str) -> str:
+    """计算文件的 SHA-1
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        十六进制的 SHA-1 字符串
+    """
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(READ_SIZE)
+            if not data:
+                break
+            sha1.update(data)
+    return sha1.hexdigest()
+
+
+class VerifyIndex:
+    """持久化的文件校验索引"""
+
+    def __init__(self, path: str):
+        """初始化索引
+
+        Args:
+            path: 索引文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries: Dict[str, List] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def check_fast(self, path: str, sha1: str, size: Optional[int] = None) -> bool:
+        """只用 stat 判断文件是否与上次校验时一致
+
+        Returns:
+            大小、修改时间与记录一致且记录的 SHA-1 等于期望值时返回 True，
+            返回 False 不代表文件损坏，只代表需要重新计算哈希
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if size is not None and stat.st_size != size:
+            return False
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+        return entry == [stat.st_size, stat.st_mtime_ns, sha1]
+
+    def check(self, path: str, sha1: str, size: Optional[int] = None, deep: bool = False) -> bool:
+        """校验文件
+
+        Args:
+            path: 文件路径
+            sha1: 期望的 SHA-1
+            size: 期望的大小，为 None 时不检查
+            deep: 为 True 时忽略索引，总是重新计算哈希
+
+        Returns:
+            文件是否有效
+        """
+        if not deep and self.check_fast(path, sha1, size):
+            return True
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if (size is not None and stat.st_size != size) or get_sha1_hash(path) != sha1:
+            self.forget(path)
+            return False
+        self.record(path, sha1, stat)
+        return True
+
+    def record(self, path: str, sha1: str, stat: Optional[os.stat_result] = None) -> None:
+        """记录一个已经校验通过的文件"""
+        stat = stat or os.stat(path)
+        with self._lock:
+            self._entries[self._key(path)] = [stat.st_size, stat.st_mtime_ns, sha1]
+            self._dirty = True
+
+    def forget(self, path: str) -> None:
+        """删除一条记录"""
+        with self._lock:
+            if self._entries.pop(self._key(path), None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """写回磁盘"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+            self._dirty = False
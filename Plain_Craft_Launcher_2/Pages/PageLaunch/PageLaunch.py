@@ -1,8 +1,10 @@
 from PyQt5.QtWidgets import QWidget
 from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSlot
 
 from Pages.PageLaunch.PageLaunchLeft import PageLaunchLeft
 from Modules.Base.ModSetup import ModSetup as Setup
+from Modules.Base.ModSetupSignal import settings_signal
 from Modules.Base.ModLogging import ModLogging, LoggingType as LT
 
 
@@ -23,13 +25,9 @@ class PageLaunch(QWidget):
         
         # 使用 setAttribute 确保背景色生效
         self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
-        # 设置样式表
-        self.setStyleSheet(f"""
-            QWidget#PageLaunch {{
-                background-color: transparent;
-                border-bottom-left-radius: {Setup().get_settings('corner_radius')}px;
-            }}
-        """)
+        # 设置样式表，圆角设置变化时更新
+        self.apply_style(setup.get_settings('corner_radius'))
+        settings_signal().changed.connect(self._on_setting_changed)
 
 
         # 初始化左侧 Panel 
@@ -37,6 +35,21 @@ class PageLaunch(QWidget):
         self.PanLeft.setGeometry(QtCore.QRect(0, 0, 300, (setup.get_settings("size")[1] - setup.get_settings("title_height"))))
 
 
+    @pyqtSlot(str, object)
+    def _on_setting_changed(self, setting, value):
+        """圆角设置变化时更新样式表"""
+        if setting == 'corner_radius':
+            self.apply_style(value)
+
+    def apply_style(self, corner_radius):
+        """按圆角设置更新样式表"""
+        self.setStyleSheet(f"""
+            QWidget#PageLaunch {{
+                background-color: transparent;
+                border-bottom-left-radius: {corner_radius}px;
+            }}
+        """)
+
     def resizeEvent(self, event):
         """处理页面大小变化"""
         super().resizeEvent(event)
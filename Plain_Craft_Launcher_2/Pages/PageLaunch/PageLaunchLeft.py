@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
 from PyQt5.QtWidgets import QWidget, QLabel
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSlot
 
 from Modules.Base.ModSetup import ModSetup as Setup
+from Modules.Base.ModSetupSignal import settings_signal
 
 class PageLaunchLeft(QWidget):
     """启动页左侧面板"""
@@ -18,14 +19,9 @@ class PageLaunchLeft(QWidget):
         
         # 使用 setAttribute 确保背景色生效
         self.setAttribute(Qt.WA_StyledBackground, True)
-        # 设置样式表
-        corner_radius = Setup().get_settings('corner_radius')
-        self.setStyleSheet(f"""
-            QWidget#PageLaunchLeft {{
-                background-color: #ffffff;
-                border-bottom-left-radius: {corner_radius}px;
-            }}
-        """)
+        # 设置样式表，圆角设置变化时更新
+        self.apply_style(Setup().get_settings('corner_radius'))
+        settings_signal().changed.connect(self._on_setting_changed)
 
         # 设置对齐方式
         self.setContentsMargins(0, 0, 0, 0)
@@ -35,3 +31,18 @@ class PageLaunchLeft(QWidget):
         self.label.setGeometry(10, 10, 280, 30)
 
         self.raise_()
+
+    @pyqtSlot(str, object)
+    def _on_setting_changed(self, setting, value):
+        """圆角设置变化时更新样式表"""
+        if setting == 'corner_radius':
+            self.apply_style(value)
+
+    def apply_style(self, corner_radius):
+        """按圆角设置更新样式表"""
+        self.setStyleSheet(f"""
+            QWidget#PageLaunchLeft {{
+                background-color: #ffffff;
+                border-bottom-left-radius: {corner_radius}px;
+            }}
+        """)
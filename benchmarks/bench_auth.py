@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+登录链基准测试：Xbox、XSTS、Minecraft 登录与个人资料四跳
+
+三个本地 HTTPS 服务器分别模拟 user.auth.xboxlive.com、xsts.auth.xboxlive.com 与 api.minecraftservices.com，
+每个新的 TLS 连接额外延迟 --handshake 秒，每个请求延迟 --latency 秒，比较：
+- 原实现：每一跳直接调用 requests.post / requests.get，每次都建立新的 TLS 连接
+- 冷启动：新建 MinecraftMicrosoftLogin（新的会话）后第一次登录
+- 热启动：同一实例再次走完整登录链，复用 keep-alive 连接
+- 缓存命中：登录链缓存中的 Minecraft 令牌仍然有效，不发起请求
+另外检查 XSTS 端点卡住时，总时限能否让登录按时失败。
+
+微软账户令牌（MSAL）一跳需要真实的微软账户，不在测量范围内，基准测试直接返回固定的访问令牌
+
+    python benchmarks/bench_auth.py
+    python benchmarks/bench_auth.py --handshake 0.1 --latency 0.03 --rounds 50
+"""
+
+import argparse
+import datetime
+import ipaddress
+import json
+import os
+import ssl
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from bench_server import enter_temp_workdir
+
+ACCOUNT_ID = "bench-uid.bench-utid"
+
+
+def create_certificate(folder: str) -> tuple:
+    """为 127.0.0.1 生成自签名证书，返回 (证书路径, 私钥路径)"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (x509.CertificateBuilder()
+                   .subject_name(name).issuer_name(name)
+                   .public_key(key.public_key())
+                   .serial_number(x509.random_serial_number())
+                   .not_valid_before(now - datetime.timedelta(days=1))
+                   .not_valid_after(now + datetime.timedelta(days=1))
+                   .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]),
+                                  critical=False)
+                   .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+                   .sign(key, hashes.SHA256()))
+    cert_path, key_path = os.path.join(folder, "stub.pem"), os.path.join(folder, "stub.key")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+def not_after() -> str:
+    return (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=16)).isoformat()
+
+
+# 各端点的响应
+RESPONSES = {
+    "/user/authenticate": lambda: {"Token": "xbl-token", "NotAfter": not_after(),
+                                   "DisplayClaims": {"xui": [{"uhs": "1234"}]}},
+    "/xsts/authorize": lambda: {"Token": "xsts-token", "NotAfter": not_after(),
+                                "DisplayClaims": {"xui": [{"uhs": "1234"}]}},
+    "/authentication/login_with_xbox": lambda: {"access_token": "mc-token", "expires_in": 86400},
+    "/minecraft/profile": lambda: {"id": "0123456789abcdef0123456789abcdef", "name": "Bench"}
+}
+
+
+class StubServer(ThreadingHTTPServer):
+    """模拟一个认证主机的 HTTPS 服务器"""
+
+    daemon_threads = True
+
+    def __init__(self, context: ssl.SSLContext, handshake: float, latency: float):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.context = context
+        self.handshake = handshake
+        self.latency = latency
+        # 卡住的时长（秒），用于检查总时限
+        self.stall = 0.0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.base_url = f"https://127.0.0.1:{self.server_address[1]}"
+        threading.Thread(target=self.serve_forever, name="AuthStub", daemon=True).start()
+
+    def finish_request(self, request, client_address) -> None:
+        # 在连接线程中完成握手，模拟的握手延迟不会阻塞其他连接
+        with self._lock:
+            self.connections += 1
+        time.sleep(self.handshake)
+        try:
+            request = self.context.wrap_socket(request, server_side=True)
+        except (ssl.SSLError, OSError):
+            return
+        self.RequestHandlerClass(request, client_address, self)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._respond()
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._respond()
+
+    def _respond(self) -> None:
+        time.sleep(self.server.latency + self.server.stall)
+        response = RESPONSES.get(self.path)
+        body = json.dumps(response()).encode() if response else b""
+        self.send_response(200 if response else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--handshake", type=float, default=0.04, help="每个新 TLS 连接的额外延迟（秒）")
+    parser.add_argument("--latency", type=float, default=0.01, help="每个请求的延迟（秒）")
+    parser.add_argument("--rounds", type=int, default=20, help="每种情况登录的次数")
+    args = parser.parse_args()
+
+    folder = enter_temp_workdir()
+    import requests
+    from Modules.Minecraft.ModMsAuth import MinecraftMicrosoftLogin
+
+    cert_path, key_path = create_certificate(folder)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    xbox, xsts, minecraft = (StubServer(context, args.handshake, args.latency) for _ in range(3))
+    servers = (xbox, xsts, minecraft)
+
+    class BenchLogin(MinecraftMicrosoftLogin):
+        """指向本地服务器的登录类，微软账户一跳直接返回固定令牌"""
+
+        XBOX_AUTH_URL = xbox.base_url + "/user/authenticate"
+        XSTS_AUTH_URL = xsts.base_url + "/xsts/authorize"
+        MC_LOGIN_URL = minecraft.base_url + "/authentication/login_with_xbox"
+        MC_PROFILE_URL = minecraft.base_url + "/minecraft/profile"
+
+        def get_microsoft_token(self, *args, **kwargs) -> Dict[str, Any]:
+            return {"success": True, "token": {"access_token": "ms-token"}, "account_id": ACCOUNT_ID}
+
+        def _account_id(self, username):
+            return ACCOUNT_ID
+
+    def create_login(**options) -> BenchLogin:
+        session = MinecraftMicrosoftLogin._create_session()
+        session.verify = cert_path
+        # 设置了 REQUESTS_CA_BUNDLE 等环境变量时，requests 会用它覆盖会话的 verify
+        session.trust_env = False
+        return BenchLogin("bench", cache_path=os.path.join(folder, "msal_token_cache.json"), session=session,
+                          **options)
+
+    def bare_login() -> None:
+        """原实现：每一跳都用模块级的 requests 函数，没有会话"""
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        requests.post(BenchLogin.XBOX_AUTH_URL, headers=headers, json={}, verify=cert_path).raise_for_status()
+        requests.post(BenchLogin.XSTS_AUTH_URL, headers=headers, json={}, verify=cert_path).raise_for_status()
+        requests.post(BenchLogin.MC_LOGIN_URL, headers=headers, json={}, verify=cert_path).raise_for_status()
+        requests.get(BenchLogin.MC_PROFILE_URL, headers={"Authorization": "Bearer mc-token"},
+                     verify=cert_path).raise_for_status()
+
+    def measure(name: str, prepare, run) -> None:
+        times, connections = [], []
+        for _ in range(args.rounds):
+            state = prepare()
+            before = sum(server.connections for server in servers)
+            start = time.perf_counter()
+            run(state)
+            times.append((time.perf_counter() - start) * 1000)
+            connections.append(sum(server.connections for server in servers) - before)
+        print(f"{name:<16}{statistics.median(times):>10.1f}{max(times):>10.1f}{statistics.mean(connections):>10.1f}")
+
+    def check(result: Dict[str, Any]) -> None:
+        if not result["success"]:
+            raise RuntimeError(f"登录失败: {result}")
+
+    shared = create_login()
+    check(shared.login())
+
+    def clear_shared():
+        shared.clear_chain()
+        return shared
+
+    print(f"每个新 TLS 连接 {args.handshake * 1000:.0f} ms，每个请求 {args.latency * 1000:.0f} ms，"
+          f"每种情况 {args.rounds} 次")
+    print(f"{'情况':<16}{'中位数 (ms)':>10}{'最大 (ms)':>10}{'新连接数':>10}")
+    measure("原实现", lambda: None, lambda _: bare_login())
+    measure("冷启动", lambda: (create_login(), shared.clear_chain())[0], lambda login: check(login.login()))
+    measure("热启动", clear_shared, lambda login: check(login.login()))
+    measure("缓存命中", lambda: shared, lambda login: check(login.login()))
+
+    xsts.stall = 5
+    login = create_login(login_deadline=1)
+    login.clear_chain()
+    start = time.perf_counter()
+    result = login.login()
+    print(f"XSTS 卡住 {xsts.stall} 秒、总时限 {login.login_deadline} 秒："
+          f"{'成功' if result['success'] else '失败'}，耗时 {time.perf_counter() - start:.2f} 秒")
+    xsts.stall = 0
+    for server in servers:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+安装下载的基准测试：DownloadEngine 与 minecraft_launcher_lib 逐个下载的对比
+
+从本地服务器（每个请求固定延迟）安装同一个合成版本，分别记录 minecraft_launcher_lib 与
+不同并发数的 DownloadEngine 冷安装（空目录）与热安装（文件已存在）的耗时
+
+    python benchmarks/bench_download.py
+    python benchmarks/bench_download.py --latency 0.05 --assets 2000 --workers 1 16 32
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+from bench_server import BenchServer, enter_temp_workdir
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.02, help="每个请求的延迟（秒）")
+    parser.add_argument("--libraries", type=int, default=40, help="库的数量")
+    parser.add_argument("--assets", type=int, default=600, help="资源文件的数量")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 16, 32], help="DownloadEngine 的并发数")
+    parser.add_argument("--skip-mclib", action="store_true", help="不测量 minecraft_launcher_lib")
+    args = parser.parse_args()
+
+    enter_temp_workdir()
+    server = BenchServer(latency=args.latency)
+    server.build_version(n_libs=args.libraries, n_assets=args.assets)
+    server.redirect_installer()
+    from Modules.Minecraft.ModInstall import install_minecraft_version
+
+    print(f"{args.libraries} 个库，{args.assets} 个资源，每个请求延迟 {args.latency * 1000:.0f} ms")
+    print(f"{'实现':<24}{'冷安装 (s)':>12}{'热安装 (s)':>12}{'请求数':>10}")
+
+    def report(name: str, install) -> None:
+        minecraft_dir = tempfile.mkdtemp(prefix="pcl-bench-")
+        try:
+            server.requests = 0
+            cold = timed(install, minecraft_dir)
+            requests = server.requests
+            warm = timed(install, minecraft_dir)
+            print(f"{name:<24}{cold:>12.2f}{warm:>12.2f}{requests:>10}")
+        finally:
+            shutil.rmtree(minecraft_dir, ignore_errors=True)
+
+    if not args.skip_mclib:
+        import minecraft_launcher_lib as mclib
+
+        server.redirect_requests()
+        report("minecraft_launcher_lib", lambda path: mclib.install.install_minecraft_version("1.20.1", path))
+    for workers in args.workers:
+        report(f"DownloadEngine x{workers}",
+               lambda path: install_minecraft_version("1.20.1", path, max_workers=workers))
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+日志的基准测试：原实现与 LogManager 队列每秒记录的日志条数
+
+- 原实现：ModLogging.write 每条日志打开 Log1.log、追加一行后关闭，再 print 一行带颜色的日志，全部在调用线程中完成
+- 队列：ModLogging.write 只把日志放入 LogManager 的队列，由写入线程成批写入
+
+分别记录调用线程写完全部日志的耗时（GUI 线程感受到的开销）与全部写入磁盘（flush 返回）的耗时。
+控制台输出重定向到空设备，测量的是格式化与写入的开销而不是终端的刷新速度；
+控制台关闭时原实现不 print，只比较文件写入的开销；
+队列使用 block 溢出策略，保证每条日志都被写入
+
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --records 200000 --threads 1 8
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import threading
+import time
+
+from bench_server import enter_temp_workdir
+
+# 原实现使用的格式与颜色
+SPACE_MAP = {'Info': '  ', 'Warn': '  ', 'Error': ' ', 'Fatal': ' '}
+COLOR_MAP = {'Info': '\033[32m', 'Warn': '\033[33m', 'Error': '\033[31m', 'Fatal': '\033[31m'}
+CLEAR = '\033[0m'
+
+
+def now() -> str:
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class OriginalLogging():
+    """原 ModLogging.write 的写入方式"""
+
+    def __init__(self, folder: str, module_name: str, console: bool) -> None:
+        self.path = os.path.join(folder, 'Log1.log')
+        self.module_name = module_name
+        self.console = console
+        open(self.path, 'w', encoding='utf-8').close()
+
+    def write(self, message: str, log_level) -> None:
+        level = str(log_level)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f'[{level}]{SPACE_MAP[level]}[{self.module_name}] {now()} > {message}\n')
+        if self.console:
+            print(f'{COLOR_MAP[level]}[{level}]{CLEAR}{SPACE_MAP[level]}[{self.module_name}] {now()} > {message}')
+
+
+def run_callers(write, records: int, threads: int, level) -> float:
+    """threads 个线程共写入 records 条日志，返回调用线程全部返回的耗时"""
+    per_thread = records // threads
+
+    def caller(index: int) -> None:
+        for i in range(per_thread):
+            write(f'下载完成 libraries/com/example/lib{index}-{i}.jar', level)
+
+    workers = [threading.Thread(target=caller, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=50000, help="每种情况写入的日志条数")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4], help="同时写日志的线程数")
+    args = parser.parse_args()
+
+    folder = enter_temp_workdir()
+    from Modules.Base.ModLogging import LogManager, LoggingType, ModLogging, OVERFLOW_BLOCK
+
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    stdout = sys.stdout
+    print(f"每种情况 {args.records} 条日志，控制台输出重定向到空设备")
+    print(f"{'实现':<10}{'控制台':>6}{'线程':>6}{'调用 (条/s)':>14}{'写入磁盘 (条/s)':>18}")
+
+    def report(name: str, console: bool, threads: int, calls: float, total: float) -> None:
+        print(f"{name:<10}{'开' if console else '关':>6}{threads:>6}"
+              f"{args.records / calls:>14,.0f}{args.records / total:>18,.0f}")
+
+    for console in (True, False):
+        for threads in args.threads:
+            sub_folder = os.path.join(folder, f'original-{console}-{threads}')
+            os.makedirs(sub_folder)
+            logger = OriginalLogging(sub_folder, 'Bench', console)
+            sys.stdout = devnull
+            try:
+                elapsed = run_callers(logger.write, args.records, threads, LoggingType.INFO)
+            finally:
+                sys.stdout = stdout
+            # 原实现在返回前已经写入磁盘
+            report("原实现", console, threads, elapsed, elapsed)
+
+            sub_folder = os.path.join(folder, f'queue-{console}-{threads}')
+            os.makedirs(sub_folder)
+            manager = LogManager(folder=sub_folder, overflow=OVERFLOW_BLOCK)
+            manager.console = console
+            # ModLogging 通过 LogManager.instance() 取得管理器，换成写入临时目录的实例
+            LogManager._instance = manager
+            logger = ModLogging(module_name='Bench')
+            sys.stdout = devnull
+            try:
+                start = time.perf_counter()
+                elapsed = run_callers(logger.write, args.records, threads, LoggingType.INFO)
+                manager.flush()
+                total = time.perf_counter() - start
+            finally:
+                sys.stdout = stdout
+                manager.close()
+            report("队列", console, threads, elapsed, total)
+    devnull.close()
+
+
+if __name__ == "__main__":
+    main()
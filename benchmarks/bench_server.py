@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+基准测试用的本地 HTTP 服务器
+
+在本机模拟版本清单、版本 JSON、库、资源索引与资源文件的下载源，支持：
+- 每个请求固定的延迟，模拟到官方源的往返时间
+- ETag / If-None-Match（304）与 Range / If-Range（206）
+- 断线注入：每个路径第一次传输到指定字节数后断开连接，用于检查续传
+
+    server = BenchServer(latency=0.02)
+    manifest_url = server.build_version(n_libs=40, n_assets=600)
+    server.redirect_installer()  # ModPlan 从本地服务器读取清单与资源
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+
+# 基准测试直接导入启动器的模块，与启动器一样以程序目录为导入根目录
+PROGRAM_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Plain_Craft_Launcher_2")
+if PROGRAM_DIR not in sys.path:
+    sys.path.insert(0, PROGRAM_DIR)
+# 日志只写入文件，不与测量结果混在一起输出
+os.environ.setdefault("PCL_LOG_CONSOLE", "0")
+
+# 官方源地址与本地服务器路径的对应关系，供 redirect_requests 使用
+OFFICIAL_MANIFEST_URL = "https://launchermeta.mojang.com/mc/game/version_manifest_v2.json"
+OFFICIAL_RESOURCES_URL = "https://resources.download.minecraft.net/"
+
+
+def enter_temp_workdir() -> str:
+    """切换到退出时删除的临时工作目录，元数据缓存（./data）等相对路径不会写入仓库，也不会沿用上次运行的缓存"""
+    path = tempfile.mkdtemp(prefix="pcl-bench-")
+    os.chdir(path)
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def make_bytes(size: int, seed: int) -> bytes:
+    """生成可重复的伪随机内容"""
+    return random.Random(seed).randbytes(size)
+
+
+class BenchServer:
+    """本地下载源，在后台线程中运行"""
+
+    def __init__(self, latency: float = 0.02, fail_after: Optional[int] = None):
+        """启动服务器
+
+        Args:
+            latency: 每个请求的延迟（秒）
+            fail_after: 不为 None 时，每个路径第一次传输到该字节数后断开连接
+        """
+        self.files: Dict[str, bytes] = {}
+        self.latency = latency
+        self.fail_after = fail_after
+        # 已经注入过断线的路径
+        self.dropped: Set[str] = set()
+        # (路径, Range, If-Range) 的请求记录，只记录带 Range 的请求
+        self.range_requests: List[Tuple[str, str, Optional[str]]] = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, name="BenchServer", daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add(self, path: str, data: bytes) -> Dict[str, object]:
+        """添加文件，返回版本 JSON 格式的 {url, sha1, size}"""
+        self.files[path] = data
+        return {"url": self.base_url + path, "sha1": hashlib.sha1(data).hexdigest(), "size": len(data)}
+
+    def build_version(self, n_libs: int = 40, n_assets: int = 600, version_id: str = "1.20.1",
+                      asset_size: int = 2000, lib_size: int = 20000, client_size: int = 300000) -> str:
+        """生成一个版本的全部文件，资源按声音、纹理、语言、音乐轮流分配
+
+        Returns:
+            版本清单的地址
+        """
+        objects = {}
+        categories = ["minecraft/sounds/a%d.ogg", "minecraft/textures/b%d.png",
+                      "minecraft/lang/c%d.json", "minecraft/music/m%d.ogg"]
+        for i in range(n_assets):
+            data = make_bytes(asset_size + i % 50, i)
+            sha1 = hashlib.sha1(data).hexdigest()
+            self.files[f"/objects/{sha1[:2]}/{sha1}"] = data
+            objects[categories[i % 4] % i] = {"hash": sha1, "size": len(data)}
+        asset_index = json.dumps({"objects": objects}).encode()
+
+        libraries = []
+        for i in range(n_libs):
+            path = f"org/bench/lib{i}/1.0/lib{i}-1.0.jar"
+            artifact = self.add("/libraries/" + path, make_bytes(lib_size, 10000 + i))
+            artifact["path"] = path
+            libraries.append({"name": f"org.bench:lib{i}:1.0", "downloads": {"artifact": artifact}})
+
+        logging_file = self.add("/client-1.12.xml", b"<Configuration/>")
+        logging_file["id"] = "client-1.12.xml"
+        version = {
+            "id": version_id, "type": "release", "mainClass": "net.minecraft.client.main.Main", "assets": "bench",
+            "assetIndex": dict(self.add("/indexes/bench.json", asset_index), id="bench"),
+            "downloads": {"client": self.add("/client.jar", make_bytes(client_size, 99))},
+            "libraries": libraries,
+            "logging": {"client": {"argument": "-Dlog4j.configurationFile=${path}", "file": logging_file,
+                                   "type": "log4j2-xml"}},
+            "arguments": {"game": [], "jvm": []}
+        }
+        version_file = self.add(f"/versions/{version_id}.json", json.dumps(version).encode())
+        manifest = {"latest": {}, "versions": [{"id": version_id, "type": "release", "url": version_file["url"],
+                                                "sha1": version_file["sha1"]}]}
+        self.files["/manifest.json"] = json.dumps(manifest).encode()
+        return self.base_url + "/manifest.json"
+
+    def redirect_installer(self) -> None:
+        """让 ModPlan 从本地服务器读取版本清单与资源文件"""
+        from Modules.Minecraft import ModPlan
+
+        ModPlan.VERSION_MANIFEST_URL = self.base_url + "/manifest.json"
+        ModPlan.RESOURCES_URL = self.base_url + "/objects"
+
+    def redirect_requests(self) -> None:
+        """把 requests 发往官方版本清单与资源地址的请求改发到本地服务器，用于测量 minecraft_launcher_lib"""
+        import requests
+
+        original = requests.Session.request
+        redirects = [(OFFICIAL_MANIFEST_URL, self.base_url + "/manifest.json"),
+                     (OFFICIAL_RESOURCES_URL, self.base_url + "/objects/")]
+
+        def request(session, method, url, *args, **kwargs):
+            for official, local in redirects:
+                if url.startswith(official):
+                    url = local + url[len(official):]
+            return original(session, method, url, *args, **kwargs)
+
+        requests.Session.request = request
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头与内容分两次发送，开启 Nagle 算法时每个 keep-alive 请求会多等一次延迟确认（约 40 ms）
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+                body = server.files.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                start = 0
+                range_header = self.headers.get("Range")
+                if range_header:
+                    with server._lock:
+                        server.range_requests.append((self.path, range_header, self.headers.get("If-Range")))
+                # If-Range 与当前 ETag 不一致时按 RFC 9110 返回完整内容
+                if range_header and range_header.startswith("bytes=") and self.headers.get("If-Range") in (None, etag):
+                    start = int(range_header[6:].split("-")[0])
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                else:
+                    self.send_response(200)
+                part = body[start:]
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Length", str(len(part)))
+                self.end_headers()
+
+                with server._lock:
+                    drop = (server.fail_after is not None and len(part) > server.fail_after
+                            and self.path not in server.dropped)
+                    if drop:
+                        server.dropped.add(self.path)
+                if drop:
+                    self.wfile.write(part[:server.fail_after])
+                    self.wfile.flush()
+                    self.connection.shutdown(2)
+                    self.close_connection = True
+                    return
+                self.wfile.write(part)
+
+        return Handler
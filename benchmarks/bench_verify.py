@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+已安装版本的校验基准测试：校验索引对重复安装（热启动）的影响
+
+先从本地服务器完整安装一次，再对同一目录重复安装，所有文件都已存在，耗时主要是校验：
+- 冷校验：删除校验索引，每个文件都要计算 SHA-1
+- 热校验：索引中大小与修改时间未变化的文件跳过哈希计算
+- 深度校验：忽略索引，重新计算所有文件的哈希
+
+    python benchmarks/bench_verify.py
+    python benchmarks/bench_verify.py --assets 5000 --rounds 3
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from bench_server import BenchServer, enter_temp_workdir
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=5000, help="资源文件的数量")
+    parser.add_argument("--asset-size", type=int, default=32 * 1024, help="资源文件的大小（字节）")
+    parser.add_argument("--libraries", type=int, default=40, help="库的数量")
+    parser.add_argument("--rounds", type=int, default=3, help="每种模式重复的次数，取最小值")
+    parser.add_argument("--workers", type=int, default=16, help="并发数")
+    args = parser.parse_args()
+
+    enter_temp_workdir()
+    server = BenchServer(latency=0)
+    server.build_version(n_libs=args.libraries, n_assets=args.assets, asset_size=args.asset_size)
+    server.redirect_installer()
+    from Modules.Minecraft.ModInstall import install_minecraft_version, LAUNCHER_DATA_DIR
+
+    minecraft_dir = tempfile.mkdtemp(prefix="pcl-bench-")
+    index_path = os.path.join(minecraft_dir, LAUNCHER_DATA_DIR, "verify_index.json")
+    install_minecraft_version("1.20.1", minecraft_dir, max_workers=args.workers)
+
+    def measure(deep: bool = False, drop_index: bool = False) -> tuple:
+        best, requests = None, 0
+        for _ in range(args.rounds):
+            if drop_index and os.path.exists(index_path):
+                os.remove(index_path)
+            server.requests = 0
+            start = time.perf_counter()
+            install_minecraft_version("1.20.1", minecraft_dir, max_workers=args.workers, deep_verify=deep)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            requests = server.requests
+        return best, requests
+
+    print(f"{args.libraries} 个库，{args.assets} 个 {args.asset_size // 1024} KiB 的资源，每种模式 {args.rounds} 次取最小值")
+    print(f"{'模式':<12}{'耗时 (s)':>10}{'请求数':>8}")
+    for name, options in (("冷校验", {"drop_index": True}), ("热校验", {}), ("深度校验", {"deep": True})):
+        elapsed, requests = measure(**options)
+        print(f"{name:<12}{elapsed:>10.3f}{requests:>8}")
+
+    shutil.rmtree(minecraft_dir, ignore_errors=True)
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
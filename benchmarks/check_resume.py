@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+断点续传的回归检查
+
+本地服务器在每个文件第一次传输到一半时断开连接，检查 DownloadEngine 的 .part 文件与传输日志：
+- 断线后保留 .part 与日志记录，重新启动后用 Range + If-Range 从日志记录的位置继续，结果与原文件一致
+- 日志中的校验值与服务器不一致（文件已变化）时，服务器返回完整内容，引擎从头写入
+- .part 内容损坏时，续传后的 SHA-1 不匹配，丢弃 .part 并在重试时从头下载
+
+任意一项不通过时退出码为 1
+
+    python benchmarks/check_resume.py
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import zlib
+
+from bench_server import BenchServer, enter_temp_workdir, make_bytes
+
+FILE_SIZE = 300000
+FAIL_AFTER = 100000
+
+
+def main() -> int:
+    enter_temp_workdir()
+    from Modules.Minecraft.ModDownload import DownloadEngine, DownloadError, DownloadTask
+
+    server = BenchServer(latency=0, fail_after=FAIL_AFTER)
+    failures = []
+
+    def check(name: str, condition: bool, detail: str = "") -> None:
+        print(f"{'通过' if condition else '失败'}  {name}{f'（{detail}）' if detail and not condition else ''}")
+        if not condition:
+            failures.append(name)
+
+    def scenario(name: str, tamper=None, retries: int = 0) -> tuple:
+        """下载一个文件：第一次断线，tamper 修改磁盘上的状态后重新启动引擎续传
+
+        Returns:
+            (断线后日志记录的位置, 续传时带 Range 的请求)
+        """
+        print(f"== {name}")
+        folder = tempfile.mkdtemp(dir=".")
+        url_path = f"/{name}.bin"
+        info = server.add(url_path, make_bytes(FILE_SIZE, zlib.crc32(name.encode())))
+        task = DownloadTask(info["url"], os.path.join(folder, "file.bin"), info["sha1"], info["size"])
+        part_path = f"{task.path}.part"
+        journal_path = os.path.join(folder, "download_journal.json")
+
+        with DownloadEngine(retries=0, journal_path=journal_path) as engine:
+            try:
+                engine.download([task])
+                check("第一次下载在断线时失败", False, "下载没有失败，断线注入无效")
+            except DownloadError:
+                pass
+        with open(journal_path, "r", encoding="utf-8") as f:
+            entry = json.load(f).get(part_path, {})
+        check("保留 .part 文件", os.path.isfile(part_path))
+        check("日志记录了断点", 0 < entry.get("offset", 0) <= FAIL_AFTER, f"offset={entry.get('offset')}")
+
+        if tamper is not None:
+            tamper(part_path, journal_path)
+        server.range_requests.clear()
+        with DownloadEngine(retries=retries, journal_path=journal_path) as engine:
+            try:
+                engine.download([task])
+            except DownloadError as e:
+                check("重新启动后下载成功", False, str(e))
+                return entry.get("offset"), list(server.range_requests)
+
+        with open(task.path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        check("文件内容与原文件一致", digest == task.sha1)
+        check("删除 .part 文件", not os.path.exists(part_path))
+        with open(journal_path, "r", encoding="utf-8") as f:
+            check("清除日志记录", part_path not in json.load(f))
+        return entry.get("offset"), list(server.range_requests)
+
+    offset, requests = scenario("resume")
+    check("续传请求带有 Range 与 If-Range",
+          any(rng == f"bytes={offset}-" and if_range for _, rng, if_range in requests), repr(requests))
+
+    def stale_validator(part_path: str, journal_path: str) -> None:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        entries[part_path]["etag"] = '"changed-on-server"'
+        with open(journal_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+
+    _, requests = scenario("changed", stale_validator)
+    check("续传请求带有日志中的校验值", any(if_range == '"changed-on-server"' for _, _, if_range in requests),
+          repr(requests))
+
+    def corrupt_part(part_path: str, journal_path: str) -> None:
+        with open(part_path, "r+b") as f:
+            f.write(b"\0" * 1024)
+
+    _, requests = scenario("corrupted", corrupt_part, retries=1)
+    check("损坏的 .part 被丢弃后从头下载", len(requests) == 1, repr(requests))
+
+    server.close()
+    print(f"{len(failures)} 项失败" if failures else "全部通过")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())